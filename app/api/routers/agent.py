@@ -20,7 +20,6 @@ SSE event shape:
   data: {"type": "error",     "message": "..."}
 """
 
-import asyncio
 import json
 import logging
 from typing import AsyncGenerator
@@ -148,7 +147,6 @@ async def _run_refinement(
         yield _sse("narrate", {"message": "Scoring output against style guide constraints…"})
 
         try:
-            await asyncio.sleep(4)
             score_result = await judge.evaluate_constraint_score(
                 source=ts.sourceText,
                 hypothesis=new_text,
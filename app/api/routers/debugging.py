@@ -6,15 +6,21 @@ import psutil
 from datetime import datetime, timedelta
 import statistics
 import json
+import time
 import traceback
 import sacrebleu
+from prisma import Json
 
+from app.core.config import settings
 from app.db.base import prisma
+from app.db.bulk import BulkWriter, bulk_write_stats
 from app.services.translation_service import translation_service
+from app.services.length_budget import length_budgets
+from app.services.segment_pipeline import pipeline_stats
 from app.services.multi_engine_service import CleanMultiEngineService
 from app.utils.text_processing import detokenize_japanese
 from app.api.routers.analytics import calculate_chrf
-from app.dependencies import get_comet_model, get_cometkiwi_model, get_multi_engine_service
+from app.dependencies import get_comet_model, get_cometkiwi_model, get_multi_engine_service, get_transcreation_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/debug", tags=["Debugging"])
@@ -68,13 +74,20 @@ async def get_models_status(
             "translation_service": {
                 "available_models": available_models,
                 "loaded_models": list(translation_service.models.keys()),
+                "loaded_causal_models": list(translation_service.causal_models.keys()),
+                "gemma_prefix_cache": [
+                    {"model_key": model_key, "pair": f"{src}-{tgt}", "prefix_tokens": len(prefix_ids)}
+                    for (model_key, src, tgt), (prefix_ids, _) in translation_service.gemma_prefix_cache.items()
+                ],
                 "loaded_pipelines": list(translation_service.pipelines.keys()),
-                "device": translation_service.device
+                "device": translation_service.device,
+                "residency": translation_service.residency.stats(),
             },
             "cometkiwi_service": {
                 "is_loaded": cometkiwi_model is not None,
                 "model_name": "Unbabel/wmt22-cometkiwi-da" if cometkiwi_model else "N/A",
             },
+            "batch_scheduler": multi_engine_service.batch_scheduler.stats() if multi_engine_service else {},
             "multi_engine_service": {
                 "available_engines": list(multi_engine_service.engine_configs.keys()) if multi_engine_service else [],
                 "engine_configs": {
@@ -94,6 +107,186 @@ async def get_models_status(
         logger.error(f"Models status failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/batch-scheduler")
+async def get_batch_scheduler_stats(multi_engine_service=Depends(get_multi_engine_service)):
+    """Queue depth, batch size and wait-time metrics of the micro-batching scheduler"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **multi_engine_service.batch_scheduler.stats(),
+    }
+
+@router.get("/engine-workers")
+async def get_engine_workers(multi_engine_service=Depends(get_multi_engine_service)):
+    """Engine worker processes: liveness, resident models, assignment and call counts"""
+    if multi_engine_service.worker_pool is None:
+        return {"enabled": False, "timestamp": datetime.now().isoformat()}
+    return {
+        "enabled": True,
+        "timestamp": datetime.now().isoformat(),
+        **multi_engine_service.worker_pool.stats(),
+    }
+
+@router.get("/remote-engines")
+async def get_remote_engines(multi_engine_service=Depends(get_multi_engine_service)):
+    """Remote engine nodes: health, served engine/pairs, resident models and failovers"""
+    if multi_engine_service.remote_engines is None:
+        return {"enabled": False, "timestamp": datetime.now().isoformat()}
+    return {
+        "enabled": True,
+        "timestamp": datetime.now().isoformat(),
+        **multi_engine_service.remote_engines.stats(),
+    }
+
+@router.post("/remote-engines/check")
+async def check_remote_engines(multi_engine_service=Depends(get_multi_engine_service)):
+    """Run a health check against every remote engine node now"""
+    if multi_engine_service.remote_engines is None:
+        raise HTTPException(status_code=404, detail="No REMOTE_ENGINE_NODES configured")
+    await multi_engine_service.remote_engines.check_all()
+    return multi_engine_service.remote_engines.stats()
+
+@router.get("/routing-table")
+async def get_routing_table(multi_engine_service=Depends(get_multi_engine_service)):
+    """Precomputed pair → engine routes (model keys, lang tags, pivot legs)"""
+    return multi_engine_service.routing.snapshot()
+
+@router.post("/routing-table/rebuild")
+async def rebuild_routing_table(multi_engine_service=Depends(get_multi_engine_service)):
+    """Re-probe model directories and rebuild the routing table (e.g. after copying models in by hand)"""
+    multi_engine_service.rebuild_routing("manual rebuild")
+    return multi_engine_service.routing.snapshot()
+
+@router.get("/translation-cache")
+async def get_translation_cache_stats():
+    """Hit rate and entry counts of the translation output cache"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **translation_service.cache.stats(),
+    }
+
+@router.delete("/translation-cache")
+async def invalidate_translation_cache(
+    model_key: Optional[str] = Query(None, description="Model key to invalidate (e.g. NLLB_200, GEMINI:gemini-3.1-flash-lite); omit for all"),
+):
+    """Invalidate cached translations, e.g. after swapping a model's weights in place"""
+    try:
+        removed = translation_service.cache.invalidate(model_key)
+        return {
+            "success": True,
+            "model_key": model_key,
+            "removed_entries": removed,
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Translation cache invalidation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/length-budgets")
+async def get_length_budgets():
+    """Learned output/input ratios, issued max_new_tokens budgets and repetition-loop aborts"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **length_budgets.stats(),
+    }
+
+@router.post("/length-budgets/reload")
+async def reload_length_budgets():
+    """Re-seed length ratios from stored translation history"""
+    await length_budgets.load_history(prisma, translation_service.model_paths)
+    return {"success": True, "history_rows": length_budgets.history_rows, "timestamp": datetime.now().isoformat()}
+
+@router.get("/transcreation-prompts")
+async def get_transcreation_prompts(transcreation_service=Depends(get_transcreation_service)):
+    """Compiled transcreation prompts, their Gemini context caches and per-call prompt build time / tokens"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **transcreation_service.prompt_stats(),
+    }
+
+@router.post("/transcreation-prompts/clear")
+async def clear_transcreation_prompts(transcreation_service=Depends(get_transcreation_service)):
+    """Drop compiled transcreation prompts; they are rebuilt on next use"""
+    transcreation_service.clear_prompt_cache()
+    return {"success": True, "timestamp": datetime.now().isoformat()}
+
+@router.get("/bulk-writes")
+async def get_bulk_write_stats():
+    """Rows, create_many flushes and rows/sec per model written through BulkWriter"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "batch_size": settings.BULK_WRITE_BATCH_SIZE,
+        "models": {
+            model: {**stats, "rows_per_sec": round(stats["rows"] / stats["seconds"], 1) if stats["seconds"] else None}
+            for model, stats in bulk_write_stats.items()
+        },
+    }
+
+@router.get("/segment-pipeline")
+async def get_segment_pipeline_stats():
+    """Per-stage service time and queue wait histograms of the request segment pipeline"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **pipeline_stats(),
+    }
+
+@router.post("/bulk-write-benchmark")
+async def run_bulk_write_benchmark(
+    rows: int = Query(500, ge=1, le=20000, description="TranslationString rows to write per mode"),
+    batch_size: Optional[int] = Query(None, ge=1, description="Rows per create_many (default BULK_WRITE_BATCH_SIZE)"),
+):
+    """Insert the same rows one create at a time and through BulkWriter, and report rows/sec for each.
+
+    Rows go to a scratch translation request that is deleted afterwards.
+    """
+    if not prisma.is_connected():
+        await prisma.connect()
+
+    scratch = await prisma.translationrequest.create(
+        data={
+            "sourceLanguage": "EN",
+            "targetLanguages": ["FR"],
+            "languagePair": "en-fr",
+            "wordCount": rows,
+            "fileName": "bulk_write_benchmark.txt",
+            "status": "CANCELLED",
+        }
+    )
+
+    def row(i: int, mode: str) -> Dict[str, Any]:
+        return {
+            "sourceText": f"Benchmark segment {i}.",
+            "translatedText": f"Segment de référence {i} ({mode}).",
+            "targetLanguage": "FR",
+            "status": "DRAFT",
+            "processingTimeMs": 0,
+            "translationRequestId": scratch.id,
+            "fuzzyMatches": Json([]),
+        }
+
+    try:
+        start = time.perf_counter()
+        for i in range(rows):
+            await prisma.translationstring.create(data=row(i, "per-row"))
+        per_row_s = time.perf_counter() - start
+
+        writer = BulkWriter("translationstring", batch_size=batch_size)
+        start = time.perf_counter()
+        for i in range(rows):
+            await writer.add(row(i, "bulk"))
+        await writer.flush()
+        bulk_s = time.perf_counter() - start
+    finally:
+        await prisma.translationrequest.delete(where={"id": scratch.id})
+
+    return {
+        "rows": rows,
+        "batch_size": writer.batch_size,
+        "per_row": {"seconds": round(per_row_s, 3), "rows_per_sec": round(rows / per_row_s, 1)},
+        "bulk": {"seconds": round(bulk_s, 3), "rows_per_sec": round(rows / bulk_s, 1)},
+        "speedup": round(per_row_s / bulk_s, 1) if bulk_s else None,
+        "timestamp": datetime.now().isoformat(),
+    }
+
 @router.post("/test-translation")
 async def test_translation(data: Dict[str, Any]):
     """Test translation with specific parameters"""
@@ -232,24 +425,18 @@ async def get_database_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/clear-cache")
-async def clear_model_cache():
+async def clear_model_cache(multi_engine_service=Depends(get_multi_engine_service)):
     """Clear model cache (for debugging)"""
     try:
-        # Clear translation service cache
-        translation_service.models.clear()
-        translation_service.tokenizers.clear()
-        translation_service.pipelines.clear()
-        
-        # Force garbage collection
-        import gc
-        gc.collect()
-        
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        # Clear translation service cache (models, tokenizers, pipelines and residency state)
+        unloaded = translation_service.unload_all_models()
+        if multi_engine_service.worker_pool is not None:
+            multi_engine_service.worker_pool.unload_all_models()
         
         return {
             "success": True,
             "message": "Model cache cleared",
+            "unloaded_models": unloaded,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -1,11 +1,13 @@
 # app/api/routers/health.py
 
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
 from datetime import datetime
 import psutil
 import torch
 from app.db.base import prisma
-from app.dependencies import get_health_service
+from app.dependencies import get_health_service, get_warmup_service
+from app.services.gemini_rate_limiter import gemini_rate_limiter
 
 router = APIRouter(prefix="/api/health", tags=["Health"])
 
@@ -19,6 +21,22 @@ async def health_check(health_service=Depends(get_health_service)):
         "service": "Translation Management API"
     }
 
+@router.get("/ready")
+async def readiness_check(warmup_service=Depends(get_warmup_service)):
+    """Readiness probe: 200 once every PRELOAD_ENGINES target is warm, 503 otherwise.
+
+    The body lists per-target and per-engine warm/cold state so a load balancer
+    (or an operator) can see which engines are still loading.
+    """
+    readiness = warmup_service.readiness()
+    readiness["timestamp"] = datetime.now().isoformat()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
+@router.get("/gemini-quota")
+async def gemini_quota():
+    """Per-model Gemini quota use: requests today, bucket levels, backoff and throttling counters."""
+    return {**gemini_rate_limiter.stats(), "timestamp": datetime.now().isoformat()}
+
 @router.get("/engines", tags=["Health"])
 async def list_engines(request: Request):
     """Return all configured translation engines with their display names.
@@ -29,16 +47,21 @@ async def list_engines(request: Request):
     service = getattr(request.app.state, "multi_engine_service", None)
     if not service:
         return {"engines": []}
+    # Availability comes from the precomputed routing table (no filesystem probes per call)
+    routing = service.routing.snapshot()
     engines = [
         {
             "id": engine_id,
             "name": config.get("name", engine_id),
             "supportedPairs": config.get("supported_pairs", []),
+            "availablePairs": [
+                pair for pair, entry in routing["pairs"].items() if engine_id in entry["available_engines"]
+            ],
             "type": config.get("type", "unknown"),
         }
         for engine_id, config in service.engine_configs.items()
     ]
-    return {"engines": engines}
+    return {"engines": engines, "routingBuiltAt": routing["built_at"]}
 
 
 @router.get("/detailed")
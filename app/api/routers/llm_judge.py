@@ -14,7 +14,6 @@ GET /api/llm-judge/disagreements
     Query params: limit (default 50), min_disagreement (default 0.0).
 """
 
-import asyncio
 import json
 import logging
 from typing import Optional
@@ -24,6 +23,7 @@ from pydantic import BaseModel
 
 from app.db.base import prisma
 from app.dependencies import get_llm_judge_service
+from app.services.gemini_rate_limiter import BATCH
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/llm-judge", tags=["LLM Judge"])
@@ -246,6 +246,7 @@ async def evaluate_all_approved(
                     source_lang=src_lang,
                     target_lang=target_lang,
                     reference=reference,
+                    priority=BATCH,
                 )
                 comet_score = comet_by_engine.get(engine_name)
                 disagreement = judge.compute_disagreement(comet_score, scores["adequacy"])
@@ -270,9 +271,6 @@ async def evaluate_all_approved(
             except Exception as e:
                 logger.error(f"LLM judge error string={ts.id} engine={engine_name}: {e}")
                 errors.append({"id": ts.id, "engine": engine_name, "error": str(e)})
-            finally:
-                # Throttle to ~12 RPM — well under the 15 RPM free-tier limit
-                await asyncio.sleep(5)
 
         if string_processed > 0:
             processed += 1
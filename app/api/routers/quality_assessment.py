@@ -7,7 +7,7 @@ import sacrebleu
 import statistics
 import traceback
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict
 import torch.utils.data
 from torch.utils.data import DataLoader, Dataset # <-- Ensure Dataset is imported
@@ -54,40 +54,57 @@ class CustomCometDataModule:
 # --- END FINAL FIX: Custom DataModule Class Definition ---
 
 
+from app.core.config import settings
 from app.db.base import prisma
+from app.db.bulk import BulkWriter
 from app.services.human_feedback_service import human_feedback_service
+from app.utils.batching import estimate_tokens, length_bucketed_map
+from app.utils.dedup import dedupe, fan_out, normalize_segment
 from app.dependencies import get_comet_model, get_cometkiwi_model
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 
-def comet_predict(model, samples: list, batch_size: int = 8) -> list:
+def _comet_sample_length(sample: dict) -> int:
+    """Estimated encoder length of one COMET sample (src + mt [+ ref])."""
+    return sum(estimate_tokens(sample.get(field) or "") for field in ("src", "mt", "ref"))
+
+
+def comet_predict(model, samples: list, batch_size: int = 8, max_tokens: int = None) -> list:
     """Run COMET/COMETKiwi inference directly, bypassing PyTorch Lightning Trainer.
 
     The Lightning Trainer fails to route data through prepare_for_inference on Apple
     Silicon (M3) and certain CPU-only environments. Calling the model forward directly
     is functionally identical and avoids the issue entirely.
 
+    Samples are sorted by length and grouped into buckets under a padded-token
+    budget, then scores are returned in the original order.
+
     Args:
         model: Loaded COMET or COMETKiwi model instance.
         samples: List of dicts with "src"/"mt" (and "ref" for reference-based models).
-        batch_size: Number of samples per forward pass.
+        batch_size: Maximum number of samples per forward pass.
+        max_tokens: Padded-token budget per forward pass (defaults to COMET_MAX_BATCH_TOKENS).
 
     Returns:
         List of float scores, one per input sample.
     """
     import torch
 
-    all_scores: list[float] = []
+    def _score(batch_samples: list) -> list:
+        batch = model.prepare_for_inference(batch_samples)
+        out = model(**batch)
+        return out.score.tolist() if hasattr(out.score, "tolist") else [float(out.score)]
+
     model.eval()
     with torch.no_grad():
-        for i in range(0, len(samples), batch_size):
-            batch_samples = samples[i : i + batch_size]
-            batch = model.prepare_for_inference(batch_samples)
-            out = model(**batch)
-            scores = out.score.tolist() if hasattr(out.score, "tolist") else [float(out.score)]
-            all_scores.extend(scores)
-    return all_scores
+        return length_bucketed_map(
+            samples,
+            _score,
+            length_fn=_comet_sample_length,
+            max_batch_size=batch_size,
+            max_tokens=max_tokens or settings.COMET_MAX_BATCH_TOKENS,
+        )
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/quality-assessment", tags=["Quality Assessment"])
@@ -247,36 +264,43 @@ async def calculate_metrics_for_string(translation_string_id: str, comet_model=N
         await prisma.qualitymetrics.delete_many(where={"translationStringId": translation_string_id})
 
         from prisma.enums import ReferenceType
+        from prisma.models import QualityMetrics
         request_id = (
             translation_string.translationRequest.id
             if translation_string.translationRequest else None
         )
-        created = []
+        # Timestamps are set here rather than by the database, so the returned
+        # rows can be built from the written data without reading them back
+        now = datetime.now(timezone.utc)
+        rows = BulkWriter("qualitymetrics")
+        written = []
         for i, (engine_name, hypothesis) in enumerate(candidates):
             scores = _score_hypothesis(hypothesis, reference, target_lang)
-            row = await prisma.qualitymetrics.create(
-                data={
-                    "translationStringId": translation_string_id,
-                    "translationRequestId": request_id,
-                    "engineName": engine_name,
-                    "bleuScore": scores["bleu"],
-                    "cometScore": comet_scores[i],
-                    "chrfScore": scores["chrf"],
-                    "terScore": scores["ter"],
-                    "qualityLabel": _quality_label_from_ter(scores["ter"]),
-                    "hasReference": True,
-                    "referenceType": ReferenceType.POST_EDITED,
-                    "calculationEngine": "auto-calculate-per-engine",
-                }
-            )
-            created.append(row)
+            data = {
+                "translationStringId": translation_string_id,
+                "translationRequestId": request_id,
+                "engineName": engine_name,
+                "bleuScore": scores["bleu"],
+                "cometScore": comet_scores[i],
+                "chrfScore": scores["chrf"],
+                "terScore": scores["ter"],
+                "qualityLabel": _quality_label_from_ter(scores["ter"]),
+                "hasReference": True,
+                "referenceType": ReferenceType.POST_EDITED,
+                "calculationEngine": "auto-calculate-per-engine",
+                "createdAt": now,
+                "updatedAt": now,
+            }
+            await rows.add(data, with_id=True)
+            written.append(data)
             logger.info(
                 f"✅ Metrics [{engine_name or 'single-engine'}] {translation_string_id}: "
                 f"BLEU={scores['bleu']:.3f} TER={scores['ter']:.2f} "
                 f"ChrF={scores['chrf']:.2f} COMET={comet_scores[i]:.3f}"
             )
+        await rows.flush()
 
-        return created
+        return [QualityMetrics(**data) for data in written]
 
     except Exception as e:
         logger.error(f"Failed to calculate metrics for string {translation_string_id}: {e}")
@@ -479,7 +503,11 @@ async def predict_quality_batch(
         if not prisma.is_connected():
             await prisma.connect()
 
-        results = []
+        # Collect pending strings across all requests first so that one length-bucketed
+        # COMETKiwi pass covers every request instead of one padded pass per request.
+        results_by_request: Dict[str, dict] = {}
+        pending_by_request: Dict[str, list] = {}
+        all_batch_data = []
         for request_id in request_ids:
             try:
                 translation_request = await prisma.translationrequest.find_unique(
@@ -492,15 +520,13 @@ async def predict_quality_batch(
                 )
 
                 if not translation_request:
-                    results.append({
+                    results_by_request[request_id] = {
                         "requestId": request_id,
                         "status": "error",
                         "error": "Translation request not found"
-                    })
+                    }
                     continue
                 
-                # --- Batching for all strings in the request ---
-                batch_data = []
                 string_to_save = [] # List to hold strings that need saving metrics
 
                 for translation_string in translation_request.translationStrings:
@@ -511,26 +537,42 @@ async def predict_quality_batch(
                     if existing_metrics:
                         continue # Skip if metrics already exist
 
-                    src_lang = translation_string.translationRequest.sourceLanguage.lower() if translation_string.translationRequest else 'en'
-                    tgt_lang = translation_string.targetLanguage.lower()
-                    
                     # COMETKiwi is reference-free — no ref field needed
-                    batch_data.append({
+                    all_batch_data.append({
                         "src": translation_string.sourceText,
                         "mt": translation_string.translatedText,
                     })
                     string_to_save.append(translation_string)
 
-                if not batch_data:
-                    results.append({
-                        "requestId": request_id,
-                        "status": "success",
-                        "predictions": [],
-                        "totalStrings": 0
-                    })
-                    continue
+                pending_by_request[request_id] = string_to_save
+
+            except Exception as e:
+                logger.error(f"Failed to process request {request_id}: {e}")
+                results_by_request[request_id] = {
+                    "requestId": request_id,
+                    "status": "error",
+                    "error": str(e)
+                }
+
+        scoring_error = None
+        all_scores: list = []
+        if all_batch_data:
+            try:
+                # Identical (source, MT) pairs — repeated segments — are scored once
+                unique_samples, sample_index = dedupe(all_batch_data, key=lambda s: (normalize_segment(s["src"]), s["mt"]))
+                all_scores = fan_out(comet_predict(cometkiwi_model, unique_samples, batch_size=32), sample_index)
+            except Exception as e:
+                logger.error(f"COMETKiwi scoring failed for batch of {len(all_batch_data)} strings: {e}")
+                scoring_error = e
+
+        offset = 0
+        for request_id, string_to_save in pending_by_request.items():
+            scores = all_scores[offset:offset + len(string_to_save)]
+            offset += len(string_to_save)
+            try:
+                if scoring_error is not None and string_to_save:
+                    raise scoring_error
 
-                scores = comet_predict(cometkiwi_model, batch_data, batch_size=8)
                 predictions = []
 
                 for i, comet_score in enumerate(scores):
@@ -556,22 +598,22 @@ async def predict_quality_batch(
                         "targetLanguage": translation_string.targetLanguage
                     })
 
-                results.append({
+                results_by_request[request_id] = {
                     "requestId": request_id,
                     "status": "success",
                     "predictions": predictions,
                     "totalStrings": len(predictions)
-                })
+                }
 
-            except HTTPException:
-                raise
             except Exception as e:
                 logger.error(f"Failed to process request {request_id}: {e}")
-                results.append({
+                results_by_request[request_id] = {
                     "requestId": request_id,
                     "status": "error",
                     "error": str(e)
-                })
+                }
+
+        results = [results_by_request[request_id] for request_id in request_ids if request_id in results_by_request]
 
         return {
             "results": results,
@@ -628,7 +670,8 @@ async def process_all_pending_quality_assessments(cometkiwi_model=Depends(get_co
         if not batch_data:
             return {"message": "No valid pending strings found after filtering", "totalProcessed": 0}
         
-        scores = comet_predict(cometkiwi_model, batch_data, batch_size=8)
+        # Length-bucketed: batch size is capped by COMET_MAX_BATCH_TOKENS, not a fixed count
+        scores = comet_predict(cometkiwi_model, batch_data, batch_size=32)
         processed_count = 0
         errors = []
         
@@ -14,11 +14,17 @@ from app.schemas.translation import (
     EngineSelectionData
 )
 from app.schemas.quality import AnnotationCreate
+from app.core.config import settings
 from app.db.base import prisma
-from app.services.translation_service import translation_service
-from app.utils.text_processing import detokenize_japanese, get_model_for_language_pair, split_text_into_sentences
+from app.db.pagination import iter_pages
+from app.utils.text_processing import detokenize_japanese, split_text_into_sentences
+from app.utils.dedup import dedup_stats
+from app.utils.ndjson import ndjson_line, ndjson_response
+from app.services.segment_pipeline import run_multi_engine_request, run_single_engine_request
+from app.services.translation_jobs import translation_jobs
 from app.services.multimodal_service import multimodal_service as multimodal_service_instance
 from starlette.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from app.dependencies import get_fuzzy_matcher, get_multi_engine_service, get_multimodal_service
 
 def map_language_to_prisma_enum(language_code: str) -> str:
@@ -47,6 +53,120 @@ def normalize_language_for_engines(language_code: str) -> str:
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/translation-requests", tags=["Translation Requests"])
 
+
+def _sse(event_type: str, payload: dict) -> str:
+    return f"data: {json.dumps({'type': event_type, **payload})}\n\n"
+
+
+def _queued_response(request_id: str, job) -> dict:
+    return {
+        "id": request_id,
+        "jobId": job.id,
+        "status": str(job.status),
+        "totalSegments": job.totalSegments,
+        "progressUrl": f"{router.prefix}/{request_id}/job",
+        "eventsUrl": f"{router.prefix}/{request_id}/job/events",
+    }
+
+
+# Relations left out of the NDJSON "request" line; strings and metrics follow as their own lines
+_REQUEST_RELATIONS = {"translationStrings", "qualityMetrics", "styleGuides", "translationJob", "segmentationSession"}
+
+# Requests still translating after their streaming client disconnected
+_detached_requests: set = set()
+
+
+def _forget(task: asyncio.Task):
+    _detached_requests.discard(task)
+    # Failures are already logged by the task; retrieve them so asyncio does not warn again
+    if not task.cancelled():
+        task.exception()
+
+
+def _request_line(translation_request) -> str:
+    return ndjson_line("request", {"data": translation_request.model_dump(exclude=_REQUEST_RELATIONS)})
+
+
+def _stream_new_request(db_request, translate, finish):
+    """NDJSON for a request being translated: strings are sent as each pipeline chunk is written.
+
+    The translation runs in its own task, so the request still completes if
+    the client disconnects mid-stream.
+    """
+    written: asyncio.Queue = asyncio.Queue()
+    listening = True
+
+    async def on_persisted(ids):
+        if listening:
+            written.put_nowait(ids)
+
+    async def run():
+        try:
+            return await finish(await translate(on_persisted))
+        except Exception as e:
+            logger.error(f"❌ Streaming translation request {db_request.id} failed: {e}")
+            raise
+        finally:
+            written.put_nowait(None)
+
+    async def lines():
+        nonlocal listening
+        task = asyncio.create_task(run())
+        _detached_requests.add(task)
+        task.add_done_callback(_forget)
+        count = 0
+        last_id = None
+        try:
+            yield _request_line(db_request)
+            while True:
+                ids = await written.get()
+                if ids is None:
+                    break
+                position = {string_id: i for i, string_id in enumerate(ids)}
+                rows = await prisma.translationstring.find_many(where={"id": {"in": ids}})
+                for row in sorted(rows, key=lambda row: position[row.id]):
+                    yield ndjson_line("string", {"data": row})
+                    count += 1
+                    last_id = row.id
+            completed = await task
+            yield _request_line(completed)
+            yield ndjson_line("end", {"strings": count, "cursor": last_id})
+            logger.info(f"✅ Streamed translation request {db_request.id} ({count} strings)")
+        except Exception as e:
+            yield ndjson_line("error", {"message": str(e), "cursor": last_id})
+        finally:
+            listening = False
+
+    return ndjson_response(lines())
+
+
+def stream_stored_request(translation_request, cursor: Optional[str], include_metrics: bool, string_include=None):
+    """NDJSON for a stored request: its strings (and metrics) read page by page after cursor."""
+    async def lines():
+        strings = metrics = 0
+        last_id = cursor
+        try:
+            yield _request_line(translation_request)
+            async for page in iter_pages(
+                "translationstring", {"translationRequestId": translation_request.id},
+                include=string_include, cursor=cursor,
+            ):
+                for row in page:
+                    yield ndjson_line("string", {"data": row})
+                strings += len(page)
+                last_id = page[-1].id
+            if include_metrics:
+                async for page in iter_pages("qualitymetrics", {"translationRequestId": translation_request.id}):
+                    for row in page:
+                        yield ndjson_line("metric", {"data": row})
+                    metrics += len(page)
+            yield ndjson_line("end", {"strings": strings, "metrics": metrics if include_metrics else None, "cursor": last_id})
+        except Exception as e:
+            logger.error(f"Streaming translation request {translation_request.id} failed: {e}")
+            yield ndjson_line("error", {"message": str(e), "cursor": last_id})
+
+    return ndjson_response(lines())
+
 @router.get("/")
 async def get_translation_requests(
     include: Optional[str] = Query(None),
@@ -102,13 +222,33 @@ async def get_translation_requests(
         logger.error(f"Database error: {e}")
         return []
 
+def _check_delivery(run_async: bool, stream: bool):
+    # A queued job has nothing to stream yet; follow it on /{id}/job/events instead
+    if run_async and stream:
+        raise HTTPException(status_code=400, detail="Use either async or stream, not both")
+
+
 @router.post("/")
 async def create_translation_request(
     request_data: TranslationRequestCreate,
+    run_async: bool = Query(False, alias="async", description="Queue a background job and return at once"),
+    stream: bool = Query(False, description="Stream the request and its strings as NDJSON while they are produced"),
     fuzzy_matcher=Depends(get_fuzzy_matcher),
     multi_engine_service=Depends(get_multi_engine_service),
 ):
-    """Create a new translation request"""
+    """Create a new translation request (?async=true queues it as a job)"""
+    _check_delivery(run_async, stream)
+    return await _create_translation_request(request_data, fuzzy_matcher, multi_engine_service, run_async, stream)
+
+
+async def _create_translation_request(
+    request_data: TranslationRequestCreate,
+    fuzzy_matcher,
+    multi_engine_service,
+    run_async: bool = False,
+    stream: bool = False,
+):
+    """create_translation_request for in-process callers, with plain defaults instead of Query markers"""
     try:
         if not prisma.is_connected():
             await prisma.connect()
@@ -157,7 +297,7 @@ async def create_translation_request(
             "wordCount": request_data.wordCount,
             "fileName": request_data.fileName,
             "mtModel": mt_model_enum,
-            "status": "IN_PROGRESS",
+            "status": "PENDING" if run_async else "IN_PROGRESS",
             "requestType": "SINGLE_ENGINE",
         }
         _guide_ids = getattr(request_data, "styleGuideIds", None) or []
@@ -166,105 +306,60 @@ async def create_translation_request(
 
         db_request = await prisma.translationrequest.create(data=db_create_data)
 
-        total_processing_time = 0
+        if run_async:
+            job = await translation_jobs.enqueue(
+                db_request.id,
+                "SINGLE_ENGINE",
+                request_data.sourceLanguage,
+                request_data.targetLanguages,
+                request_data.sourceTexts,
+                engine_codes={
+                    lang: normalize_language_for_engines(lang)
+                    for lang in [request_data.sourceLanguage, *request_data.targetLanguages]
+                },
+            )
+            return _queued_response(db_request.id, job)
 
-        for target_lang in request_data.targetLanguages:
-            source_lang_code = normalize_language_for_engines(request_data.sourceLanguage)
-            target_lang_code = normalize_language_for_engines(target_lang)
-            
-            model_to_use_for_single_engine = get_model_for_language_pair(source_lang_code, target_lang_code)
-
-            for i, source_text in enumerate(request_data.sourceTexts):
-                start_time = datetime.now()
-                try:
-                    logger.info(f"Translating text {i+1}/{len(request_data.sourceTexts)} to {target_lang} using {model_to_use_for_single_engine}")
-
-                    fuzzy_matches = await fuzzy_matcher.find_fuzzy_matches(
-                        source_text, target_lang, request_data.sourceLanguage
-                    )
-
-                    suggested_translation = None
-                    if fuzzy_matches and len(fuzzy_matches) > 0 and fuzzy_matches[0]["similarity"] > 0.9:
-                        suggested_translation = fuzzy_matches[0]["target_text"]
-
-                    translated_text = ""
-
-                    prefix_or_lang_tag_for_single = None
-                    model_info_from_ts_single = next(
-                        (info for info in translation_service.language_pair_models.get(f"{request_data.sourceLanguage.upper()}-{target_lang.upper()}", [])
-                        if info[0] == model_to_use_for_single_engine),
-                        None
-                    )
-                    if model_info_from_ts_single and len(model_info_from_ts_single) == 3:
-                        prefix_or_lang_tag_for_single = model_info_from_ts_single[2]
-
-                    if model_to_use_for_single_engine == 'PIVOT_ELAN_HELSINKI':
-                        translated_text = await multi_engine_service._translate_with_pivot(
-                            source_text.strip(), source_lang_code, target_lang_code,
-                            multi_engine_service.engine_configs['elan_quality']['pivot_strategy']
-                        )
-                    else:
-                        translated_text = translation_service.translate_by_model_type(
-                            source_text.strip(),
-                            model_to_use_for_single_engine,
-                            source_lang=source_lang_code,
-                            target_lang=target_lang_code,
-                            target_lang_tag=prefix_or_lang_tag_for_single
-                        )
-
-                    if target_lang.upper() == 'JP':
-                        translated_text = detokenize_japanese(translated_text)
-
-                    processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
-                    total_processing_time += processing_time
-
-                    await prisma.translationstring.create(
-                        data={
-                            "sourceText": source_text.strip(),
-                            "translatedText": translated_text,
-                            "targetLanguage": target_lang,  # Fixed: keep as string, no enum mapping
-                            "status": "REVIEWED",
-                            "isApproved": False,
-                            "processingTimeMs": processing_time,
-                            "translationRequestId": db_request.id,
-                            "fuzzyMatches": Json(fuzzy_matches) if fuzzy_matches else Json([]),
-                            "suggestedTranslation": suggested_translation
-                        }
-                    )
-
-                except Exception as e:
-                    logger.error(f"Translation failed: {e}")
-                    processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
-                    total_processing_time += processing_time
-
-                    await prisma.translationstring.create(
-                        data={
-                            "sourceText": source_text.strip(),
-                            "translatedText": f"Translation failed: {str(e)}",
-                            "targetLanguage": target_lang,  # Fixed: keep as string, no enum mapping
-                            "status": "DRAFT",
-                            "isApproved": False,
-                            "processingTimeMs": processing_time,
-                            "translationRequestId": db_request.id,
-                            "fuzzyMatches": Json([]),
-                            "suggestedTranslation": None
-                        }
-                    )
-
-        updated_request = await prisma.translationrequest.update(
-            where={"id": db_request.id},
-            data={
-                "status": "COMPLETED",
-                "totalProcessingTimeMs": total_processing_time
-            },
-            include={
-                "translationStrings": {
-                    "include": {
-                        "annotations": True
-                    }
+        engine_codes = {
+            lang: normalize_language_for_engines(lang)
+            for lang in [request_data.sourceLanguage, *request_data.targetLanguages]
+        }
+
+        # Repeated headings/footers/labels are fuzzy-matched and translated once per target;
+        # targets and chunks run through the tm -> mt -> post -> persist pipeline concurrently
+        async def translate(on_persisted=None):
+            return await run_single_engine_request(
+                db_request.id, request_data.sourceTexts, request_data.sourceLanguage,
+                request_data.targetLanguages, engine_codes, fuzzy_matcher, multi_engine_service,
+                on_persisted=on_persisted,
+            )
+
+        async def finish(run, include=None):
+            return await prisma.translationrequest.update(
+                where={"id": db_request.id},
+                data={
+                    "status": "COMPLETED",
+                    "totalProcessingTimeMs": run["processing_time_ms"],
+                    "jobStats": Json({
+                        **dedup_stats(
+                            len(request_data.sourceTexts), run["unique_segments"], len(request_data.targetLanguages), engines=1
+                        ),
+                        "pipeline": run["pipeline"],
+                    }),
+                },
+                include=include,
+            )
+
+        if stream:
+            return _stream_new_request(db_request, translate, finish)
+
+        updated_request = await finish(await translate(), include={
+            "translationStrings": {
+                "include": {
+                    "annotations": True
                 }
             }
-        )
+        })
 
         logger.info(f"✅ Translation request {db_request.id} completed")
         return updated_request
@@ -276,10 +371,26 @@ async def create_translation_request(
 @router.post("/multi-engine")
 async def create_multi_engine_translation_request(
     request_data: MultiEngineTranslationRequestCreate,
+    run_async: bool = Query(False, alias="async", description="Queue a background job and return at once"),
+    stream: bool = Query(False, description="Stream the request and its strings as NDJSON while they are produced"),
     fuzzy_matcher=Depends(get_fuzzy_matcher),
     multi_engine_service=Depends(get_multi_engine_service),
 ):
-    """Create translation request with multiple local engines"""
+    """Create translation request with multiple local engines (?async=true queues it as a job)"""
+    _check_delivery(run_async, stream)
+    return await _create_multi_engine_translation_request(
+        request_data, fuzzy_matcher, multi_engine_service, run_async, stream
+    )
+
+
+async def _create_multi_engine_translation_request(
+    request_data: MultiEngineTranslationRequestCreate,
+    fuzzy_matcher,
+    multi_engine_service,
+    run_async: bool = False,
+    stream: bool = False,
+):
+    """create_multi_engine_translation_request for in-process callers, with plain defaults"""
     try:
         if not prisma.is_connected():
             await prisma.connect()
@@ -295,7 +406,7 @@ async def create_multi_engine_translation_request(
         # Load first style guide if provided (used for Gemini constraint-aware generation)
         style_guide = None
         style_guide_ids = getattr(request_data, "styleGuideIds", None) or []
-        if style_guide_ids:
+        if style_guide_ids and not run_async:
             style_guide = await prisma.styleguide.find_unique(
                 where={"id": style_guide_ids[0]},
                 include={"terms": True},
@@ -308,7 +419,7 @@ async def create_multi_engine_translation_request(
             "wordCount": request_data.wordCount,
             "fileName": request_data.fileName,
             "mtModel": MTModel.MULTI_ENGINE,
-            "status": "MULTI_ENGINE_REVIEW",
+            "status": "PENDING" if run_async else "MULTI_ENGINE_REVIEW",
             "requestType": "MULTI_ENGINE",
             "selectedEngines": request_data.engines,
         }
@@ -317,55 +428,60 @@ async def create_multi_engine_translation_request(
 
         db_request = await prisma.translationrequest.create(data=multi_db_create_data)
 
-        for target_lang in request_data.targetLanguages:
-            for i, source_text in enumerate(request_data.sourceTexts):
-                logger.info(f"Getting multi-engine translations for text {i+1}/{len(request_data.sourceTexts)} to {target_lang}")
-
-                fuzzy_matches = await fuzzy_matcher.find_fuzzy_matches(
-                    source_text, target_lang, request_data.sourceLanguage
-                )
-
-                suggested_translation = None
-                if fuzzy_matches and len(fuzzy_matches) > 0 and fuzzy_matches[0]["similarity"] > 0.9:
-                    suggested_translation = fuzzy_matches[0]["target_text"]
+        if run_async:
+            job = await translation_jobs.enqueue(
+                db_request.id,
+                "MULTI_ENGINE",
+                request_data.sourceLanguage,
+                request_data.targetLanguages,
+                request_data.sourceTexts,
+                engine_codes={
+                    lang: normalize_language_for_engines(lang)
+                    for lang in [request_data.sourceLanguage, *request_data.targetLanguages]
+                },
+                engines=request_data.engines,
+                style_guide_ids=style_guide_ids,
+            )
+            return _queued_response(db_request.id, job)
+
+        # Repeated headings/footers/labels are fuzzy-matched and translated once per target;
+        # all targets go to MT together so an NLLB engine serving several encodes each segment once
+        async def translate(on_persisted=None):
+            return await run_multi_engine_request(
+                db_request.id, request_data.sourceTexts, request_data.sourceLanguage, request_data.targetLanguages,
+                {
+                    lang: normalize_language_for_engines(lang)
+                    for lang in [request_data.sourceLanguage, *request_data.targetLanguages]
+                },
+                request_data.engines, style_guide, fuzzy_matcher, multi_engine_service,
+                on_persisted=on_persisted,
+            )
 
-                engine_results = await multi_engine_service.translate_multi_engine(
-                    source_text,
-                    normalize_language_for_engines(request_data.sourceLanguage),
-                    normalize_language_for_engines(target_lang),
-                    request_data.engines,
-                    style_guide=style_guide,
-                )
-                if target_lang.upper() == 'JP':
-                    for result in engine_results:
-                        if isinstance(result, dict) and 'text' in result:
-                            result['text'] = detokenize_japanese(result['text'])
+        async def finish(run, include=None):
+            return await prisma.translationrequest.update(
+                where={"id": db_request.id},
+                data={
+                    "jobStats": Json({
+                        **dedup_stats(
+                            len(request_data.sourceTexts), run["unique_segments"], len(request_data.targetLanguages),
+                            engines=run["engines_per_segment"],
+                        ),
+                        "pipeline": run["pipeline"],
+                    }),
+                },
+                include=include,
+            )
 
-                await prisma.translationstring.create(
-                    data={
-                        "sourceText": source_text.strip(),
-                        "translatedText": "",
-                        "targetLanguage": target_lang,  # Fixed: keep as string, no enum mapping
-                        "status": "MULTI_ENGINE_REVIEW",
-                        "isApproved": False,
-                        "processingTimeMs": int(sum(r.get('processing_time', 0) for r in engine_results if isinstance(r, dict) and 'processing_time' in r)),
-                        "translationRequestId": db_request.id,
-                        "engineResults": Json(engine_results) if engine_results else Json([]),
-                        "fuzzyMatches": Json(fuzzy_matches) if fuzzy_matches else Json([]),
-                        "suggestedTranslation": suggested_translation
-                    }
-                )
+        if stream:
+            return _stream_new_request(db_request, translate, finish)
 
-        complete_request = await prisma.translationrequest.find_unique(
-            where={"id": db_request.id},
-            include={
-                "translationStrings": {
-                    "include": {
-                        "annotations": True
-                    }
+        complete_request = await finish(await translate(), include={
+            "translationStrings": {
+                "include": {
+                    "annotations": True
                 }
             }
-        )
+        })
 
         logger.info(f"✅ Multi-engine translation request {db_request.id} completed")
         return complete_request
@@ -374,6 +490,56 @@ async def create_multi_engine_translation_request(
         logger.error(f"❌ Failed to create multi-engine request: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create multi-engine request: {str(e)}")
 
+@router.get("/stream-translate")
+async def stream_translate(
+    text: str = Query(..., description="Source segment to translate"),
+    source_language: str = Query(..., alias="sourceLanguage"),
+    target_language: str = Query(..., alias="targetLanguage"),
+    engine: str = Query("translate_gemma", description="Engine id, e.g. translate_gemma or gemini_transcreation"),
+    style_guide_id: Optional[str] = Query(None, alias="styleGuideId"),
+    multi_engine_service=Depends(get_multi_engine_service),
+):
+    """Stream one segment's translation as server-sent events.
+
+    TranslateGemma and Gemini transcreation stream tokens as they are generated;
+    other engines send their full output as one token event.
+
+    SSE event shape (same style as /api/agent/refine-stream):
+      data: {"type": "start", "engine": "...", "model": "..."}
+      data: {"type": "token", "text": "..."}
+      data: {"type": "done",  "text": "<final post-processed text>", "cached": bool,
+             "first_token_ms": F, "processing_time": F}
+      data: {"type": "error", "message": "..."}
+    """
+    source_lang = normalize_language_for_engines(source_language)
+    target_lang = normalize_language_for_engines(target_language)
+
+    async def generator():
+        style_guide = None
+        if style_guide_id:
+            if not prisma.is_connected():
+                await prisma.connect()
+            style_guide = await prisma.styleguide.find_unique(where={"id": style_guide_id}, include={"terms": True})
+            if not style_guide:
+                yield _sse("error", {"message": f"Style guide '{style_guide_id}' not found."})
+                return
+
+        yield _sse("start", {
+            "engine": engine,
+            "model": multi_engine_service._get_model_used(engine, source_lang, target_lang),
+        })
+        try:
+            async for event in multi_engine_service.stream_with_engine(
+                text, source_lang, target_lang, engine, style_guide=style_guide
+            ):
+                event_type = event.pop("type")
+                yield _sse(event_type, event)
+        except Exception as e:
+            logger.error(f"Streaming translation failed for {engine}: {e}")
+            yield _sse("error", {"message": str(e)})
+
+    return StreamingResponse(generator(), media_type="text/event-stream")
+
 @router.post("/triple-output")
 async def create_triple_output_translation_request(
     request_data: TranslationRequestCreate,
@@ -414,7 +580,7 @@ async def create_triple_output_translation_request(
             engines=selected_engines_for_triple
         )
 
-        return await create_multi_engine_translation_request(
+        return await _create_multi_engine_translation_request(
             multi_request,
             fuzzy_matcher=fuzzy_matcher,
             multi_engine_service=multi_engine_service,
@@ -701,13 +867,67 @@ async def create_annotation(string_id: str, annotation_data: AnnotationCreate):
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Failed to create annotation: {str(e)}")
 
+@router.get("/{request_id}/job")
+async def get_translation_job(request_id: str):
+    """Progress of the background job for a request created with ?async=true"""
+    if not prisma.is_connected():
+        await prisma.connect()
+    progress = await translation_jobs.progress(request_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"No job for translation request {request_id}")
+    return progress
+
+@router.get("/{request_id}/job/events")
+async def stream_translation_job(request_id: str):
+    """Job progress as server-sent events until the job completes or fails.
+
+      data: {"type": "progress", <same fields as GET /{request_id}/job>}
+      data: {"type": "done",     <final progress>}
+      data: {"type": "error", "message": "..."}
+    """
+    async def generator():
+        if not prisma.is_connected():
+            await prisma.connect()
+        last = None
+        while True:
+            try:
+                progress = await translation_jobs.progress(request_id)
+            except Exception as e:
+                yield _sse("error", {"message": str(e)})
+                return
+            if progress is None:
+                yield _sse("error", {"message": f"No job for translation request {request_id}"})
+                return
+            if progress["status"] in ("COMPLETED", "FAILED"):
+                yield _sse("done", progress)
+                return
+            snapshot = (progress["status"], progress["completedSegments"])
+            if snapshot != last:
+                yield _sse("progress", progress)
+                last = snapshot
+            await asyncio.sleep(settings.JOB_PROGRESS_INTERVAL_S)
+
+    return StreamingResponse(generator(), media_type="text/event-stream")
+
 @router.get("/{request_id}")
-async def get_translation_request(request_id: str):
+async def get_translation_request(
+    request_id: str,
+    stream: bool = Query(False, description="Stream the request and its strings as NDJSON, read page by page"),
+    cursor: Optional[str] = Query(None, description="With stream: resume after this string id"),
+):
     """Get a specific translation request by ID"""
     try:
         if not prisma.is_connected():
             await prisma.connect()
 
+        if stream:
+            translation_request = await prisma.translationrequest.find_unique(where={"id": request_id})
+            if not translation_request:
+                raise HTTPException(status_code=404, detail=f"Translation request {request_id} not found")
+            return stream_stored_request(
+                translation_request, cursor, include_metrics=False, string_include={"annotations": True}
+            )
+
         translation_request = await prisma.translationrequest.find_unique(
             where={"id": request_id},
             include={
@@ -813,7 +1033,7 @@ async def create_single_engine_from_file(
             styleGuideIds=styleGuideIds or None,
         )
 
-        return await create_translation_request(
+        return await _create_translation_request(
             request_data,
             fuzzy_matcher=fuzzy_matcher,
             multi_engine_service=multi_engine_service,
@@ -880,7 +1100,7 @@ async def create_multi_engine_from_file(
             styleGuideIds=styleGuideIds or None,
         )
 
-        return await create_multi_engine_translation_request(
+        return await _create_multi_engine_translation_request(
             request_data,
             fuzzy_matcher=fuzzy_matcher,
             multi_engine_service=multi_engine_service,
@@ -983,7 +1203,7 @@ async def save_segmentation_edits(
                 engines=engines,
                 styleGuideIds=style_guide_ids,
             )
-            return await create_multi_engine_translation_request(
+            return await _create_multi_engine_translation_request(
                 request_data,
                 fuzzy_matcher=fuzzy_matcher,
                 multi_engine_service=multi_engine_service,
@@ -997,7 +1217,7 @@ async def save_segmentation_edits(
                 sourceTexts=source_texts,
                 styleGuideIds=style_guide_ids,
             )
-            return await create_translation_request(
+            return await _create_translation_request(
                 request_data,
                 fuzzy_matcher=fuzzy_matcher,
                 multi_engine_service=multi_engine_service,
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
 import logging
 import random
 import statistics
+import time
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import sacrebleu
@@ -9,11 +11,16 @@ from prisma import Json
 
 from app.schemas.wmt import WMTRequestCreate, WMTBenchmarkResult
 from app.db.base import prisma
-from app.services.translation_service import translation_service
+from app.db.bulk import BulkWriter
+from app.services.translation_service import translation_service, SUPPORTED_PRECISIONS
+from app.services.multi_engine_service import CleanMultiEngineService
+from app.services.gemini_rate_limiter import BATCH
+from app.services.model_residency import estimate_model_bytes
 from app.utils.text_processing import get_model_for_language_pair, detokenize_japanese
 from app.utils.lang_pair import normalize_lang_pair
 from app.dependencies import get_multi_engine_service, get_comet_model
 from app.api.routers.quality_assessment import comet_predict
+from app.api.routers.translation_requests import stream_stored_request
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/wmt", tags=["WMT Benchmarks"])
@@ -634,30 +641,34 @@ async def run_wmt_benchmark(request: WMTRequestCreate):
 
         results = []
 
-        for sample in selected_samples:
-            try:
-                mt_translation = translation_service.translate_by_model_type(
-                    sample["source"], model_to_use,
-                    source_lang=source_lang, target_lang=target_lang
-                )
-                # BLEU: sacrebleu returns 0–100, store as-is
-                bleu_score = sacrebleu.sentence_bleu(mt_translation, [sample["reference"]]).score
-                results.append(WMTBenchmarkResult(
-                    source_text=sample["source"],
-                    reference_text=sample["reference"],
-                    mt_translation=mt_translation,
-                    bleu_score=bleu_score,
-                    language_pair=language_pair
-                ))
-            except Exception as e:
-                logger.error(f"Translation failed for sample: {e}")
+        try:
+            mt_translations = translation_service.translate_batch(
+                [sample["source"] for sample in selected_samples], model_to_use,
+                source_lang=source_lang, target_lang=target_lang
+            )
+        except Exception as e:
+            logger.error(f"Batch translation failed for benchmark samples: {e}")
+            mt_translations = [e] * len(selected_samples)
+
+        for sample, mt_translation in zip(selected_samples, mt_translations):
+            if isinstance(mt_translation, Exception):
                 results.append(WMTBenchmarkResult(
                     source_text=sample["source"],
                     reference_text=sample["reference"],
-                    mt_translation=f"Translation failed: {str(e)}",
+                    mt_translation=f"Translation failed: {str(mt_translation)}",
                     bleu_score=0.0,
                     language_pair=language_pair
                 ))
+                continue
+            # BLEU: sacrebleu returns 0–100, store as-is
+            bleu_score = sacrebleu.sentence_bleu(mt_translation, [sample["reference"]]).score
+            results.append(WMTBenchmarkResult(
+                source_text=sample["source"],
+                reference_text=sample["reference"],
+                mt_translation=mt_translation,
+                bleu_score=bleu_score,
+                language_pair=language_pair
+            ))
 
         hypotheses = [r.mt_translation for r in results]
         references = [r.reference_text for r in results]
@@ -711,6 +722,103 @@ async def get_benchmark_details(benchmark_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/precision-benchmark")
+async def run_precision_benchmark(
+    language_pair: str = Query(..., description="WMT sample set, e.g. en-fr"),
+    model_key: Optional[str] = Query(None, description="Seq2seq model key; defaults to the pair's standard model"),
+    precisions: str = Query("fp32,bf16,int8", description="Comma-separated precisions to compare"),
+    sample_size: int = Query(50, ge=1, le=200),
+):
+    """Compare fp32 / bf16 / int8 loads of one engine on the WMT sample set.
+
+    Reports load time, estimated model memory, translation latency and corpus
+    BLEU/ChrF per precision, with deltas against fp32, so a per-pair decision
+    can be made before setting MODEL_PRECISION. Variants other than the
+    configured one are unloaded afterwards.
+    """
+    language_pair = language_pair.lower()
+    if language_pair not in WMT_SAMPLE_DATA:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Language pair {language_pair} not supported. Available: {list(WMT_SAMPLE_DATA.keys())}"
+        )
+    requested = [p.strip().lower() for p in precisions.split(",") if p.strip()]
+    invalid = [p for p in requested if p not in SUPPORTED_PRECISIONS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Unsupported precision(s) {invalid}. Use {list(SUPPORTED_PRECISIONS)}.")
+    if "fp32" not in requested:
+        requested.insert(0, "fp32")
+
+    source_lang, target_lang = language_pair.split('-')
+    model_key = model_key or get_model_for_language_pair(source_lang, target_lang)
+    if model_key.startswith('PIVOT') or model_key.startswith('TRANSLATE_GEMMA'):
+        raise HTTPException(status_code=400, detail=f"Precision benchmark only covers seq2seq engines, not '{model_key}'.")
+
+    samples = WMT_SAMPLE_DATA[language_pair][:sample_size]
+    sources = [s["source"] for s in samples]
+    references = [s["reference"] for s in samples]
+    is_cjk = target_lang in ("jp", "ja")
+    loop = asyncio.get_running_loop()
+
+    def _run(precision: str) -> Dict[str, Any]:
+        load_start = time.time()
+        model, _, _ = translation_service._load_model(model_key, precision)
+        load_ms = (time.time() - load_start) * 1000
+        translate_start = time.time()
+        hyps = translation_service.translate_batch(
+            sources, model_key, source_lang=source_lang, target_lang=target_lang,
+            precision=precision, use_cache=False,
+        )
+        failed = next((hyp for hyp in hyps if isinstance(hyp, Exception)), None)
+        if failed is not None:
+            raise failed
+        translate_ms = (time.time() - translate_start) * 1000
+        return {
+            "precision": precision,
+            "device": str(model.device),
+            "load_time_ms": round(load_ms, 1),
+            "estimated_model_mb": round(estimate_model_bytes(model) / 1024 ** 2, 1),
+            "total_latency_ms": round(translate_ms, 1),
+            "latency_per_segment_ms": round(translate_ms / len(sources), 2),
+            "bleu": round(sacrebleu.corpus_bleu(hyps, [references], tokenize="char" if is_cjk else "13a").score, 2),
+            "chrf": round(sacrebleu.corpus_chrf(hyps, [references]).score, 2),
+        }
+
+    results = []
+    configured_key = translation_service._registry_key(model_key)
+    for precision in requested:
+        try:
+            # Same single-worker executor as live traffic, so runs never overlap a generate()
+            results.append(await loop.run_in_executor(CleanMultiEngineService._gpu_executor, _run, precision))
+        except Exception as e:
+            logger.error(f"Precision benchmark failed for {model_key} ({precision}): {e}")
+            results.append({"precision": precision, "error": str(e)})
+        finally:
+            variant_key = translation_service._registry_key(model_key, precision)
+            if variant_key != configured_key:
+                translation_service.unload_model(variant_key)
+
+    baseline = next((r for r in results if r["precision"] == "fp32" and "error" not in r), None)
+    if baseline:
+        for r in results:
+            if "error" in r or r is baseline:
+                continue
+            r["vs_fp32"] = {
+                "speedup": round(baseline["total_latency_ms"] / r["total_latency_ms"], 2) if r["total_latency_ms"] else None,
+                "memory_ratio": round(r["estimated_model_mb"] / baseline["estimated_model_mb"], 3) if baseline["estimated_model_mb"] else None,
+                "bleu_delta": round(r["bleu"] - baseline["bleu"], 2),
+                "chrf_delta": round(r["chrf"] - baseline["chrf"], 2),
+            }
+
+    return {
+        "language_pair": language_pair,
+        "model_key": model_key,
+        "configured_precision": translation_service.model_precision(model_key),
+        "sample_size": len(samples),
+        "results": results,
+    }
+
+
 @router.post("/create-request")
 async def create_wmt_benchmark_request(
     language_pair: str = Query(...),
@@ -765,59 +873,70 @@ async def create_wmt_benchmark_request(
             )
 
         selected_samples = wmt_samples[:sample_size]
+        source_texts = [sample["source"].strip() for sample in selected_samples]
+
+        intermediate_texts = None
+        try:
+            model_key_for_wmt = get_model_for_language_pair(source_lang, target_lang)
 
+            if model_key_for_wmt == 'PIVOT_ELAN_HELSINKI':
+                translated_texts, intermediate_texts = await multi_engine_service._translate_with_pivot_batch(
+                    source_texts, source_lang_code, target_lang_code,
+                    multi_engine_service.engine_configs['elan_quality']['pivot_strategy'],
+                    return_intermediates=True,
+                )
+            else:
+                prefix_or_lang_tag = None
+                model_info_from_ts = next(
+                    (info for info in translation_service.language_pair_models.get(f"{source_lang.upper()}-{target_lang.upper()}", [])
+                     if info[0] == model_key_for_wmt),
+                    None
+                )
+                if model_info_from_ts and len(model_info_from_ts) == 3:
+                    prefix_or_lang_tag = model_info_from_ts[2]
+
+                translated_texts = await multi_engine_service.run_model_batch(
+                    source_texts, model_key_for_wmt,
+                    source_lang=source_lang.lower(), target_lang=target_lang.lower(),
+                    target_lang_tag=prefix_or_lang_tag
+                )
+
+            if target_lang_code == 'JP':
+                translated_texts = [t if isinstance(t, Exception) else detokenize_japanese(t) for t in translated_texts]
+            batch_error = None
+        except Exception as e:
+            logger.error(f"Failed to translate WMT samples: {e}")
+            translated_texts = None
+            batch_error = e
+
+        strings = BulkWriter("translationstring")
         for i, sample in enumerate(selected_samples):
             source_text = sample["source"]
             reference_text = sample["reference"]
-            try:
-                model_key_for_wmt = get_model_for_language_pair(source_lang, target_lang)
-                translated_text = ""
-
-                if model_key_for_wmt == 'PIVOT_ELAN_HELSINKI':
-                    translated_text = await multi_engine_service._translate_with_pivot(
-                        source_text.strip(), source_lang_code, target_lang_code,
-                        multi_engine_service.engine_configs['elan_quality']['pivot_strategy']
-                    )
-                else:
-                    prefix_or_lang_tag = None
-                    model_info_from_ts = next(
-                        (info for info in translation_service.language_pair_models.get(f"{source_lang.upper()}-{target_lang.upper()}", [])
-                         if info[0] == model_key_for_wmt),
-                        None
-                    )
-                    if model_info_from_ts and len(model_info_from_ts) == 3:
-                        prefix_or_lang_tag = model_info_from_ts[2]
-
-                    translated_text = translation_service.translate_by_model_type(
-                        source_text.strip(), model_key_for_wmt,
-                        source_lang=source_lang.lower(), target_lang=target_lang.lower(),
-                        target_lang_tag=prefix_or_lang_tag
-                    )
-
-                if target_lang_code == 'JP':
-                    translated_text = detokenize_japanese(translated_text)
-
-                await prisma.translationstring.create(
-                    data={
-                        "sourceText": source_text, "translatedText": translated_text,
+            # A failed segment comes back as its exception and fails only its own row
+            error = batch_error or (translated_texts[i] if isinstance(translated_texts[i], Exception) else None)
+            if error is None:
+                await strings.add(
+                    {
+                        "sourceText": source_text, "translatedText": translated_texts[i],
                         "referenceText": reference_text, "referenceType": "WMT",
                         "hasReference": True, "targetLanguage": target_lang_code,
                         "status": "REVIEWED", "isApproved": False, "processingTimeMs": 1000,
                         "translationRequestId": wmt_request.id, "fuzzyMatches": Json("[]"),
+                        "intermediateTranslation": intermediate_texts[i] if intermediate_texts else None,
                     }
                 )
-
-            except Exception as e:
-                logger.error(f"Failed to translate WMT sample {i}: {e}")
-                await prisma.translationstring.create(
-                    data={
-                        "sourceText": source_text, "translatedText": f"Translation failed: {str(e)}",
+            else:
+                await strings.add(
+                    {
+                        "sourceText": source_text, "translatedText": f"Translation failed: {str(error)}",
                         "referenceText": reference_text, "referenceType": "WMT",
                         "hasReference": True, "targetLanguage": target_lang_code,
                         "status": "DRAFT", "isApproved": False, "processingTimeMs": 0,
                         "translationRequestId": wmt_request.id, "fuzzyMatches": Json("[]"),
                     }
                 )
+        await strings.flush()
 
         await prisma.translationrequest.update(where={"id": wmt_request.id}, data={"status": "COMPLETED"})
 
@@ -847,10 +966,19 @@ async def get_wmt_requests():
         raise HTTPException(status_code=500, detail=f"Failed to fetch WMT requests: {str(e)}")
 
 @router.get("/results/{request_id}")
-async def get_wmt_results(request_id: str):
+async def get_wmt_results(
+    request_id: str,
+    stream: bool = Query(False, description="Stream the request, its strings and metrics as NDJSON, read page by page"),
+    cursor: Optional[str] = Query(None, description="With stream: resume after this string id"),
+):
     try:
         if not prisma.is_connected():
             await prisma.connect()
+        if stream:
+            wmt_request = await prisma.translationrequest.find_unique(where={"id": request_id})
+            if not wmt_request:
+                raise HTTPException(status_code=404, detail="WMT request not found")
+            return stream_stored_request(wmt_request, cursor, include_metrics=True)
         wmt_request = await prisma.translationrequest.find_unique(
             where={"id": request_id},
             include={"translationStrings": True, "qualityMetrics": True}
@@ -982,6 +1110,10 @@ async def run_multi_engine_benchmark(
     request_id = wmt_request.id
 
     engine_results: Dict[str, Dict] = {}
+    # create_many returns no rows: strings get client-side ids for their metrics rows,
+    # and each engine's strings are flushed before its metrics are buffered
+    strings = BulkWriter("translationstring")
+    metrics = BulkWriter("qualitymetrics")
 
     for engine_id in engines_to_run:
         logger.info(f"  Running engine: {engine_id}")
@@ -989,38 +1121,40 @@ async def run_multi_engine_benchmark(
         refs: List[str] = []
         string_ids: List[str] = []
 
-        for sample in samples:
-            if engine_id == 'gemini_transcreation' and len(hyps) >= 50:
-                break
+        # Use ISO codes so the engine service finds the correct model mapping.
+        # Gemini runs the full set too: segments are packed into multi-segment
+        # requests and paced by the shared rate limiter at batch priority.
+        batch_results = await multi_engine_service.translate_batch_with_engine(
+            [sample["source"] for sample in samples],
+            service_source.upper(), service_target.upper(), engine_id,
+            priority=BATCH,
+        )
+
+        for sample, result in zip(samples, batch_results):
             src = sample["source"]
             ref = sample["reference"]
-            try:
-                # Use ISO codes so the engine service finds the correct model mapping
-                result = await multi_engine_service.translate_with_engine(
-                    src, service_source.upper(), service_target.upper(), engine_id
-                )
-                translation = result.get("text", "")
-                if target_lang == "jp":
-                    translation = detokenize_japanese(translation)
-            except Exception as exc:
-                logger.warning(f"    {engine_id} failed on segment: {exc}")
-                translation = ""
+            if result.get("error"):
+                logger.warning(f"    {engine_id} failed on segment: {result['error']}")
+            translation = result.get("text", "")
+            if target_lang == "jp":
+                translation = detokenize_japanese(translation)
 
             hyps.append(translation)
             refs.append(ref)
 
             # DB writes keep internal codes (e.g. "JP"), not ISO
-            ts = await prisma.translationstring.create(
-                data={
+            string_ids.append(await strings.add(
+                {
                     "sourceText": src, "translatedText": translation,
                     "referenceText": ref, "referenceType": "WMT",
                     "hasReference": True, "targetLanguage": target_lang.upper(),
                     "status": "REVIEWED", "isApproved": True,
                     "selectedEngine": engine_id, "processingTimeMs": 0,
                     "translationRequestId": request_id, "fuzzyMatches": Json("[]"),
-                }
-            )
-            string_ids.append(ts.id)
+                },
+                with_id=True,
+            ))
+        await strings.flush()
 
         valid = [(h, r) for h, r in zip(hyps, refs) if h]
         if not valid:
@@ -1066,8 +1200,8 @@ async def run_multi_engine_benchmark(
             seg_chrf = sacrebleu.sentence_chrf(hyp, [ref]).score               # 0–100
             seg_ter  = min(100.0, sacrebleu.corpus_ter([hyp], [[ref]]).score)  # 0–100
 
-            await prisma.qualitymetrics.create(
-                data={
+            await metrics.add(
+                {
                     "translationStringId": ts_id,
                     "translationRequestId": request_id,
                     "engineName": engine_id,
@@ -1108,6 +1242,7 @@ async def run_multi_engine_benchmark(
             f"    {engine_id}: BLEU={bleu:.1f} ChrF={chrf:.1f} TER={ter:.1f}"
             + (f" COMET={comet_avg:.3f}" if comet_avg else "")
         )
+    await metrics.flush()
 
     await prisma.translationrequest.update(
         where={"id": request_id}, data={"status": "COMPLETED"},
@@ -1,6 +1,6 @@
 import os
 import json
-from typing import List
+from typing import Dict, List
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -33,6 +33,134 @@ class Settings:
     MODEL_CACHE_DIR: str = os.getenv("MODEL_CACHE_DIR", "./models")
     METRICX_MODEL_PATH: str = os.getenv("METRICX_MODEL_PATH", "./models/metricx-24-hybrid-large-v2p6")
 
+    # Batched inference - segments per padded generate() call for seq2seq engines
+    TRANSLATION_BATCH_SIZE: int = int(os.getenv("TRANSLATION_BATCH_SIZE", "16"))
+    # TranslateGemma - segments per padded generate() call, and whether to reuse
+    # the cached KV of the shared chat-template prefix (repeated across each batch)
+    GEMMA_BATCH_SIZE: int = int(os.getenv("GEMMA_BATCH_SIZE", "8"))
+    GEMMA_PREFIX_CACHE: bool = os.getenv("GEMMA_PREFIX_CACHE", "true").lower() == "true"
+    # Inputs longer than this many source tokens are split into sentence chunks
+    # before seq2seq translation (Marian/NLLB context is 512); 0 disables
+    CHUNK_MAX_TOKENS: int = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+    # Output-length budgets - max_new_tokens per generate() call is learned from
+    # output/input token ratios per (model, pair): longest input x ratio quantile
+    # x margin + min tokens, capped at GENERATION_MAX_TOKENS
+    GENERATION_MAX_TOKENS: int = int(os.getenv("GENERATION_MAX_TOKENS", "512"))
+    LENGTH_BUDGET_ENABLED: bool = os.getenv("LENGTH_BUDGET_ENABLED", "true").lower() == "true"
+    LENGTH_BUDGET_MARGIN: float = float(os.getenv("LENGTH_BUDGET_MARGIN", "1.5"))
+    LENGTH_BUDGET_MIN_TOKENS: int = int(os.getenv("LENGTH_BUDGET_MIN_TOKENS", "16"))
+    LENGTH_BUDGET_QUANTILE: float = float(os.getenv("LENGTH_BUDGET_QUANTILE", "0.95"))
+    LENGTH_BUDGET_DEFAULT_RATIO: float = float(os.getenv("LENGTH_BUDGET_DEFAULT_RATIO", "3.0"))
+    LENGTH_BUDGET_MIN_SAMPLES: int = int(os.getenv("LENGTH_BUDGET_MIN_SAMPLES", "20"))
+    LENGTH_BUDGET_HISTORY_LIMIT: int = int(os.getenv("LENGTH_BUDGET_HISTORY_LIMIT", "5000"))
+    # Stop a row once its tail is one n-gram (up to REPETITION_NGRAM_SIZE tokens)
+    # repeated REPETITION_MAX_REPEATS times; 0 disables loop detection
+    REPETITION_NGRAM_SIZE: int = int(os.getenv("REPETITION_NGRAM_SIZE", "4"))
+    REPETITION_MAX_REPEATS: int = int(os.getenv("REPETITION_MAX_REPEATS", "4"))
+    # Engine worker processes (0 = run models in the API process). ENGINE_WORKER_ASSIGNMENT
+    # is a JSON object of model key -> worker index, e.g. {"NLLB_200": 0, "HELSINKI_EN_FR": 1};
+    # unlisted models are spread by a hash of their key
+    ENGINE_WORKERS: int = int(os.getenv("ENGINE_WORKERS", "0"))
+    ENGINE_WORKER_ASSIGNMENT: Dict[str, int] = json.loads(os.getenv("ENGINE_WORKER_ASSIGNMENT", "") or "{}")
+    ENGINE_WORKER_THREADS: int = int(os.getenv("ENGINE_WORKER_THREADS", "0"))
+    ENGINE_WORKER_TIMEOUT_S: float = float(os.getenv("ENGINE_WORKER_TIMEOUT_S", "600"))
+    # Remote engine nodes - comma-separated base URLs of app.engine_worker_server
+    # processes (e.g. "http://gpu-box:8101,http://small-box:8101"); empty = all local
+    REMOTE_ENGINE_NODES: List[str] = [
+        url.strip() for url in os.getenv("REMOTE_ENGINE_NODES", "").split(",") if url.strip()
+    ]
+    REMOTE_HEALTH_INTERVAL_S: float = float(os.getenv("REMOTE_HEALTH_INTERVAL_S", "15"))
+    REMOTE_HEALTH_TIMEOUT_S: float = float(os.getenv("REMOTE_HEALTH_TIMEOUT_S", "3"))
+    REMOTE_REQUEST_TIMEOUT_S: float = float(os.getenv("REMOTE_REQUEST_TIMEOUT_S", "300"))
+    # Worker-node side: engine ids this node hosts (empty = every engine) and its name
+    REMOTE_WORKER_ENGINES: List[str] = [
+        engine.strip() for engine in os.getenv("REMOTE_WORKER_ENGINES", "").split(",") if engine.strip()
+    ]
+    REMOTE_WORKER_NAME: str = os.getenv("REMOTE_WORKER_NAME", "")
+    # Gemini quota - per-model RPM / RPD / TPM buckets shared by every Gemini caller.
+    # GEMINI_RATE_LIMITS is a JSON object of per-model overrides, e.g.
+    # {"gemini-3.1-flash-lite": {"rpm": 30, "rpd": 1500}}; rpd 0 = no daily cap.
+    # Batch callers leave GEMINI_BATCH_RESERVE of the RPM bucket to interactive ones;
+    # GEMINI_RATE_LIMIT_PATH (SQLite file) shares the buckets across processes
+    GEMINI_RPM: int = int(os.getenv("GEMINI_RPM", "15"))
+    GEMINI_RPD: int = int(os.getenv("GEMINI_RPD", "500"))
+    GEMINI_TPM: int = int(os.getenv("GEMINI_TPM", "250000"))
+    GEMINI_RATE_LIMITS: Dict[str, Dict[str, int]] = json.loads(os.getenv("GEMINI_RATE_LIMITS", "") or "{}")
+    GEMINI_BATCH_RESERVE: float = float(os.getenv("GEMINI_BATCH_RESERVE", "0.2"))
+    GEMINI_RATE_LIMIT_PATH: str = os.getenv("GEMINI_RATE_LIMIT_PATH", "")
+    GEMINI_MAX_RETRIES: int = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+    GEMINI_BACKOFF_BASE_S: float = float(os.getenv("GEMINI_BACKOFF_BASE_S", "10"))
+    GEMINI_BACKOFF_MAX_S: float = float(os.getenv("GEMINI_BACKOFF_MAX_S", "120"))
+    # Per-attempt timeout for a Gemini transcreation call (the request is cancelled)
+    TRANSCREATION_TIMEOUT_S: float = float(os.getenv("TRANSCREATION_TIMEOUT_S", "60"))
+    # Batched transcreation - segments packed per Gemini request (JSON array in/out),
+    # bounded by count and estimated source tokens, with a cap on the response length
+    TRANSCREATION_BATCH_SIZE: int = int(os.getenv("TRANSCREATION_BATCH_SIZE", "20"))
+    TRANSCREATION_BATCH_MAX_TOKENS: int = int(os.getenv("TRANSCREATION_BATCH_MAX_TOKENS", "2000"))
+    TRANSCREATION_BATCH_MAX_OUTPUT_TOKENS: int = int(os.getenv("TRANSCREATION_BATCH_MAX_OUTPUT_TOKENS", "8192"))
+    # Compiled transcreation prompts kept per (pair, style guide version), and Gemini
+    # context caching of their few-shot prefix (only prefixes of at least
+    # TRANSCREATION_CONTEXT_CACHE_MIN_TOKENS estimated tokens; Gemini rejects smaller)
+    TRANSCREATION_PROMPT_CACHE_SIZE: int = int(os.getenv("TRANSCREATION_PROMPT_CACHE_SIZE", "256"))
+    TRANSCREATION_CONTEXT_CACHE: bool = os.getenv("TRANSCREATION_CONTEXT_CACHE", "true").lower() == "true"
+    TRANSCREATION_CONTEXT_CACHE_MIN_TOKENS: int = int(os.getenv("TRANSCREATION_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+    TRANSCREATION_CONTEXT_CACHE_TTL_S: float = float(os.getenv("TRANSCREATION_CONTEXT_CACHE_TTL_S", "3600"))
+    # Durable translation jobs (?async=true) - JOB_WORKERS worker tasks per API process
+    # translate JOB_CHUNK_SIZE segments per step and write them as they finish; a job
+    # whose heartbeat is older than JOB_STALE_AFTER_S is reclaimed and resumed
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_CHUNK_SIZE: int = int(os.getenv("JOB_CHUNK_SIZE", "32"))
+    JOB_POLL_INTERVAL_S: float = float(os.getenv("JOB_POLL_INTERVAL_S", "1"))
+    JOB_HEARTBEAT_S: float = float(os.getenv("JOB_HEARTBEAT_S", "10"))
+    JOB_STALE_AFTER_S: float = float(os.getenv("JOB_STALE_AFTER_S", "60"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_PROGRESS_INTERVAL_S: float = float(os.getenv("JOB_PROGRESS_INTERVAL_S", "1"))
+    # Segment pipeline for the synchronous request endpoints: chunks of PIPELINE_CHUNK_SIZE
+    # segments flow tm -> mt -> post -> persist through queues of PIPELINE_QUEUE_SIZE
+    # chunks, each stage with its own worker count. PIPELINE_PERSIST_CONCURRENCY > 1
+    # writes faster but no longer inserts rows in source order
+    PIPELINE_CHUNK_SIZE: int = int(os.getenv("PIPELINE_CHUNK_SIZE", "32"))
+    PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+    PIPELINE_TM_CONCURRENCY: int = int(os.getenv("PIPELINE_TM_CONCURRENCY", "4"))
+    PIPELINE_MT_CONCURRENCY: int = int(os.getenv("PIPELINE_MT_CONCURRENCY", "2"))
+    PIPELINE_POST_CONCURRENCY: int = int(os.getenv("PIPELINE_POST_CONCURRENCY", "1"))
+    PIPELINE_PERSIST_CONCURRENCY: int = int(os.getenv("PIPELINE_PERSIST_CONCURRENCY", "1"))
+    # NDJSON streaming (?stream=true) - rows read per cursor page
+    STREAM_PAGE_SIZE: int = int(os.getenv("STREAM_PAGE_SIZE", "200"))
+    # Bulk inserts - rows buffered per create_many for translation strings / metrics
+    BULK_WRITE_BATCH_SIZE: int = int(os.getenv("BULK_WRITE_BATCH_SIZE", "500"))
+    # Length buckets - cap on padded tokens (items x longest item) per forward pass
+    TRANSLATION_MAX_BATCH_TOKENS: int = int(os.getenv("TRANSLATION_MAX_BATCH_TOKENS", "2048"))
+    COMET_MAX_BATCH_TOKENS: int = int(os.getenv("COMET_MAX_BATCH_TOKENS", "2048"))
+
+    # Seq2seq load precision: fp32 | bf16 | int8 (dynamic-quantized Linear layers, CPU).
+    # MODEL_PRECISION is a JSON object of per-engine overrides, e.g. {"NLLB_200": "int8"}
+    DEFAULT_MODEL_PRECISION: str = os.getenv("DEFAULT_MODEL_PRECISION", "fp32")
+    MODEL_PRECISION: Dict[str, str] = json.loads(os.getenv("MODEL_PRECISION", "") or "{}")
+    QUANTIZED_MODEL_DIR: str = os.getenv("QUANTIZED_MODEL_DIR", "./models/quantized")
+
+    # Translation output cache - in-process LRU in front of a durable SQLite tier
+    TRANSLATION_CACHE_ENABLED: bool = os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() == "true"
+    TRANSLATION_CACHE_SIZE: int = int(os.getenv("TRANSLATION_CACHE_SIZE", "10000"))
+    TRANSLATION_CACHE_PATH: str = os.getenv("TRANSLATION_CACHE_PATH", "./cache/translations.sqlite3")
+
+    # Model residency - LRU-evict local MT models above this estimated footprint (0 = unlimited)
+    MODEL_MEMORY_BUDGET_MB: int = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+
+    # Startup preloading - comma-separated "engine_id:src-tgt" entries
+    # (e.g. "opus_fast:en-jp,nllb_multilingual:en-fr"), loaded and warmed in the background
+    PRELOAD_ENGINES: List[str] = [
+        entry.strip() for entry in os.getenv("PRELOAD_ENGINES", "").split(",") if entry.strip()
+    ]
+    WARMUP_TEXT: str = os.getenv("WARMUP_TEXT", "Hello, world.")
+
+    # Micro-batching scheduler - concurrent calls to the same model are merged
+    # into one batch of up to BATCH_MAX_SIZE segments / BATCH_MAX_TOKENS tokens,
+    # waiting at most BATCH_MAX_WAIT_MS for more calls to arrive
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", "32"))
+    BATCH_MAX_TOKENS: int = int(os.getenv("BATCH_MAX_TOKENS", "4096"))
+    BATCH_MAX_WAIT_MS: float = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
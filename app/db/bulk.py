@@ -0,0 +1,72 @@
+"""Batched inserts.
+
+BulkWriter buffers create data for one Prisma model and writes it with
+create_many every BULK_WRITE_BATCH_SIZE rows (and on flush), instead of one
+create round trip per row. create_many does not return the rows, so
+add(..., with_id=True) assigns the id client-side and returns it. Callers
+can then reference rows that have not been written yet (flush the parent
+writer before the child's). create_many takes scalar fields only: use
+translationRequestId, not {"translationRequest": {"connect": ...}}.
+
+Per-model row counts and write times are kept in bulk_write_stats for
+/api/debug/bulk-write-benchmark.
+"""
+
+import itertools
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.db.base import prisma
+
+logger = logging.getLogger(__name__)
+
+# model -> {"rows", "flushes", "seconds"} since startup
+bulk_write_stats: Dict[str, Dict[str, float]] = {}
+
+_id_sequence = itertools.count()
+
+
+def new_id() -> str:
+    """Client-side primary key for rows written through create_many.
+
+    Ascending within the process, so rows of one create_many (same createdAt)
+    read back in the order they were added when ordered by (createdAt, id).
+    """
+    return f"c{time.time_ns():016x}{next(_id_sequence) % 0x1000000:06x}{uuid.uuid4().hex[:8]}"
+
+
+class BulkWriter:
+    def __init__(self, model: str, batch_size: Optional[int] = None):
+        self.model = model
+        self.batch_size = max(1, batch_size or settings.BULK_WRITE_BATCH_SIZE)
+        self.written = 0
+        self._rows: List[Dict] = []
+
+    async def add(self, data: Dict, with_id: bool = False) -> Optional[str]:
+        """Buffer one row, flushing when the batch is full; returns its id if with_id."""
+        row_id = None
+        if with_id:
+            row_id = data.setdefault("id", new_id())
+        self._rows.append(data)
+        if len(self._rows) >= self.batch_size:
+            await self.flush()
+        return row_id
+
+    async def flush(self) -> int:
+        if not self._rows:
+            return 0
+        rows, self._rows = self._rows, []
+        start = time.perf_counter()
+        count = await getattr(prisma, self.model).create_many(data=rows)
+        elapsed = time.perf_counter() - start
+
+        stats = bulk_write_stats.setdefault(self.model, {"rows": 0, "flushes": 0, "seconds": 0.0})
+        stats["rows"] += len(rows)
+        stats["flushes"] += 1
+        stats["seconds"] += elapsed
+        self.written += len(rows)
+        logger.debug(f"Bulk wrote {len(rows)} {self.model} row(s) in {elapsed * 1000:.1f} ms")
+        return count
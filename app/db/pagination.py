@@ -0,0 +1,41 @@
+"""Cursor pagination over large child collections.
+
+iter_pages reads a model's rows in (createdAt, id) order, PAGE_SIZE at a
+time, each page starting after the previous page's last id. Endpoints can
+then stream a 10k-segment request without holding every row (and its
+includes) in memory. The last id streamed also works as a resume cursor
+for a client whose stream was cut off.
+"""
+
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.base import prisma
+
+ORDER = [{"createdAt": "asc"}, {"id": "asc"}]
+
+
+async def iter_pages(
+    model: str,
+    where: Dict,
+    include: Optional[Dict] = None,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None,
+) -> AsyncIterator[List]:
+    """Yield pages of rows matching where, after the row with id == cursor if given."""
+    actions = getattr(prisma, model)
+    take = page_size or settings.STREAM_PAGE_SIZE
+    while True:
+        page = await actions.find_many(
+            where=where,
+            include=include,
+            order=ORDER,
+            take=take,
+            **({"cursor": {"id": cursor}, "skip": 1} if cursor else {}),
+        )
+        if not page:
+            return
+        yield page
+        if len(page) < take:
+            return
+        cursor = page[-1].id
@@ -39,6 +39,13 @@ def get_health_service(request: Request):
     return service
 
 
+def get_warmup_service(request: Request):
+    service = getattr(request.app.state, "warmup_service", None)
+    if service is None:
+        raise HTTPException(status_code=503, detail="Warm-up service not initialized.")
+    return service
+
+
 def get_transcreation_service(request: Request):
     service = getattr(request.app.state, "transcreation_service", None)
     if service is None:
@@ -0,0 +1,97 @@
+"""Remote engine worker node.
+
+Hosts a subset of the engine configs (REMOTE_WORKER_ENGINES; empty = all)
+behind a small batched translate protocol, so models can be spread across
+machines and the main API only routes:
+
+    GET  /worker/health           -> node name, engine -> available pairs, resident models
+    POST /worker/translate-batch  -> {"results": [engine result dict per text]}
+
+Run one per node, or several on one machine for local testing:
+
+    REMOTE_WORKER_ENGINES=translate_gemma REMOTE_WORKER_NAME=gpu \\
+        uvicorn app.engine_worker_server:app --port 8101
+    REMOTE_WORKER_ENGINES=opus_fast,elan_quality REMOTE_WORKER_NAME=small \\
+        uvicorn app.engine_worker_server:app --port 8102
+
+and point the API at them with REMOTE_ENGINE_NODES=http://localhost:8101,http://localhost:8102.
+"""
+
+import logging
+import socket
+import time
+from datetime import datetime
+
+from fastapi import FastAPI, HTTPException
+
+from app.core.config import settings
+from app.schemas.translation import WorkerTranslateBatchRequest
+from app.services.multi_engine_service import CleanMultiEngineService
+from app.services.transcreation_service import TranscreationService
+from app.services.translation_service import translation_service
+from app.services.warmup_service import EngineWarmupService
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title=f"{settings.API_TITLE} - engine worker", version=settings.API_VERSION)
+
+
+def _hosted_engines(multi_engine_service: CleanMultiEngineService):
+    configured = multi_engine_service.engine_configs
+    return [e for e in configured if not settings.REMOTE_WORKER_ENGINES or e in settings.REMOTE_WORKER_ENGINES]
+
+
+@app.on_event("startup")
+async def startup_event():
+    # Engines are always served locally here; a worker never forwards to other nodes
+    multi_engine_service = CleanMultiEngineService(
+        translation_service_instance=translation_service,
+        transcreation_service=TranscreationService(),
+    )
+    app.state.multi_engine_service = multi_engine_service
+    app.state.node_name = settings.REMOTE_WORKER_NAME or socket.gethostname()
+
+    warmup_service = EngineWarmupService(multi_engine_service)
+    warmup_service.start()
+    app.state.warmup_service = warmup_service
+    logger.info(f"Engine worker '{app.state.node_name}' hosting: {_hosted_engines(multi_engine_service)}")
+
+
+@app.get("/worker/health")
+async def worker_health():
+    multi_engine_service = app.state.multi_engine_service
+    hosted = set(_hosted_engines(multi_engine_service))
+    engines = {}
+    for pair, pair_engines in multi_engine_service.routing.snapshot()["pairs"].items():
+        for engine_id in pair_engines["available_engines"]:
+            if engine_id in hosted:
+                engines.setdefault(engine_id, []).append(pair)
+    return {
+        "status": "ok",
+        "node": app.state.node_name,
+        "engines": engines,
+        "residentModels": list(translation_service.models) + list(translation_service.causal_models),
+        "ready": app.state.warmup_service.readiness()["ready"],
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.post("/worker/translate-batch")
+async def worker_translate_batch(request: WorkerTranslateBatchRequest):
+    multi_engine_service = app.state.multi_engine_service
+    if request.engine not in _hosted_engines(multi_engine_service):
+        raise HTTPException(status_code=404, detail=f"Engine '{request.engine}' is not hosted on this node")
+    start = time.time()
+    results = await multi_engine_service.translate_batch_with_engine(
+        request.texts, request.sourceLanguage, request.targetLanguage, request.engine
+    )
+    return {
+        "node": app.state.node_name,
+        "engine": request.engine,
+        "results": results,
+        "processingTimeMs": round((time.time() - start) * 1000, 1),
+    }
@@ -30,6 +30,11 @@ from app.services.translation_service import translation_service
 from app.services.health_service import HealthService
 from app.services.multimodal_service import multimodal_service as multimodal_service_instance
 from app.services.transcreation_service import TranscreationService
+from app.services.warmup_service import EngineWarmupService
+from app.services.engine_workers import EngineWorkerPool
+from app.services.remote_engines import RemoteEngineRegistry
+from app.services.length_budget import length_budgets
+from app.services.translation_jobs import translation_jobs
 
 # Configure logging
 logging.basicConfig(
@@ -164,13 +169,42 @@ async def startup_event():
     transcreation_service = TranscreationService()
     app.state.transcreation_service = transcreation_service
 
+    # Optional engine worker processes; local models then load in the workers, not here
+    engine_worker_pool = None
+    if settings.ENGINE_WORKERS > 0:
+        engine_worker_pool = EngineWorkerPool()
+        engine_worker_pool.start()
+    app.state.engine_worker_pool = engine_worker_pool
+
+    # Remote engine nodes (REMOTE_ENGINE_NODES); health is polled in the background
+    remote_engines = None
+    if settings.REMOTE_ENGINE_NODES:
+        remote_engines = RemoteEngineRegistry()
+        await remote_engines.check_all()
+        remote_engines.start()
+    app.state.remote_engines = remote_engines
+
     # Initialize MultiEngineService (pass transcreation so it can register the Claude engine)
     multi_engine_service = CleanMultiEngineService(
         translation_service_instance=translation_service,
         transcreation_service=transcreation_service,
+        worker_pool=engine_worker_pool,
+        remote_engines=remote_engines,
     )
     app.state.multi_engine_service = multi_engine_service
 
+    # Seed per-(model, pair) output-length ratios from stored translations
+    await length_budgets.load_history(prisma, translation_service.model_paths)
+
+    # Preload configured engines in the background; /api/health/ready reports progress
+    warmup_service = EngineWarmupService(multi_engine_service)
+    warmup_service.start()
+    app.state.warmup_service = warmup_service
+
+    # Background translation jobs (?async=true); resumes jobs left by a previous run
+    translation_jobs.set_services(fuzzy_matcher, multi_engine_service)
+    translation_jobs.start()
+
     # Initialize and set HealthService
     health_service = HealthService()
     health_service.set_services(cometkiwi_model, multi_engine_service)
@@ -186,6 +220,13 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown():
+    await translation_jobs.stop()
+    engine_worker_pool = getattr(app.state, "engine_worker_pool", None)
+    if engine_worker_pool is not None:
+        engine_worker_pool.stop()
+    remote_engines = getattr(app.state, "remote_engines", None)
+    if remote_engines is not None:
+        remote_engines.stop()
     await cleanup_database()
 
 # Global exception handler
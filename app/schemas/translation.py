@@ -31,3 +31,9 @@ class EngineSelectionData(BaseModel):
     engine: str
     rating: int
     comments: Optional[str] = ""
+
+class WorkerTranslateBatchRequest(BaseModel):
+    engine: str
+    sourceLanguage: str
+    targetLanguage: str
+    texts: List[str]
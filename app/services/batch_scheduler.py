@@ -0,0 +1,226 @@
+"""Dynamic micro-batching in front of the local translation models.
+
+Every call to a local seq2seq model goes through MicroBatchScheduler.submit().
+Calls are queued per (model_key, source_lang, target_lang, target_lang_tag);
+a worker per queue waits up to BATCH_MAX_WAIT_MS after the first item arrives,
+gathers whatever else is queued (bounded by BATCH_MAX_SIZE segments and
+BATCH_MAX_TOKENS estimated input tokens), runs one batched translate on the
+shared executor and resolves each caller's future with its own result. A
+segment the backend returns as an exception fails only its own caller.
+
+Concurrent reviewers and background benchmarks therefore share one generate()
+call instead of queueing behind each other one segment at a time. A segment
+identical to one already in flight for the same queue waits on that result
+instead of being translated again.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.batching import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+BatchKey = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+
+class _Pending:
+    __slots__ = ("text", "future", "enqueued_at")
+
+    def __init__(self, text: str, future: asyncio.Future):
+        self.text = text
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatchScheduler:
+    def __init__(
+        self,
+        executor: concurrent.futures.Executor,
+        run_batch: Callable[..., List[str]],
+        max_batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+    ):
+        self.executor = executor
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size or settings.BATCH_MAX_SIZE
+        self.max_batch_tokens = max_batch_tokens or settings.BATCH_MAX_TOKENS
+        self.max_wait_ms = settings.BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+
+        self._queues: Dict[BatchKey, asyncio.Queue] = {}
+        self._workers: Dict[BatchKey, asyncio.Task] = {}
+        self._inflight: Dict[Tuple[BatchKey, str], asyncio.Future] = {}
+
+        # Metrics
+        self._submitted = 0
+        self._coalesced = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._batch_size_hist: Counter = Counter()
+        self._total_wait_ms = 0.0
+        self._max_wait_observed_ms = 0.0
+
+    async def submit(
+        self,
+        text: str,
+        model_key: str,
+        source_lang: str = None,
+        target_lang: str = None,
+        target_lang_tag: str = None,
+    ) -> str:
+        """Queue one segment and wait for its translation."""
+        key: BatchKey = (model_key, source_lang, target_lang, target_lang_tag)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = asyncio.Queue()
+            self._queues[key] = queue
+        worker = self._workers.get(key)
+        if worker is None or worker.done():
+            self._workers[key] = asyncio.create_task(self._worker(key, queue))
+
+        self._submitted += 1
+        # An identical segment already queued or running for this model (e.g. the same
+        # English intermediate from two pivot engines) shares that call's result
+        inflight_key = (key, text)
+        shared = self._inflight.get(inflight_key)
+        if shared is not None and not shared.done():
+            self._coalesced += 1
+            return await asyncio.shield(shared)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[inflight_key] = future
+        future.add_done_callback(lambda done: self._forget(inflight_key, done))
+        await queue.put(_Pending(text, future))
+        # Shielded: one caller giving up must not cancel the result others share
+        return await asyncio.shield(future)
+
+    async def submit_many(
+        self,
+        texts: List[str],
+        model_key: str,
+        source_lang: str = None,
+        target_lang: str = None,
+        target_lang_tag: str = None,
+    ) -> List[str]:
+        """Queue several segments at once; results keep input order.
+
+        A segment that failed comes back as its exception; the others still
+        return their translations.
+        """
+        results = await asyncio.gather(*[
+            self.submit(text, model_key, source_lang, target_lang, target_lang_tag)
+            for text in texts
+        ], return_exceptions=True)
+        # Cancellation (shutdown) is not a segment failure
+        cancelled = next((r for r in results if isinstance(r, asyncio.CancelledError)), None)
+        if cancelled is not None:
+            raise cancelled
+        return list(results)
+
+    async def _worker(self, key: BatchKey, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await queue.get()
+            batch = [first]
+            tokens = estimate_tokens(first.text)
+            deadline = loop.time() + self.max_wait_ms / 1000.0
+
+            while len(batch) < self.max_batch_size:
+                if queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = queue.get_nowait()
+                item_tokens = estimate_tokens(item.text)
+                if tokens + item_tokens > self.max_batch_tokens:
+                    # Over budget: run it at the head of the next batch instead
+                    await self._dispatch(key, batch)
+                    batch, tokens = [item], item_tokens
+                    deadline = loop.time() + self.max_wait_ms / 1000.0
+                    continue
+                batch.append(item)
+                tokens += item_tokens
+
+            await self._dispatch(key, batch)
+
+    async def _dispatch(self, key: BatchKey, batch: List[_Pending]):
+        # Futures resolved elsewhere (e.g. cancelled on shutdown) no longer need a slot
+        batch = [p for p in batch if not p.future.done()]
+        if not batch:
+            return
+
+        now = time.monotonic()
+        for pending in batch:
+            wait_ms = (now - pending.enqueued_at) * 1000
+            self._total_wait_ms += wait_ms
+            self._max_wait_observed_ms = max(self._max_wait_observed_ms, wait_ms)
+        self._batches += 1
+        self._batch_size_hist[len(batch)] += 1
+
+        model_key, source_lang, target_lang, target_lang_tag = key
+        texts = [p.text for p in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                lambda: self.run_batch(
+                    texts,
+                    model_key,
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    target_lang_tag=target_lang_tag,
+                ),
+            )
+        except Exception as e:
+            self._failed_batches += 1
+            logger.error(f"Micro-batch for {model_key} ({len(batch)} segment(s)) failed: {e}")
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        for pending, result in zip(batch, results):
+            if pending.future.done():
+                continue
+            if isinstance(result, Exception):
+                pending.future.set_exception(result)
+            else:
+                pending.future.set_result(result)
+
+    def _forget(self, inflight_key: Tuple[BatchKey, str], future: asyncio.Future) -> None:
+        """Drop a finished in-flight entry unless a newer call has already replaced it."""
+        if self._inflight.get(inflight_key) is future:
+            del self._inflight[inflight_key]
+
+    def stats(self) -> Dict:
+        """Snapshot of queue depths, batch sizes and wait times."""
+        dispatched = sum(size * count for size, count in self._batch_size_hist.items())
+        return {
+            "config": {
+                "max_batch_size": self.max_batch_size,
+                "max_batch_tokens": self.max_batch_tokens,
+                "max_wait_ms": self.max_wait_ms,
+            },
+            "queue_depth": {
+                ":".join(str(part) for part in key if part is not None): queue.qsize()
+                for key, queue in self._queues.items()
+            },
+            "submitted": self._submitted,
+            "coalesced": self._coalesced,
+            "batches": self._batches,
+            "failed_batches": self._failed_batches,
+            "avg_batch_size": round(dispatched / self._batches, 2) if self._batches else 0.0,
+            "batch_size_histogram": dict(sorted(self._batch_size_hist.items())),
+            "avg_wait_ms": round(self._total_wait_ms / dispatched, 2) if dispatched else 0.0,
+            "max_wait_ms_observed": round(self._max_wait_observed_ms, 2),
+        }
@@ -0,0 +1,168 @@
+"""Precomputed engine routing for CleanMultiEngineService.
+
+Resolving which engines can serve a language pair used to probe model
+directories with os.path.exists for every engine on every segment, and model
+lang tags were found by scanning language_pair_models. EngineRoutingTable does
+that work once — at startup and again on POST /api/debug/routing-table/rebuild
+after model directories change — and serves O(1) lookups keyed by the
+normalized pair ('ja' → 'jp').
+
+Each route records the engine type (gemini / direct / pivot), the local model
+keys involved, the lang tag for a direct model and, for pivots, the per-leg
+model, languages and tags.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EngineRoutingTable:
+    def __init__(self, multi_engine_service):
+        self.multi_engine_service = multi_engine_service
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Dict]] = {}
+        self._engines_by_pair: Dict[str, List[str]] = {}
+        self._leg_tags: Dict[tuple, Optional[str]] = {}
+        self.built_at: Optional[str] = None
+        self.rebuilds = 0
+        self.rebuild()
+
+    # ------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------
+
+    def rebuild(self, reason: str = "startup"):
+        """Recompute every (pair, engine) route from engine configs and on-disk models."""
+        service = self.multi_engine_service
+        pairs = set()
+        for config in service.engine_configs.values():
+            pairs.update(config.get('supported_pairs', []))
+            pairs.update(config.get('pivot_strategy', {}).get('applies_to', []))
+
+        routes: Dict[str, Dict[str, Dict]] = {}
+        engines_by_pair: Dict[str, List[str]] = {}
+        leg_tags: Dict[tuple, Optional[str]] = {}
+        path_cache: Dict[str, bool] = {}
+        for pair in sorted(pairs):
+            source_lang, target_lang = pair.split('-', 1)
+            pair_routes = {}
+            for engine_id, config in service.engine_configs.items():
+                route = self._build_route(engine_id, config, pair, source_lang, target_lang, path_cache)
+                if route:
+                    pair_routes[engine_id] = route
+                    for leg in (route['pivot'] or {}).get('legs', []):
+                        leg_tags[(leg['model_key'], leg['source_lang'])] = leg['lang_tag']
+            routes[pair] = pair_routes
+            engines_by_pair[pair] = [engine_id for engine_id, route in pair_routes.items() if route['available']]
+
+        with self._lock:
+            self._routes = routes
+            self._engines_by_pair = engines_by_pair
+            self._leg_tags = leg_tags
+            self.built_at = datetime.now().isoformat()
+            self.rebuilds += 1
+        logger.info(
+            f"Engine routing table rebuilt ({reason}): "
+            + ", ".join(f"{pair}={len(engines)}" for pair, engines in engines_by_pair.items())
+        )
+
+    def _build_route(self, engine_id: str, config: dict, pair: str, source_lang: str, target_lang: str,
+                     path_cache: Dict[str, bool]) -> Optional[Dict]:
+        service = self.multi_engine_service
+        if config.get('type') == 'gemini':
+            if pair not in config['supported_pairs']:
+                return None
+            return {'engine': engine_id, 'type': 'gemini', 'available': True, 'model_keys': [],
+                    'lang_tag': None, 'pivot': None, 'model_used': service._get_model_used(engine_id, source_lang, target_lang)}
+
+        if service._needs_pivot_translation(config, source_lang, target_lang):
+            strategy = config['pivot_strategy']
+            first_model, second_model = strategy['via_models']
+            pivot_lang = strategy['pivot_lang'].lower()
+            model_paths = service.translation_service.model_paths
+            available = all(key in model_paths and model_paths[key][0] is not None for key in (first_model, second_model))
+            legs = [
+                {'model_key': first_model, 'source_lang': source_lang, 'target_lang': pivot_lang,
+                 'lang_tag': service._pivot_leg_tag(first_model, source_lang)},
+                {'model_key': second_model, 'source_lang': pivot_lang, 'target_lang': target_lang,
+                 'lang_tag': service._pivot_leg_tag(second_model, pivot_lang)},
+            ]
+            return {'engine': engine_id, 'type': 'pivot', 'available': available,
+                    'model_keys': [first_model, second_model], 'lang_tag': None,
+                    'pivot': {'pivot_lang': pivot_lang, 'strategy': strategy, 'legs': legs},
+                    'model_used': service._get_model_used(engine_id, source_lang, target_lang)}
+
+        model_key = config.get('model_mapping', {}).get(pair)
+        if not model_key or pair not in config['supported_pairs']:
+            return None
+        return {'engine': engine_id, 'type': 'direct', 'available': self._model_on_disk(model_key, path_cache),
+                'model_keys': [model_key], 'lang_tag': self._direct_lang_tag(model_key, pair),
+                'pivot': None, 'model_used': model_key}
+
+    def _model_on_disk(self, model_key: str, path_cache: Dict[str, bool]) -> bool:
+        if model_key in path_cache:
+            return path_cache[model_key]
+        exists = False
+        model_paths = self.multi_engine_service.translation_service.model_paths
+        if model_key in model_paths:
+            raw_path = model_paths[model_key][0]
+            if raw_path:
+                if raw_path.startswith('./') or raw_path.startswith('/'):
+                    exists = os.path.exists(raw_path)
+                else:
+                    # Hub ID (e.g. "google/mt5-base") — check HuggingFace cache directory
+                    cache_dir_name = 'models--' + raw_path.replace('/', '--')
+                    exists = os.path.exists(os.path.join('./models', cache_dir_name))
+        path_cache[model_key] = exists
+        return exists
+
+    def _direct_lang_tag(self, model_key: str, pair: str) -> Optional[str]:
+        # Same lookup _resolve_direct_model has always done: UPPERCASE normalized pair
+        model_info_list = self.multi_engine_service.translation_service.language_pair_models.get(pair.upper(), [])
+        model_info = next((info for info in model_info_list if info[0] == model_key), None)
+        if model_info and len(model_info) == 3:
+            return model_info[2]
+        return None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def engines_for(self, pair: str) -> List[str]:
+        """Engines that can serve a normalized pair, in engine_configs order."""
+        return list(self._engines_by_pair.get(pair, []))
+
+    def route(self, engine_id: str, pair: str) -> Optional[Dict]:
+        """Route for (engine, normalized pair), or None if the engine does not cover the pair."""
+        return self._routes.get(pair, {}).get(engine_id)
+
+    def leg_tag(self, model_key: str, leg_source_lang: str) -> Optional[str]:
+        """Precomputed lang tag for one pivot leg (falls back to the scan for unplanned legs)."""
+        key = (model_key, leg_source_lang.lower())
+        if key in self._leg_tags:
+            return self._leg_tags[key]
+        return self.multi_engine_service._pivot_leg_tag(model_key, leg_source_lang)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "built_at": self.built_at,
+                "rebuilds": self.rebuilds,
+                "pairs": {
+                    pair: {
+                        "available_engines": self._engines_by_pair.get(pair, []),
+                        "routes": {
+                            engine_id: {k: v for k, v in route.items() if k != 'pivot'} | (
+                                {"pivot_legs": route['pivot']['legs']} if route['pivot'] else {}
+                            )
+                            for engine_id, route in pair_routes.items()
+                        },
+                    }
+                    for pair, pair_routes in self._routes.items()
+                },
+            }
@@ -0,0 +1,268 @@
+"""Optional out-of-process engine workers.
+
+By default every local model runs inside the API process on the single GPU
+executor thread, so tokenization, generate(), decoding and Japanese
+detokenization all share one interpreter (and its GIL) with the event loop.
+With ENGINE_WORKERS > 0, EngineWorkerPool starts that many spawned worker
+processes. Each worker builds its own TranslationService and owns the models
+routed to it; the API process only routes batches to them over
+multiprocessing queues and keeps the translation cache, scheduler and DB work.
+
+A model is served by the worker ENGINE_WORKER_ASSIGNMENT maps it to, or by a
+stable hash of its key. Each worker limits torch to ENGINE_WORKER_THREADS
+threads (default: cores / workers) so big CPU nodes are used without
+oversubscription. A worker that dies fails its in-flight requests and is
+restarted.
+"""
+
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# TranslationService methods a worker will run on request
+WORKER_METHODS = ("translate_batch", "translate_multi_target", "unload_all_models")
+
+
+def _worker_main(worker_id: int, torch_threads: int, requests, responses):
+    """Worker process loop: run TranslationService calls and post results back."""
+    import torch
+
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+    # Imported in the child: the spawned interpreter owns its models and residency budget
+    from app.services.translation_service import translation_service
+
+    def resident_keys() -> List[str]:
+        return list(translation_service.models) + list(translation_service.causal_models)
+
+    responses.put((None, worker_id, True, os.getpid(), []))
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        request_id, method, args, kwargs = message
+        try:
+            if method not in WORKER_METHODS:
+                raise ValueError(f"Method '{method}' is not served by engine workers")
+            result = _portable(getattr(translation_service, method)(*args, **kwargs))
+            responses.put((request_id, worker_id, True, result, resident_keys()))
+        except Exception as e:
+            responses.put((request_id, worker_id, False, f"{type(e).__name__}: {e}", resident_keys()))
+
+
+def _portable(result):
+    """Replace per-segment exceptions in a result with RuntimeErrors, which always pickle."""
+    if isinstance(result, dict):
+        return {key: _portable(value) for key, value in result.items()}
+    if isinstance(result, list):
+        return [RuntimeError(f"{type(item).__name__}: {item}") if isinstance(item, Exception) else item for item in result]
+    return result
+
+
+class EngineWorkerPool:
+    def __init__(self, worker_count: Optional[int] = None, assignment: Optional[Dict[str, int]] = None):
+        self.worker_count = worker_count if worker_count is not None else settings.ENGINE_WORKERS
+        self.assignment = dict(settings.ENGINE_WORKER_ASSIGNMENT if assignment is None else assignment)
+        self.torch_threads = settings.ENGINE_WORKER_THREADS or max(1, (os.cpu_count() or 1) // max(self.worker_count, 1))
+        # One dispatch thread per worker so batches for different workers run in parallel
+        self.dispatch_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(self.worker_count, 1), thread_name_prefix="engine-dispatch"
+        )
+
+        # spawn, not fork: forked children would inherit torch/CUDA state from the API process
+        self._ctx = multiprocessing.get_context("spawn")
+        self._responses = self._ctx.Queue()
+        self._workers: List[Dict[str, Any]] = []
+        self._pending: Dict[int, tuple] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        for worker_id in range(self.worker_count):
+            self._workers.append({"requests": None, "process": None, "pid": None, "ready": False,
+                                  "started_at": None, "resident": [], "calls": 0})
+            self._spawn(worker_id)
+        self._reader = threading.Thread(target=self._read_responses, name="engine-worker-reader", daemon=True)
+        self._reader.start()
+        logger.info(f"Started {self.worker_count} engine worker process(es), {self.torch_threads} torch thread(s) each.")
+
+    def _spawn(self, worker_id: int):
+        requests = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.torch_threads, requests, self._responses),
+            name=f"engine-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[worker_id].update(
+            requests=requests, process=process, pid=process.pid, ready=False,
+            started_at=datetime.now().isoformat(), resident=[],
+        )
+
+    def stop(self):
+        self._stopping = True
+        for worker in self._workers:
+            try:
+                worker["requests"].put(None)
+            except Exception:
+                pass
+        for worker in self._workers:
+            worker["process"].join(timeout=5)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+        self._fail_pending(lambda _worker_id: True, "Engine worker pool stopped")
+        self.dispatch_executor.shutdown(wait=False)
+        logger.info("Engine worker pool stopped.")
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def worker_for(self, model_key: str) -> int:
+        """Worker index that owns model_key (configured assignment, else stable hash)."""
+        if model_key in self.assignment:
+            return self.assignment[model_key] % self.worker_count
+        return zlib.crc32(model_key.encode("utf-8")) % self.worker_count
+
+    def call(self, model_key: str, method: str, *args, **kwargs) -> concurrent.futures.Future:
+        """Send one TranslationService call to the worker owning model_key."""
+        return self._send(self.worker_for(model_key), method, args, kwargs)
+
+    def _send(self, worker_id: int, method: str, args: tuple, kwargs: dict) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = (future, worker_id)
+            self._workers[worker_id]["calls"] += 1
+        self._workers[worker_id]["requests"].put((request_id, method, args, kwargs))
+        return future
+
+    def translate_batch(self, texts: List[str], model_key: str, **kwargs) -> List[str]:
+        """Blocking translate_batch on the owning worker (run it on dispatch_executor)."""
+        return self._wait(self.call(model_key, "translate_batch", texts, model_key, **kwargs))
+
+    def translate_multi_target(self, texts: List[str], model_key: str, *args, **kwargs) -> Dict[str, List[str]]:
+        return self._wait(self.call(model_key, "translate_multi_target", texts, model_key, *args, **kwargs))
+
+    def _wait(self, future: concurrent.futures.Future):
+        try:
+            return future.result(timeout=settings.ENGINE_WORKER_TIMEOUT_S)
+        except concurrent.futures.TimeoutError:
+            # Nobody waits for it any more; a late response is dropped by _read_responses
+            with self._lock:
+                request_id = next((rid for rid, (pending, _) in self._pending.items() if pending is future), None)
+                if request_id is not None:
+                    del self._pending[request_id]
+            self.failed += 1
+            raise
+
+    def unload_all_models(self) -> List[concurrent.futures.Future]:
+        """Ask every worker to drop its models; returns without waiting for them."""
+        return [self._send(worker_id, "unload_all_models", (), {}) for worker_id in range(self.worker_count)]
+
+    def is_resident(self, model_key: str) -> bool:
+        worker = self._workers[self.worker_for(model_key)]
+        return any(key == model_key or key.startswith(f"{model_key}@") for key in worker["resident"])
+
+    # ------------------------------------------------------------------
+    # Responses / supervision
+    # ------------------------------------------------------------------
+
+    def _read_responses(self):
+        while not self._stopping:
+            try:
+                message = self._responses.get(timeout=1.0)
+            except queue.Empty:
+                message = None
+            except (EOFError, OSError):
+                break
+            if message is not None:
+                self._handle_response(*message)
+            # Every pass, not just idle ones: a busy pool must still notice a dead worker
+            self._check_workers()
+
+    def _handle_response(self, request_id, worker_id: int, ok: bool, payload, resident: List[str]):
+        worker = self._workers[worker_id]
+        if request_id is None:
+            worker.update(ready=True, pid=payload)
+            logger.info(f"Engine worker {worker_id} ready (pid {payload}).")
+            return
+        worker["resident"] = resident
+        with self._lock:
+            future, _ = self._pending.pop(request_id, (None, None))
+        if future is None or future.done():
+            return
+        if ok:
+            self.completed += 1
+            future.set_result(payload)
+        else:
+            self.failed += 1
+            future.set_exception(RuntimeError(f"Engine worker {worker_id}: {payload}"))
+
+    def _check_workers(self):
+        for worker_id, worker in enumerate(self._workers):
+            process = worker["process"]
+            if process is None or process.is_alive() or self._stopping:
+                continue
+            logger.error(f"Engine worker {worker_id} exited (code {process.exitcode}); restarting.")
+            self._fail_pending(lambda owner: owner == worker_id, f"Engine worker {worker_id} exited")
+            self.restarts += 1
+            self._spawn(worker_id)
+
+    def _fail_pending(self, owned_by, reason: str):
+        with self._lock:
+            failed = [rid for rid, (_, owner) in self._pending.items() if owned_by(owner)]
+            futures = [self._pending.pop(rid)[0] for rid in failed]
+        for future in futures:
+            if not future.done():
+                self.failed += 1
+                future.set_exception(RuntimeError(reason))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            in_flight: Dict[int, int] = {}
+            for _, owner in self._pending.values():
+                in_flight[owner] = in_flight.get(owner, 0) + 1
+        return {
+            "workers": [
+                {
+                    "worker": worker_id,
+                    "pid": worker["pid"],
+                    "alive": worker["process"] is not None and worker["process"].is_alive(),
+                    "ready": worker["ready"],
+                    "started_at": worker["started_at"],
+                    "resident_models": worker["resident"],
+                    "assigned_models": sorted(key for key, index in self.assignment.items()
+                                              if index % self.worker_count == worker_id),
+                    "calls": worker["calls"],
+                    "in_flight": in_flight.get(worker_id, 0),
+                }
+                for worker_id, worker in enumerate(self._workers)
+            ],
+            "torch_threads_per_worker": self.torch_threads,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+        }
@@ -0,0 +1,323 @@
+"""Shared rate limiter for every Gemini caller.
+
+Transcreation, the LLM judge, the refinement agent and Gemini Vision OCR draw
+on the same per-model quota: requests per minute, requests per day and tokens
+per minute. Each used to pace itself with a fixed sleep before every call
+(4-5 s) and parse 429s on its own, which added latency even far under quota
+and did not coordinate callers with each other.
+
+GeminiRateLimiter keeps token buckets per model. The RPM and TPM buckets
+refill continuously and RPD counts requests per UTC day, so acquire() waits
+only as long as the quota requires. Batch callers (judge sweeps) leave
+GEMINI_BATCH_RESERVE of the RPM bucket to interactive callers and yield while
+one is waiting. A 429 empties the model's RPM bucket, pauses the model for the
+server's suggested retry delay (else exponential backoff) and halves its
+refill rate; each success restores a tenth of it.
+
+With GEMINI_RATE_LIMIT_PATH set, bucket state lives in a SQLite file shared
+by every process on the host instead of in memory.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.utils.batching import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Longest single sleep in acquire(); bucket state is re-read after it, so a 429
+# reported by another caller (or process) is picked up promptly
+_MAX_SLEEP_S = 5.0
+# Poll interval for batch callers yielding to a waiting interactive caller
+_YIELD_S = 0.25
+# Adaptive refill rate after 429s: halved per 429, +_RECOVERY_STEP per success
+_MIN_RATE_SCALE = 0.1
+_RECOVERY_STEP = 0.1
+
+_RETRY_DELAY_PATTERNS = (
+    re.compile(r"retry in (\d+(?:\.\d+)?)s", re.IGNORECASE),
+    re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s"),
+)
+
+
+class GeminiQuotaExhausted(RuntimeError):
+    """The model's requests-per-day quota is used up until the next UTC day."""
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    text = str(exc)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+def retry_delay(exc: Exception) -> Optional[float]:
+    """Retry delay suggested in a 429 error message, if any."""
+    text = str(exc)
+    for pattern in _RETRY_DELAY_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def estimate_request_tokens(*texts: Optional[str], max_output_tokens: int = 0) -> int:
+    """Rough TPM cost of one request: prompt estimate plus the output cap."""
+    return sum(estimate_tokens(text) for text in texts if text) + max_output_tokens
+
+
+def _utc_day(now: float) -> str:
+    return datetime.fromtimestamp(now, tz=timezone.utc).date().isoformat()
+
+
+def _fresh_state(limits: Dict[str, int], now: float) -> Dict[str, Any]:
+    return {
+        "rpm_level": float(limits["rpm"]),
+        "tpm_level": float(limits["tpm"]),
+        "updated": now,
+        "day": _utc_day(now),
+        "day_count": 0,
+        "backoff_until": 0.0,
+        "rate_scale": 1.0,
+        "strikes": 0,
+    }
+
+
+def _refill(state: Dict[str, Any], limits: Dict[str, int], now: float):
+    elapsed = max(0.0, now - state["updated"])
+    state["rpm_level"] = min(limits["rpm"], state["rpm_level"] + elapsed * limits["rpm"] * state["rate_scale"] / 60.0)
+    state["tpm_level"] = min(limits["tpm"], state["tpm_level"] + elapsed * limits["tpm"] / 60.0)
+    state["updated"] = now
+    today = _utc_day(now)
+    if state["day"] != today:
+        state["day"] = today
+        state["day_count"] = 0
+
+
+def _try_take(state: Dict[str, Any], limits: Dict[str, int], now: float, tokens: int, reserve: float) -> float:
+    """Take one request (and tokens) from the buckets; 0.0 if taken, else seconds to wait."""
+    _refill(state, limits, now)
+    if state["backoff_until"] > now:
+        return state["backoff_until"] - now
+    if limits["rpd"] and state["day_count"] >= limits["rpd"]:
+        raise GeminiQuotaExhausted(f"Daily Gemini quota of {limits['rpd']} request(s) used up")
+
+    waits = []
+    needed = 1.0 + reserve * limits["rpm"]
+    if state["rpm_level"] < needed:
+        waits.append((needed - state["rpm_level"]) * 60.0 / (limits["rpm"] * state["rate_scale"]))
+    tokens = min(tokens, limits["tpm"])
+    if tokens and state["tpm_level"] < tokens:
+        waits.append((tokens - state["tpm_level"]) * 60.0 / limits["tpm"])
+    if waits:
+        return max(waits)
+
+    state["rpm_level"] -= 1.0
+    state["tpm_level"] -= tokens
+    state["day_count"] += 1
+    return 0.0
+
+
+class _MemoryStore:
+    """Bucket state for this process only."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, model: str, limits: Dict[str, int], fn: Callable[[Dict[str, Any]], Any]):
+        with self._lock:
+            state = self._states.get(model)
+            if state is None:
+                state = self._states[model] = _fresh_state(limits, time.time())
+            return fn(state)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {model: dict(state) for model, state in self._states.items()}
+
+
+class _SQLiteStore:
+    """Bucket state shared across processes through one SQLite row per model."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode so update() controls the transaction (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS gemini_quota (model TEXT PRIMARY KEY, state TEXT NOT NULL)")
+
+    def update(self, model: str, limits: Dict[str, int], fn: Callable[[Dict[str, Any]], Any]):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT state FROM gemini_quota WHERE model = ?", (model,)).fetchone()
+                state = json.loads(row[0]) if row else _fresh_state(limits, time.time())
+                result = fn(state)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO gemini_quota (model, state) VALUES (?, ?)", (model, json.dumps(state))
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return result
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute("SELECT model, state FROM gemini_quota").fetchall()
+        return {model: json.loads(state) for model, state in rows}
+
+
+class GeminiRateLimiter:
+    def __init__(self, shared_path: Optional[str] = None):
+        path = settings.GEMINI_RATE_LIMIT_PATH if shared_path is None else shared_path
+        self.shared_path: Optional[str] = None
+        self._store = _MemoryStore()
+        if path:
+            try:
+                self._store = _SQLiteStore(path)
+                self.shared_path = path
+                logger.info(f"Gemini rate limiter: sharing quota state via {path}")
+            except Exception as e:
+                logger.error(f"Gemini rate limiter: could not open {path} ({e}); limiting this process only.")
+
+        self._waiting: Counter = Counter()
+        self._counters: Dict[str, Counter] = defaultdict(Counter)
+
+    def limits(self, model: str) -> Dict[str, int]:
+        limits = {"rpm": settings.GEMINI_RPM, "rpd": settings.GEMINI_RPD, "tpm": settings.GEMINI_TPM}
+        limits.update(settings.GEMINI_RATE_LIMITS.get(model, {}))
+        return limits
+
+    async def acquire(self, model: str, tokens: int = 0, priority: str = INTERACTIVE):
+        """Wait until the model's buckets allow one more request of ~tokens tokens."""
+        limits = self.limits(model)
+        reserve = settings.GEMINI_BATCH_RESERVE if priority == BATCH else 0.0
+        started = time.monotonic()
+        self._waiting[(model, priority)] += 1
+        try:
+            while True:
+                if priority == BATCH and self._waiting[(model, INTERACTIVE)]:
+                    delay = _YIELD_S
+                else:
+                    delay = self._store.update(
+                        model, limits, lambda state: _try_take(state, limits, time.time(), tokens, reserve)
+                    )
+                    if delay <= 0:
+                        break
+                await asyncio.sleep(min(delay, _MAX_SLEEP_S))
+        finally:
+            self._waiting[(model, priority)] -= 1
+
+        waited_ms = (time.monotonic() - started) * 1000
+        counters = self._counters[model]
+        counters[f"requests_{priority}"] += 1
+        counters["estimated_tokens"] += tokens
+        if waited_ms >= 1:
+            counters["throttled"] += 1
+            counters["wait_ms"] += int(waited_ms)
+
+    def report_429(self, model: str, exc: Exception) -> float:
+        """Back the model off after a 429; returns the pause in seconds."""
+        suggested = retry_delay(exc)
+
+        def apply(state: Dict[str, Any]) -> float:
+            now = time.time()
+            _refill(state, self.limits(model), now)
+            state["strikes"] += 1
+            pause = suggested if suggested is not None else min(
+                settings.GEMINI_BACKOFF_MAX_S, settings.GEMINI_BACKOFF_BASE_S * 2 ** (state["strikes"] - 1)
+            )
+            state["backoff_until"] = max(state["backoff_until"], now + pause)
+            state["rpm_level"] = 0.0
+            state["rate_scale"] = max(_MIN_RATE_SCALE, state["rate_scale"] / 2)
+            return pause
+
+        self._counters[model]["rate_limited"] += 1
+        return self._store.update(model, self.limits(model), apply)
+
+    def report_success(self, model: str, used_tokens: Optional[int] = None, estimated_tokens: int = 0):
+        """Recover the refill rate and charge any tokens used beyond the estimate."""
+
+        def apply(state: Dict[str, Any]):
+            state["strikes"] = 0
+            state["rate_scale"] = min(1.0, state["rate_scale"] + _RECOVERY_STEP)
+            if used_tokens is not None and used_tokens > estimated_tokens:
+                state["tpm_level"] -= used_tokens - estimated_tokens
+
+        if used_tokens is not None:
+            self._counters[model]["used_tokens"] += used_tokens
+        self._store.update(model, self.limits(model), apply)
+
+    async def run(
+        self,
+        model: str,
+        request: Callable[[], Awaitable[Any]],
+        tokens: int = 0,
+        priority: str = INTERACTIVE,
+        max_retries: Optional[int] = None,
+        label: str = "",
+    ) -> Any:
+        """Rate-limited request(): acquire, call, and retry 429s after the adaptive backoff."""
+        attempts = max_retries or settings.GEMINI_MAX_RETRIES
+        for attempt in range(attempts):
+            await self.acquire(model, tokens, priority)
+            try:
+                response = await request()
+            except Exception as exc:
+                if not is_rate_limit_error(exc):
+                    raise
+                pause = self.report_429(model, exc)
+                logger.warning(
+                    f"Gemini 429 for {model}{f' ({label})' if label else ''} on attempt "
+                    f"{attempt + 1}/{attempts}; backing off {pause:.1f}s"
+                )
+                if attempt == attempts - 1:
+                    raise
+                continue
+            usage = getattr(response, "usage_metadata", None)
+            self.report_success(model, getattr(usage, "total_token_count", None), tokens)
+            return response
+
+    def stats(self) -> Dict:
+        now = time.time()
+        models = {}
+        snapshot = self._store.snapshot()
+        for model in sorted(set(snapshot) | set(self._counters)):
+            limits = self.limits(model)
+            state = snapshot.get(model) or _fresh_state(limits, now)
+            _refill(state, limits, now)
+            models[model] = {
+                "limits": limits,
+                "requests_today": state["day_count"],
+                "rpd_remaining": max(0, limits["rpd"] - state["day_count"]) if limits["rpd"] else None,
+                "rpm_available": round(state["rpm_level"], 2),
+                "tpm_available": int(state["tpm_level"]),
+                "backoff_remaining_s": round(max(0.0, state["backoff_until"] - now), 1),
+                "rate_scale": round(state["rate_scale"], 2),
+                "waiting": {
+                    priority: self._waiting[(model, priority)] for priority in (INTERACTIVE, BATCH)
+                },
+                **dict(self._counters.get(model, {})),
+            }
+        return {
+            "shared_path": self.shared_path,
+            "batch_reserve": settings.GEMINI_BATCH_RESERVE,
+            "models": models,
+        }
+
+
+gemini_rate_limiter = GeminiRateLimiter()
@@ -6,6 +6,7 @@ from datetime import datetime
 import logging
 
 from app.db.base import prisma
+from app.services.gemini_rate_limiter import gemini_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +46,10 @@ class HealthService:
         if self.multi_engine_service_instance:
             try:
                 multi_engine_ready = self.multi_engine_service_instance.is_initialized
-                available_engines_list = list(self.multi_engine_service_instance.engine_configs.keys())
+                routing = self.multi_engine_service_instance.routing.snapshot()
+                available_engines_list = list(dict.fromkeys(
+                    engine_id for entry in routing["pairs"].values() for engine_id in entry["available_engines"]
+                ))
             except Exception as e:
                 logger.warning(f"Multi-engine service check failed: {e}")
                 multi_engine_ready = False
@@ -68,5 +72,6 @@ class HealthService:
             "cometkiwi_available": cometkiwi_ready,
             "translation_service_available": True, 
             "local_engines_available": multi_engine_ready,
-            "available_engines": available_engines_list
+            "available_engines": available_engines_list,
+            "gemini_quota": gemini_rate_limiter.stats(),
         }
\ No newline at end of file
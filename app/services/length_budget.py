@@ -0,0 +1,267 @@
+"""Adaptive output-length budgets for local translation models.
+
+generate() used to run with a fixed max_length / max_new_tokens of 512, so a
+degenerate repetition loop could emit hundreds of tokens before stopping. The
+budget table learns output/input token ratios per (model key, source, target)
+from stored history (TranslationString.engineResults and ModelOutput rows) and
+from every batch the service translates, and caps each generate() call at
+
+    longest input in the batch x high-quantile ratio x LENGTH_BUDGET_MARGIN
+    + LENGTH_BUDGET_MIN_TOKENS
+
+(never above GENERATION_MAX_TOKENS). RepetitionLoopCriteria stops rows whose
+tail is the same short n-gram repeated REPETITION_MAX_REPEATS times.
+
+History rows are stored as raw text and converted to token ratios with the
+model's own tokenizer the first time a budget is needed for that model.
+"""
+
+import logging
+import math
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Collection, Deque, Dict, List, Optional, Sequence, Tuple
+
+import torch
+from transformers import StoppingCriteria
+
+from app.core.config import settings
+from app.utils.lang_pair import normalize_lang_code
+
+logger = logging.getLogger(__name__)
+
+BudgetKey = Tuple[str, str, str]
+
+# Samples kept per key; old observations age out so ratios follow model swaps
+_MAX_SAMPLES = 500
+
+
+def _budget_key(model_key: str, source_lang: Optional[str], target_lang: Optional[str]) -> BudgetKey:
+    return (
+        model_key,
+        normalize_lang_code(source_lang) if source_lang else "",
+        normalize_lang_code(target_lang) if target_lang else "",
+    )
+
+
+class RepetitionLoopCriteria(StoppingCriteria):
+    """Stop rows whose generated tail is one short n-gram repeated max_repeats times.
+
+    Checks every period from 1 to ngram_size tokens. Rows that already ended
+    (tail is pure padding) are ignored. prompt_length excludes the prompt for
+    decoder-only models; seq2seq decoder ids start at 0.
+    """
+
+    def __init__(self, ngram_size: int, max_repeats: int, pad_token_id: Optional[int], prompt_length: int = 0):
+        self.ngram_size = ngram_size
+        self.max_repeats = max_repeats
+        self.pad_token_id = pad_token_id
+        self.prompt_length = prompt_length
+        self.aborted: Optional[torch.Tensor] = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        generated = input_ids[:, self.prompt_length:]
+        batch = generated.shape[0]
+        looped = torch.zeros(batch, dtype=torch.bool, device=input_ids.device)
+        for period in range(1, self.ngram_size + 1):
+            span = period * self.max_repeats
+            if generated.shape[1] < span:
+                break
+            tail = generated[:, -span:].reshape(batch, self.max_repeats, period)
+            repeated = (tail == tail[:, -1:, :]).all(dim=2).all(dim=1)
+            if self.pad_token_id is not None:
+                repeated &= (tail[:, -1, :] != self.pad_token_id).any(dim=1)
+            looped |= repeated
+        self.aborted = looped if self.aborted is None else (self.aborted | looped)
+        return looped
+
+    def aborted_rows(self) -> List[int]:
+        if self.aborted is None:
+            return []
+        return [i for i, flag in enumerate(self.aborted.tolist()) if flag]
+
+
+class LengthBudgetTable:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ratios: Dict[BudgetKey, Deque[float]] = {}
+        # Raw (source, output) history awaiting conversion with the model's tokenizer
+        self._pending: Dict[BudgetKey, List[Tuple[str, str]]] = {}
+        self._budgets_issued: Counter = Counter()
+        self._budget_tokens: Counter = Counter()
+        self._last_budget: Dict[BudgetKey, int] = {}
+        self._aborts: Counter = Counter()
+        self.history_rows = 0
+        self.history_loaded_at: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Learning
+    # ------------------------------------------------------------------
+
+    def add_history(self, model_key: str, source_lang: str, target_lang: str, source_text: str, output_text: str):
+        """Queue one stored (source, output) pair; tokenized lazily by budget()."""
+        if not source_text or not output_text:
+            return
+        key = _budget_key(model_key, source_lang, target_lang)
+        with self._lock:
+            pending = self._pending.setdefault(key, [])
+            if len(pending) < _MAX_SAMPLES:
+                pending.append((source_text, output_text))
+                self.history_rows += 1
+
+    def observe(self, model_key: str, source_lang: str, target_lang: str, input_tokens: int, output_tokens: int):
+        """Record the token ratio of one finished (non-aborted) generation."""
+        if input_tokens <= 0 or output_tokens <= 0:
+            return
+        key = _budget_key(model_key, source_lang, target_lang)
+        with self._lock:
+            self._samples(key).append(output_tokens / input_tokens)
+
+    def _samples(self, key: BudgetKey) -> Deque[float]:
+        samples = self._ratios.get(key)
+        if samples is None:
+            samples = self._ratios[key] = deque(maxlen=_MAX_SAMPLES)
+        return samples
+
+    def _absorb_pending(self, key: BudgetKey, tokenizer):
+        pending = self._pending.pop(key, None)
+        if not pending:
+            return
+        samples = self._samples(key)
+        for source_text, output_text in pending:
+            try:
+                source_tokens = len(tokenizer(source_text)["input_ids"])
+                output_tokens = len(tokenizer(text_target=output_text)["input_ids"])
+            except Exception:
+                continue
+            if source_tokens and output_tokens:
+                samples.append(output_tokens / source_tokens)
+        logger.info(f"Length budget: learned {len(samples)} ratio(s) for {':'.join(key)} from history.")
+
+    async def load_history(self, prisma, model_keys: Collection[str], limit: Optional[int] = None):
+        """Seed ratios from stored multi-engine results and model outputs.
+
+        Only rows whose model is one of model_keys are kept; pivot chains
+        ("A + B (Pivot)") and Gemini results have no local budget to seed.
+        """
+        limit = limit or settings.LENGTH_BUDGET_HISTORY_LIMIT
+        rows = 0
+        try:
+            strings = await prisma.translationstring.find_many(
+                take=limit,
+                order={"createdAt": "desc"},
+                include={"translationRequest": True},
+            )
+            for string in strings:
+                request = string.translationRequest
+                if request is None or not isinstance(string.engineResults, list):
+                    continue
+                for result in string.engineResults:
+                    if (isinstance(result, dict) and result.get("model") in model_keys
+                            and result.get("text") and not result.get("error")):
+                        self.add_history(result["model"], request.sourceLanguage, string.targetLanguage,
+                                         string.sourceText, result["text"])
+                        rows += 1
+
+            outputs = await prisma.modeloutput.find_many(
+                take=limit,
+                order={"createdAt": "desc"},
+                include={"translationString": {"include": {"translationRequest": True}}},
+            )
+            for output in outputs:
+                string = output.translationString
+                if (output.isPivot or output.modelName not in model_keys
+                        or string is None or string.translationRequest is None):
+                    continue
+                self.add_history(output.modelName, string.translationRequest.sourceLanguage,
+                                 string.targetLanguage, string.sourceText, output.outputText)
+                rows += 1
+        except Exception as e:
+            logger.warning(f"Length budget: could not load history ({e}); using default ratios.")
+            return
+        self.history_loaded_at = datetime.now().isoformat()
+        logger.info(f"Length budget: queued {rows} historical output(s) for ratio learning.")
+
+    # ------------------------------------------------------------------
+    # Budgets
+    # ------------------------------------------------------------------
+
+    def ratio(self, model_key: str, source_lang: str, target_lang: str, tokenizer=None) -> float:
+        """High-quantile output/input ratio for the key, or LENGTH_BUDGET_DEFAULT_RATIO."""
+        key = _budget_key(model_key, source_lang, target_lang)
+        with self._lock:
+            if tokenizer is not None:
+                self._absorb_pending(key, tokenizer)
+            samples = sorted(self._ratios.get(key, ()))
+        if len(samples) < settings.LENGTH_BUDGET_MIN_SAMPLES:
+            return settings.LENGTH_BUDGET_DEFAULT_RATIO
+        return samples[min(len(samples) - 1, int(len(samples) * settings.LENGTH_BUDGET_QUANTILE))]
+
+    def budget(self, model_key: str, source_lang: str, target_lang: str, input_lengths: Sequence[int],
+               tokenizer=None) -> int:
+        """max_new_tokens for one generate() call over inputs of the given token lengths."""
+        cap = settings.GENERATION_MAX_TOKENS
+        if not settings.LENGTH_BUDGET_ENABLED or not input_lengths:
+            return cap
+        ratio = self.ratio(model_key, source_lang, target_lang, tokenizer)
+        tokens = math.ceil(max(input_lengths) * ratio * settings.LENGTH_BUDGET_MARGIN) + settings.LENGTH_BUDGET_MIN_TOKENS
+        tokens = min(cap, tokens)
+        key = _budget_key(model_key, source_lang, target_lang)
+        with self._lock:
+            self._budgets_issued[key] += 1
+            self._budget_tokens[key] += tokens
+            self._last_budget[key] = tokens
+        return tokens
+
+    def stopping_criteria(self, pad_token_id: Optional[int], prompt_length: int = 0) -> Optional[RepetitionLoopCriteria]:
+        if settings.REPETITION_MAX_REPEATS <= 0:
+            return None
+        return RepetitionLoopCriteria(
+            settings.REPETITION_NGRAM_SIZE, settings.REPETITION_MAX_REPEATS, pad_token_id, prompt_length
+        )
+
+    def record_aborts(self, model_key: str, source_lang: str, target_lang: str, count: int):
+        if count:
+            key = _budget_key(model_key, source_lang, target_lang)
+            with self._lock:
+                self._aborts[key] += count
+            logger.warning(f"Aborted {count} repetition loop(s) in {model_key} ({source_lang}->{target_lang}).")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            keys = set(self._ratios) | set(self._pending) | set(self._budgets_issued) | set(self._aborts)
+            per_key = {}
+            for key in sorted(keys):
+                samples = sorted(self._ratios.get(key, ()))
+                issued = self._budgets_issued.get(key, 0)
+                per_key[":".join(part for part in key if part)] = {
+                    "samples": len(samples),
+                    "pending_history": len(self._pending.get(key, ())),
+                    "median_ratio": round(samples[len(samples) // 2], 3) if samples else None,
+                    "budget_ratio": round(samples[min(len(samples) - 1, int(len(samples) * settings.LENGTH_BUDGET_QUANTILE))], 3)
+                    if len(samples) >= settings.LENGTH_BUDGET_MIN_SAMPLES else None,
+                    "budgets_issued": issued,
+                    "avg_budget_tokens": round(self._budget_tokens[key] / issued, 1) if issued else None,
+                    "last_budget_tokens": self._last_budget.get(key),
+                    "repetition_aborts": self._aborts.get(key, 0),
+                }
+            return {
+                "config": {
+                    "enabled": settings.LENGTH_BUDGET_ENABLED,
+                    "margin": settings.LENGTH_BUDGET_MARGIN,
+                    "min_tokens": settings.LENGTH_BUDGET_MIN_TOKENS,
+                    "max_tokens": settings.GENERATION_MAX_TOKENS,
+                    "quantile": settings.LENGTH_BUDGET_QUANTILE,
+                    "default_ratio": settings.LENGTH_BUDGET_DEFAULT_RATIO,
+                    "repetition_ngram_size": settings.REPETITION_NGRAM_SIZE,
+                    "repetition_max_repeats": settings.REPETITION_MAX_REPEATS,
+                },
+                "history_rows": self.history_rows,
+                "history_loaded_at": self.history_loaded_at,
+                "total_repetition_aborts": sum(self._aborts.values()),
+                "keys": per_key,
+            }
+
+
+length_budgets = LengthBudgetTable()
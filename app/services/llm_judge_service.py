@@ -23,10 +23,13 @@ from typing import Optional
 from google import genai
 from google.genai import types
 
+from app.services.gemini_rate_limiter import INTERACTIVE, estimate_request_tokens, gemini_rate_limiter
+
 logger = logging.getLogger(__name__)
 
-# gemini-3.1-flash-lite: 15 RPM, 500 RPD on free tier
+# gemini-3.1-flash-lite: 15 RPM, 500 RPD on free tier (see GEMINI_RPM / GEMINI_RPD)
 JUDGE_MODEL = "gemini-3.1-flash-lite"
+_MAX_OUTPUT_TOKENS = 256
 
 # Language-pair-specific evaluation guidance injected when the pair involves
 # a low-resource language where automatic metrics are known to be unreliable.
@@ -125,8 +128,9 @@ class LLMJudgeService:
         target_lang: str,
         reference: Optional[str] = None,
         max_retries: int = 3,
+        priority: str = INTERACTIVE,
     ) -> dict:
-        """Call Gemini to score one hypothesis. Retries on 429 with backoff."""
+        """Call Gemini to score one hypothesis. 429s are retried by the shared rate limiter."""
         if not self._client:
             raise RuntimeError("LLM judge not available — check GEMINI_API_KEY.")
 
@@ -143,41 +147,13 @@ class LLMJudgeService:
             low_resource_note=_build_low_resource_note(source_lang, target_lang),
         )
 
-        last_exc: Exception = RuntimeError("No attempts made")
-        for attempt in range(max_retries):
-            try:
-                response = await asyncio.to_thread(
-                    self._client.models.generate_content,
-                    model=JUDGE_MODEL,
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        temperature=0.1,
-                        max_output_tokens=256,
-                    ),
-                )
-                text = response.text.strip()
-                text = re.sub(r"^```(?:json)?\s*", "", text)
-                text = re.sub(r"\s*```$", "", text)
-                parsed = json.loads(text)
-                return {
-                    "adequacy": float(parsed["adequacy"]),
-                    "fluency": float(parsed["fluency"]),
-                    "confidence": float(parsed["confidence"]),
-                    "rationale": parsed.get("rationale", ""),
-                }
-            except Exception as exc:
-                last_exc = exc
-                exc_str = str(exc)
-                if "429" in exc_str or "RESOURCE_EXHAUSTED" in exc_str:
-                    # Parse suggested retryDelay from the error message if present
-                    delay_match = re.search(r"retry in (\d+(?:\.\d+)?)s", exc_str)
-                    wait = float(delay_match.group(1)) if delay_match else (30 * (attempt + 1))
-                    logger.warning(f"Gemini 429 on attempt {attempt + 1}/{max_retries} — waiting {wait:.0f}s")
-                    await asyncio.sleep(wait)
-                else:
-                    raise
-
-        raise last_exc
+        parsed = await self._generate_json(prompt, priority, max_retries, "judge")
+        return {
+            "adequacy": float(parsed["adequacy"]),
+            "fluency": float(parsed["fluency"]),
+            "confidence": float(parsed["confidence"]),
+            "rationale": parsed.get("rationale", ""),
+        }
 
     def compute_disagreement(self, comet_score: Optional[float], adequacy: float) -> Optional[float]:
         return _compute_comet_disagreement(comet_score, adequacy)
@@ -190,6 +166,7 @@ class LLMJudgeService:
         target_lang: str,
         style_guide,
         max_retries: int = 3,
+        priority: str = INTERACTIVE,
     ) -> dict:
         """Score a translation against a StyleGuide's constraint set.
 
@@ -229,40 +206,40 @@ Also flag REQUIRED_TERMS_HIT (true if all required terms appear) and FORBIDDEN_T
 Respond with valid JSON only, no markdown fences:
 {{"constraint_score": <float 0-5>, "required_terms_hit": <bool>, "forbidden_terms_found": <bool>, "rationale": "<2-3 sentences>"}}"""
 
-        last_exc: Exception = RuntimeError("No attempts made")
-        for attempt in range(max_retries):
-            try:
-                response = await asyncio.to_thread(
-                    self._client.models.generate_content,
-                    model=JUDGE_MODEL,
-                    contents=prompt,
-                    config=types.GenerateContentConfig(
-                        temperature=0.1,
-                        max_output_tokens=256,
-                    ),
-                )
-                text = response.text.strip()
-                text = re.sub(r"^```(?:json)?\s*", "", text)
-                text = re.sub(r"\s*```$", "", text)
-                parsed = json.loads(text)
-                return {
-                    "constraint_score": float(parsed["constraint_score"]),
-                    "required_terms_hit": bool(parsed.get("required_terms_hit", True)),
-                    "forbidden_terms_found": bool(parsed.get("forbidden_terms_found", False)),
-                    "rationale": parsed.get("rationale", ""),
-                }
-            except Exception as exc:
-                last_exc = exc
-                exc_str = str(exc)
-                if "429" in exc_str or "RESOURCE_EXHAUSTED" in exc_str:
-                    delay_match = re.search(r"retry in (\d+(?:\.\d+)?)s", exc_str)
-                    wait = float(delay_match.group(1)) if delay_match else (30 * (attempt + 1))
-                    logger.warning(f"Gemini 429 on constraint-score attempt {attempt + 1}/{max_retries} — waiting {wait:.0f}s")
-                    await asyncio.sleep(wait)
-                else:
-                    raise
-
-        raise last_exc
+        parsed = await self._generate_json(prompt, priority, max_retries, "constraint score")
+        return {
+            "constraint_score": float(parsed["constraint_score"]),
+            "required_terms_hit": bool(parsed.get("required_terms_hit", True)),
+            "forbidden_terms_found": bool(parsed.get("forbidden_terms_found", False)),
+            "rationale": parsed.get("rationale", ""),
+        }
+
+    async def _generate_json(self, prompt: str, priority: str, max_retries: int, label: str) -> dict:
+        """Rate-limited judge call; the shared limiter paces requests and retries 429s."""
+
+        async def request():
+            return await asyncio.to_thread(
+                self._client.models.generate_content,
+                model=JUDGE_MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    temperature=0.1,
+                    max_output_tokens=_MAX_OUTPUT_TOKENS,
+                ),
+            )
+
+        response = await gemini_rate_limiter.run(
+            JUDGE_MODEL,
+            request,
+            tokens=estimate_request_tokens(prompt, max_output_tokens=_MAX_OUTPUT_TOKENS),
+            priority=priority,
+            max_retries=max_retries,
+            label=label,
+        )
+        text = response.text.strip()
+        text = re.sub(r"^```(?:json)?\s*", "", text)
+        text = re.sub(r"\s*```$", "", text)
+        return json.loads(text)
 
 
 llm_judge_service = LLMJudgeService()
@@ -0,0 +1,164 @@
+"""Memory-budgeted LRU residency for locally loaded translation models.
+
+TranslationService registers every model it loads here. When the estimated
+footprint of resident models exceeds MODEL_MEMORY_BUDGET_MB, the least-recently
+used models that are not pinned by an in-flight request are evicted through the
+on_evict callback (which drops the model, tokenizer and pipeline references).
+
+A budget of 0 disables eviction; models then stay resident as before and the
+manager only keeps hit/miss counters and footprint estimates.
+"""
+
+import logging
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_model_bytes(model) -> int:
+    """Parameter + buffer bytes of a torch module (dtype-aware, so int8/bf16 count correctly)."""
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    # Dynamic-quantized Linear layers keep packed int8 weights outside parameters()
+    for module in model.modules():
+        if hasattr(module, "_packed_params") and callable(getattr(module, "weight", None)):
+            weight = module.weight()
+            total += weight.numel() * weight.element_size()
+    return total
+
+
+class ModelResidencyManager:
+    def __init__(self, budget_bytes: int, on_evict: Callable[[str], None]):
+        self.budget_bytes = budget_bytes
+        self._on_evict = on_evict
+        self._lock = threading.RLock()
+
+        # LRU order: first item is the least recently used
+        self._resident: "OrderedDict[str, Dict]" = OrderedDict()
+        self._pins: Counter = Counter()
+        # Last known footprint per key, kept after eviction so a reload can make room up front
+        self._known_bytes: Dict[str, int] = {}
+        self._evicted: Dict[str, str] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # Bookkeeping called by TranslationService
+    # ------------------------------------------------------------------
+
+    def touch(self, key: str):
+        """Record a cache hit and mark the model most recently used."""
+        with self._lock:
+            if key in self._resident:
+                self._resident.move_to_end(key)
+                self._resident[key]["last_used"] = datetime.now().isoformat()
+                self.hits += 1
+
+    def record_miss(self, key: str):
+        """Record a load and evict enough to fit the model's last known size."""
+        with self._lock:
+            self.misses += 1
+            expected = self._known_bytes.get(key, 0)
+            if expected:
+                self._evict_until_fits(expected, exclude=key)
+
+    def admit(self, key: str, model) -> int:
+        """Register a freshly loaded model and evict LRU models if over budget."""
+        size = estimate_model_bytes(model)
+        with self._lock:
+            self._known_bytes[key] = size
+            self._evicted.pop(key, None)
+            now = datetime.now().isoformat()
+            self._resident[key] = {"bytes": size, "loaded_at": now, "last_used": now}
+            self._resident.move_to_end(key)
+            self._evict_until_fits(0, exclude=key)
+        logger.info(f"Model '{key}' resident (~{size / 1024 ** 2:.0f} MB); total ~{self.resident_bytes() / 1024 ** 2:.0f} MB.")
+        return size
+
+    def forget(self, key: str):
+        """Drop a key that was unloaded outside the LRU policy (e.g. manual cache clear)."""
+        with self._lock:
+            if self._resident.pop(key, None) is not None:
+                self._evicted[key] = datetime.now().isoformat()
+
+    @contextmanager
+    def pinned(self, key: str):
+        """Keep a model resident for the duration of a request."""
+        with self._lock:
+            self._pins[key] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins[key] -= 1
+                if self._pins[key] <= 0:
+                    del self._pins[key]
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(entry["bytes"] for entry in self._resident.values())
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def _evict_until_fits(self, incoming_bytes: int, exclude: Optional[str] = None):
+        if self.budget_bytes <= 0:
+            return
+        for key in list(self._resident.keys()):
+            if self.resident_bytes() + incoming_bytes <= self.budget_bytes:
+                return
+            if key == exclude or self._pins.get(key):
+                continue
+            self._evict(key)
+        if self.resident_bytes() + incoming_bytes > self.budget_bytes:
+            logger.warning(
+                f"Model memory budget exceeded (~{(self.resident_bytes() + incoming_bytes) / 1024 ** 2:.0f} MB "
+                f"> {self.budget_bytes / 1024 ** 2:.0f} MB); remaining models are pinned by in-flight requests."
+            )
+
+    def _evict(self, key: str):
+        entry = self._resident.pop(key)
+        self._evicted[key] = datetime.now().isoformat()
+        self.evictions += 1
+        logger.info(f"Evicting model '{key}' (~{entry['bytes'] / 1024 ** 2:.0f} MB, last used {entry['last_used']}).")
+        try:
+            self._on_evict(key)
+        except Exception as e:
+            logger.error(f"Eviction callback failed for '{key}': {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "budget_mb": round(self.budget_bytes / 1024 ** 2, 1) if self.budget_bytes > 0 else None,
+                "resident_mb": round(self.resident_bytes() / 1024 ** 2, 1),
+                "resident": [
+                    {
+                        "model_key": key,
+                        "estimated_mb": round(entry["bytes"] / 1024 ** 2, 1),
+                        "loaded_at": entry["loaded_at"],
+                        "last_used": entry["last_used"],
+                        "pinned": self._pins.get(key, 0),
+                    }
+                    # Most recently used first
+                    for key, entry in reversed(self._resident.items())
+                ],
+                "evicted": [
+                    {
+                        "model_key": key,
+                        "evicted_at": evicted_at,
+                        "estimated_mb": round(self._known_bytes.get(key, 0) / 1024 ** 2, 1),
+                    }
+                    for key, evicted_at in self._evicted.items()
+                ],
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
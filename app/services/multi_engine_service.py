@@ -1,23 +1,59 @@
 import asyncio
 import concurrent.futures
+import functools
 import logging
-import os
-from typing import Dict, List
+import re
+import threading
+from typing import AsyncIterator, Dict, List
 from datetime import datetime
 from app.services.translation_service import TranslationService
+from app.services.batch_scheduler import MicroBatchScheduler
+from app.services.engine_routing import EngineRoutingTable
+from app.services.gemini_rate_limiter import INTERACTIVE
+from app.utils.chunking import chunk_provenance, expand_chunks, reassemble
+from app.utils.dedup import dedupe, fan_out
 from app.utils.lang_pair import normalize_lang_code
 
 logger = logging.getLogger(__name__)
 
+
+def _visible_gemma_text(raw: str) -> str:
+    """Streamed Gemma text minus a "**Label:**" preamble (held back until it is complete)."""
+    stripped = raw.lstrip()
+    if stripped.startswith('**'):
+        match = re.match(r'^\*\*[^*]+\*\*\s*', stripped)
+        return stripped[match.end():] if match else ''
+    return stripped
+
+
 class CleanMultiEngineService:
     # Single-threaded executor keeps GPU calls off the event loop while serializing MPS access
     _gpu_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
-    def __init__(self, translation_service_instance: TranslationService, transcreation_service=None):
-        """Initialize with dependency injection for translation service"""
+    def __init__(self, translation_service_instance: TranslationService, transcreation_service=None,
+                 worker_pool=None, remote_engines=None):
+        """Initialize with dependency injection for translation service.
+
+        worker_pool: optional EngineWorkerPool. When given, local model batches
+        run in its worker processes instead of on the in-process GPU executor.
+        remote_engines: optional RemoteEngineRegistry. Engines a healthy remote
+        node serves for a pair are translated there first; local models are the
+        failover.
+        """
         self.translation_service = translation_service_instance
         self.transcreation_service = transcreation_service
+        self.worker_pool = worker_pool
+        self.remote_engines = remote_engines
         self._is_initialized = False
+        # Where local model calls run: worker processes, or this process's GPU executor
+        self._model_executor = worker_pool.dispatch_executor if worker_pool else CleanMultiEngineService._gpu_executor
+        self._model_backend = worker_pool or self.translation_service
+        # Per-model queues that merge concurrent calls into one batched generate()
+        self.batch_scheduler = MicroBatchScheduler(
+            executor=self._model_executor,
+            # run_model_batch handles the translation cache before anything is queued
+            run_batch=functools.partial(self._model_backend.translate_batch, use_cache=False),
+        )
         self.engine_configs = {
             'opus_fast': {
                 'name': 'Helsinki OPUS',
@@ -104,6 +140,9 @@ class CleanMultiEngineService:
         else:
             logger.info("TranscreationService unavailable — gemini_transcreation engine not registered.")
 
+        # Pair → engines / model keys / tags / pivot plans, resolved once instead of per segment
+        self.routing = EngineRoutingTable(self)
+
         self._is_initialized = True
     
     @staticmethod
@@ -123,79 +162,405 @@ class CleanMultiEngineService:
         target_lang: str,
         engine_id: str,
         style_guide=None,
+        use_cache: bool = True,
     ) -> Dict:
         """Translate using a specific engine with clean routing.
 
         style_guide: optional StyleGuide ORM object. When provided and the engine
         is gemini_transcreation, builds a constraint-aware system prompt from the
         guide's rules and terms instead of the static YAML config.
+        use_cache=False always runs the model (warm-up needs it loaded).
+        """
+        results = await self.translate_batch_with_engine(
+            [text], source_lang, target_lang, engine_id, style_guide=style_guide, use_cache=use_cache
+        )
+        return results[0]
+
+    async def translate_batch_with_engine(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        engine_id: str,
+        style_guide=None,
+        priority: str = INTERACTIVE,
+        use_cache: bool = True,
+    ) -> List[Dict]:
+        """Translate a list of segments with one engine, batching local models.
+
+        Returns one result dict per input segment, in input order. Local seq2seq
+        engines run as padded batches on the GPU executor; Gemini transcreation
+        packs segments into multi-segment requests at the given rate-limit priority.
+        use_cache=False skips the translation cache on lookup and store.
         """
         try:
             if engine_id not in self.engine_configs:
-                return {'engine': engine_id, 'error': 'Engine not found'}
+                return [{'engine': engine_id, 'error': 'Engine not found'} for _ in texts]
 
             config = self.engine_configs[engine_id]
+            if self._served_remotely(engine_id, source_lang, target_lang) and style_guide is None:
+                try:
+                    return await self.remote_engines.translate_batch(engine_id, texts, source_lang, target_lang)
+                except Exception as e:
+                    if engine_id not in self.routing.engines_for(self._norm_pair(source_lang, target_lang)):
+                        raise
+                    logger.warning(f"Remote {engine_id} unavailable ({e}); translating locally.")
+
             start_time = datetime.now()
+            intermediates = None
+            chunk_records = None
 
             # Route Gemini transcreation engine separately
             if config.get('type') == 'gemini':
-                if style_guide is not None:
-                    translated_text = await self.transcreation_service.transcreate_with_style_guide(
-                        text, source_lang, target_lang, style_guide
-                    )
-                else:
-                    translated_text = await self.transcreation_service.transcreate(
-                        text, source_lang, target_lang
+                # Cache misses go out as packed multi-segment requests; a failed
+                # segment comes back as its exception and does not fail the rest
+                cache = self.translation_service.cache
+                cache_model, cache_revision = self.transcreation_service.cache_identity(
+                    source_lang, target_lang, style_guide
+                )
+                translated_texts = (
+                    cache.get_many(texts, cache_model, cache_revision, source_lang, target_lang)
+                    if use_cache else [None] * len(texts)
+                )
+                missing = [i for i, translated in enumerate(translated_texts) if translated is None]
+                if missing:
+                    outputs = await self.transcreation_service.transcreate_batch(
+                        [texts[i] for i in missing], source_lang, target_lang, style_guide, priority
                     )
+                    for i, output in zip(missing, outputs):
+                        translated_texts[i] = output
+                    done = [(texts[i], output) for i, output in zip(missing, outputs) if not isinstance(output, Exception)]
+                    if done and use_cache:
+                        cache.put_many([text for text, _ in done], [output for _, output in done],
+                                       cache_model, cache_revision, source_lang, target_lang)
             # Check if we need pivot translation
             elif self._needs_pivot_translation(config, source_lang, target_lang):
-                translated_text = await self._translate_with_pivot(
-                    text, source_lang, target_lang, config['pivot_strategy']
+                translated_texts, intermediates, chunk_records = await self._translate_with_pivot_batch(
+                    texts, source_lang, target_lang, config['pivot_strategy'],
+                    return_intermediates=True, return_chunks=True, use_cache=use_cache,
                 )
             else:
-                # Route to appropriate translation method
-                pair = self._norm_pair(source_lang, target_lang)
-                
-                # Get model_to_use (e.g., 'T5_MULTILINGUAL', 'NLLB_200', 'HELSINKI_EN_FR')
-                model_to_use = config['model_mapping'].get(pair)
-                if not model_to_use:
-                    raise ValueError(f"No model mapping found for engine '{engine_id}' and pair '{pair}'.")
-
-                # Get the specific prefix or target language tag from translation_service's language_pair_models
-                prefix_or_lang_tag = None
-                # Fetching model_info from translation_service.language_pair_models using UPPERCASE pair for consistency
-                model_info_list = self.translation_service.language_pair_models.get(self._norm_pair(source_lang, target_lang).upper(), [])
-                model_info_from_ts = next(
-                    (info for info in model_info_list if info[0] == model_to_use),
-                    None
-                )
-                if model_info_from_ts and len(model_info_from_ts) == 3:
-                    prefix_or_lang_tag = model_info_from_ts[2]
-
-                loop = asyncio.get_event_loop()
-                translated_text = await loop.run_in_executor(
-                    CleanMultiEngineService._gpu_executor,
-                    lambda: self.translation_service.translate_by_model_type(
-                        text.strip(),
-                        model_to_use,
-                        source_lang=source_lang.lower(),
-                        target_lang=target_lang.lower(),
-                        target_lang_tag=prefix_or_lang_tag
-                    )
+                model_to_use, prefix_or_lang_tag = self._resolve_direct_model(engine_id, source_lang, target_lang)
+                # Oversized segments go in as sentence chunks, batched with everything else
+                chunks, layout = self._expand_chunks([text.strip() for text in texts], source_lang, model_to_use)
+                translated_chunks = await self.run_model_batch(
+                    chunks,
+                    model_to_use,
+                    source_lang=source_lang.lower(),
+                    target_lang=target_lang.lower(),
+                    target_lang_tag=prefix_or_lang_tag,
+                    use_cache=use_cache,
                 )
+                translated_texts = reassemble(translated_chunks, layout, target_lang)
+                chunk_records = chunk_provenance(chunks, translated_chunks, layout)
+
+            # Batched calls share one wall-clock window; attribute it evenly per segment
+            processing_time = (datetime.now() - start_time).total_seconds() * 1000 / max(len(texts), 1)
+            model_used = self._get_model_used(engine_id, source_lang, target_lang)
+            return self._engine_results(
+                engine_id, translated_texts, processing_time, model_used, intermediates, chunk_records
+            )
 
-            processing_time = (datetime.now() - start_time).total_seconds() * 1000
+        except Exception as e:
+            return [{'engine': engine_id, 'error': str(e)} for _ in texts]
 
-            return {
+    def _engine_results(
+        self,
+        engine_id: str,
+        translated_texts: List,
+        processing_time: float,
+        model_used: str,
+        intermediates: List[str] = None,
+        chunk_records: List = None,
+    ) -> List[Dict]:
+        """One engineResults entry per segment; Exception items become error entries."""
+        confidence = self.engine_configs[engine_id]['confidence']
+        results = [
+            {'engine': engine_id, 'error': str(translated_text)}
+            if isinstance(translated_text, Exception) else
+            {
                 'engine': engine_id,
                 'text': translated_text,
-                'confidence': config['confidence'],
+                'confidence': confidence,
                 'processing_time': processing_time,
-                'model': self._get_model_used(engine_id, source_lang, target_lang)
+                'model': model_used,
             }
+            for translated_text in translated_texts
+        ]
+        if intermediates is not None:
+            for result, intermediate in zip(results, intermediates):
+                if 'text' in result:
+                    result['intermediate_translation'] = intermediate
+        if chunk_records is not None:
+            for result, records in zip(results, chunk_records):
+                if records and 'text' in result:
+                    result['chunks'] = records
+        return results
+
+    async def translate_batch_multi_target(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_langs: List[str],
+        engine_id: str,
+    ) -> Dict[str, List[Dict]]:
+        """Translate segments into several targets with one direct NLLB engine.
+
+        The encoder runs once per segment and all targets are decoded together
+        (TranslationService.translate_multi_target) on the GPU executor.
+        Oversized segments go in as sentence chunks, so each target carries the
+        same chunk provenance as translate_batch_with_engine. Returns
+        target_lang -> one result dict per segment.
+        """
+        try:
+            model_key = None
+            targets = {}
+            for target_lang in target_langs:
+                target_model, lang_tag = self._resolve_direct_model(engine_id, source_lang, target_lang)
+                if model_key not in (None, target_model):
+                    raise ValueError(f"Engine '{engine_id}' uses different models across {target_langs}")
+                model_key = target_model
+                targets[target_lang.lower()] = lang_tag
 
+            start_time = datetime.now()
+            chunks, layout = self._expand_chunks([text.strip() for text in texts], source_lang, model_key)
+            loop = asyncio.get_running_loop()
+            translated = await loop.run_in_executor(
+                self._model_executor,
+                functools.partial(
+                    self._model_backend.translate_multi_target,
+                    chunks,
+                    model_key,
+                    source_lang.lower(),
+                    targets,
+                ),
+            )
+            # One shared encode/decode window for every (segment, target)
+            processing_time = (datetime.now() - start_time).total_seconds() * 1000 / max(len(texts) * len(targets), 1)
+            results = {}
+            for target_lang in target_langs:
+                translated_chunks = translated[target_lang.lower()]
+                results[target_lang] = self._engine_results(
+                    engine_id,
+                    reassemble(translated_chunks, layout, target_lang),
+                    processing_time,
+                    self._get_model_used(engine_id, source_lang, target_lang),
+                    chunk_records=chunk_provenance(chunks, translated_chunks, layout),
+                )
+            return results
         except Exception as e:
-            return {'engine': engine_id, 'error': str(e)}
+            return {target_lang: [{'engine': engine_id, 'error': str(e)} for _ in texts] for target_lang in target_langs}
+
+    async def stream_with_engine(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        engine_id: str,
+        style_guide=None,
+    ) -> AsyncIterator[Dict]:
+        """Translate one segment, yielding text as it is generated.
+
+        Yields {'type': 'token', 'text': piece} events followed by one
+        {'type': 'done', ...} event carrying the final post-processed text.
+        TranslateGemma streams tokens from generate(); Gemini transcreation
+        streams API chunks; other local engines cannot stream and send their
+        whole output as a single piece. Cache hits are sent immediately. Closing
+        the generator early (client disconnect) stops a TranslateGemma generate().
+        """
+        if engine_id not in self.engine_configs:
+            raise ValueError(f"Engine '{engine_id}' not found")
+        config = self.engine_configs[engine_id]
+        start_time = datetime.now()
+        model_used = self._get_model_used(engine_id, source_lang, target_lang)
+        first_token_ms = None
+
+        def _elapsed_ms() -> float:
+            return (datetime.now() - start_time).total_seconds() * 1000
+
+        if config.get('type') == 'gemini':
+            cache = self.translation_service.cache
+            cache_model, cache_revision = self.transcreation_service.cache_identity(source_lang, target_lang, style_guide)
+            cached = cache.get_many([text], cache_model, cache_revision, source_lang, target_lang)[0]
+            if cached is not None:
+                yield {'type': 'token', 'text': cached}
+                yield {'type': 'done', 'engine': engine_id, 'model': model_used, 'text': cached, 'cached': True,
+                       'first_token_ms': _elapsed_ms(), 'processing_time': _elapsed_ms()}
+                return
+            pieces = []
+            async for piece in self.transcreation_service.transcreate_stream(text, source_lang, target_lang, style_guide):
+                if first_token_ms is None:
+                    first_token_ms = _elapsed_ms()
+                pieces.append(piece)
+                yield {'type': 'token', 'text': piece}
+            final_text = "".join(pieces).strip()
+            cache.put_many([text], [final_text], cache_model, cache_revision, source_lang, target_lang)
+
+        elif not self._streams_tokens(engine_id, source_lang, target_lang):
+            result = (await self.translate_batch_with_engine([text], source_lang, target_lang, engine_id, style_guide))[0]
+            if 'error' in result:
+                raise RuntimeError(result['error'])
+            final_text = result['text']
+            first_token_ms = _elapsed_ms()
+            yield {'type': 'token', 'text': final_text}
+
+        else:
+            model_key, lang_tag = self._resolve_direct_model(engine_id, source_lang, target_lang)
+            cache = self.translation_service.cache
+            revision = self.translation_service.model_revision(model_key)
+            # Same key as run_model_batch, so streamed and batched translations share entries
+            segment, pair = text.strip(), (source_lang.lower(), target_lang.lower())
+            cached = cache.get_many([segment], model_key, revision, *pair, lang_tag)[0]
+            if cached is not None:
+                yield {'type': 'token', 'text': cached}
+                yield {'type': 'done', 'engine': engine_id, 'model': model_used, 'text': cached, 'cached': True,
+                       'first_token_ms': _elapsed_ms(), 'processing_time': _elapsed_ms()}
+                return
+
+            loop = asyncio.get_running_loop()
+            cancel = threading.Event()
+            # Model load and generate() both run on the GPU executor, behind any in-flight batch
+            streamer, run, tgt_code = await loop.run_in_executor(
+                CleanMultiEngineService._gpu_executor,
+                self.translation_service.stream_gemma, segment, model_key, source_lang, target_lang, cancel,
+            )
+            generation = loop.run_in_executor(CleanMultiEngineService._gpu_executor, run)
+            pieces_iter = iter(streamer)
+            raw, sent = "", ""
+            try:
+                while True:
+                    piece = await asyncio.to_thread(next, pieces_iter, None)
+                    if piece is None:
+                        break
+                    raw += piece
+                    visible = _visible_gemma_text(raw)
+                    if len(visible) > len(sent):
+                        if first_token_ms is None:
+                            first_token_ms = _elapsed_ms()
+                        yield {'type': 'token', 'text': visible[len(sent):]}
+                        sent = visible
+                await generation
+            finally:
+                # No-op after a normal finish; on disconnect, frees the GPU executor at the next token
+                cancel.set()
+            final_text = self.translation_service.clean_gemma_output(raw, tgt_code)
+            cache.put_many([segment], [final_text], model_key, revision, *pair, lang_tag)
+
+        yield {'type': 'done', 'engine': engine_id, 'model': model_used, 'text': final_text, 'cached': False,
+               'first_token_ms': first_token_ms, 'processing_time': _elapsed_ms()}
+
+    def _streams_tokens(self, engine_id: str, source_lang: str, target_lang: str) -> bool:
+        """True when the engine's route for this pair is a direct TranslateGemma model.
+
+        Token streaming runs generate() in this process, so it is off in
+        worker-process mode (the model lives in a worker).
+        """
+        if self.worker_pool is not None or self._served_remotely(engine_id, source_lang, target_lang):
+            return False
+        route = self.routing.route(engine_id, self._norm_pair(source_lang, target_lang))
+        return bool(route) and route['type'] == 'direct' and route['model_keys'][0].startswith('TRANSLATE_GEMMA')
+
+    def is_model_resident(self, model_key: str) -> bool:
+        """Whether a model is loaded, in this process, its engine worker or a healthy remote node."""
+        if self.remote_engines is not None and self.remote_engines.is_resident(model_key):
+            return True
+        if self.worker_pool is not None:
+            return self.worker_pool.is_resident(model_key)
+        return model_key in self.translation_service.models or model_key in self.translation_service.causal_models
+
+    def _served_remotely(self, engine_id: str, source_lang: str, target_lang: str) -> bool:
+        return self.remote_engines is not None and bool(self.remote_engines.nodes_for(engine_id, source_lang, target_lang))
+
+    async def run_model_batch(
+        self,
+        texts: List[str],
+        model_key: str,
+        source_lang: str = None,
+        target_lang: str = None,
+        target_lang_tag: str = None,
+        use_cache: bool = True,
+    ) -> List[str]:
+        """Translate segments through the micro-batching scheduler.
+
+        Segments are merged with any concurrent calls for the same model and
+        language pair before running on the GPU executor. Cache hits return
+        immediately without queueing behind model work; with use_cache=False
+        every segment goes to the model and nothing is stored. A segment that
+        failed comes back as its exception.
+        """
+        # Identical segments in one call (repeated intermediates, labels) are translated once
+        unique_texts, index_map = dedupe(texts, key=lambda text: text)
+        if len(unique_texts) < len(texts):
+            return fan_out(
+                await self.run_model_batch(unique_texts, model_key, source_lang, target_lang, target_lang_tag, use_cache),
+                index_map,
+            )
+
+        cache = self.translation_service.cache
+        revision = self.translation_service.model_revision(model_key)
+        if use_cache:
+            results = cache.get_many(texts, model_key, revision, source_lang, target_lang, target_lang_tag)
+        else:
+            results = [None] * len(texts)
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if not missing:
+            return results
+
+        missing_texts = [texts[i] for i in missing]
+        translated = await self.batch_scheduler.submit_many(
+            missing_texts,
+            model_key,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            target_lang_tag=target_lang_tag,
+        )
+        done = [(text, output) for text, output in zip(missing_texts, translated) if not isinstance(output, Exception)]
+        if use_cache and done:
+            cache.put_many([text for text, _ in done], [output for _, output in done],
+                           model_key, revision, source_lang, target_lang, target_lang_tag)
+        for i, translation in zip(missing, translated):
+            results[i] = translation
+        return results
+
+    def _resolve_direct_model(self, engine_id: str, source_lang: str, target_lang: str):
+        """Return (model_key, prefix_or_lang_tag) for a non-pivot local engine."""
+        pair = self._norm_pair(source_lang, target_lang)
+        route = self.routing.route(engine_id, pair)
+        if route and route['type'] == 'direct':
+            return route['model_keys'][0], route['lang_tag']
+
+        config = self.engine_configs[engine_id]
+
+        # Get model_to_use (e.g., 'T5_MULTILINGUAL', 'NLLB_200', 'HELSINKI_EN_FR')
+        model_to_use = config['model_mapping'].get(pair)
+        if not model_to_use:
+            raise ValueError(f"No model mapping found for engine '{engine_id}' and pair '{pair}'.")
+
+        # Get the specific prefix or target language tag from translation_service's language_pair_models
+        prefix_or_lang_tag = None
+        # Fetching model_info from translation_service.language_pair_models using UPPERCASE pair for consistency
+        model_info_list = self.translation_service.language_pair_models.get(pair.upper(), [])
+        model_info_from_ts = next(
+            (info for info in model_info_list if info[0] == model_to_use),
+            None
+        )
+        if model_info_from_ts and len(model_info_from_ts) == 3:
+            prefix_or_lang_tag = model_info_from_ts[2]
+
+        return model_to_use, prefix_or_lang_tag
+
+    def model_keys_for(self, engine_id: str, source_lang: str, target_lang: str) -> List[str]:
+        """Local model keys an engine needs for a pair (both legs for pivots, none for Gemini)."""
+        route = self.routing.route(engine_id, self._norm_pair(source_lang, target_lang))
+        if route:
+            return list(route['model_keys'])
+        config = self.engine_configs.get(engine_id)
+        if not config or config.get('type') == 'gemini':
+            return []
+        if self._needs_pivot_translation(config, source_lang, target_lang):
+            return list(config['pivot_strategy']['via_models'])
+        model_key = config['model_mapping'].get(self._norm_pair(source_lang, target_lang))
+        return [model_key] if model_key else []
 
     def _needs_pivot_translation(self, config: dict, source_lang: str, target_lang: str) -> bool:
         """Determine if this translation needs to use pivot strategy"""
@@ -205,110 +570,105 @@ class CleanMultiEngineService:
         applies_to = config['pivot_strategy'].get('applies_to', [])
         return pair in applies_to
 
-    async def _translate_with_pivot(self, text: str, source_lang: str, target_lang: str, pivot_strategy: dict) -> str:
-        """Generic pivot translation using strategy configuration"""
+    def _expand_chunks(self, texts: List[str], source_lang: str, model_key: str):
+        """Split segments over the model's context into sentence chunks; returns (chunks, layout)."""
+        translation_service = self.translation_service
+        return expand_chunks(
+            texts,
+            source_lang,
+            translation_service.max_input_tokens(model_key),
+            translation_service.token_length_fn(model_key),
+        )
+
+    async def _translate_with_pivot_batch(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        pivot_strategy: dict,
+        return_intermediates: bool = False,
+        return_chunks: bool = False,
+        use_cache: bool = True,
+    ):
+        """Pivot-translate a list of segments as two batched stages.
+
+        All first legs run, then all second legs, each through the scheduler and
+        GPU executor like the direct path (and the translation cache, so English
+        intermediates are reused across jobs). Identical intermediates — e.g. from
+        the ELAN and OPUS pivots sharing HELSINKI_EN_FR — are translated once.
+        Oversized segments are split into sentence chunks once and the chunks
+        go through both legs. A segment whose first leg failed skips the second
+        and comes back as that exception. With return_intermediates, returns
+        (final_translations, intermediates); return_chunks appends per-segment
+        chunk provenance.
+        """
         try:
             pivot_models = pivot_strategy['via_models']
             if len(pivot_models) != 2:
                 raise ValueError("Pivot strategy must specify exactly 2 models")
 
             first_model, second_model = pivot_models
-            
+
             # For pivot models, we might need to explicitly get target_lang_tag for the pivot step
             pivot_lang_code = pivot_strategy['pivot_lang'].lower()
-            
-            first_model_config = next(
-                (m_info for pair_list in self.translation_service.language_pair_models.values()
-                 for m_info in pair_list if m_info[0] == first_model and pair_list[0][0].split('-')[0].lower() == source_lang.lower()),
-                None
-            )
-            first_model_target_tag = first_model_config[2] if first_model_config and len(first_model_config) > 2 else None
 
-            intermediate = self.translation_service.translate_by_model_type(
-                text.strip(), 
-                first_model, 
-                source_lang=source_lang.lower(), 
+            chunks, layout = self._expand_chunks([text.strip() for text in texts], source_lang, first_model)
+            intermediates = await self.run_model_batch(
+                chunks,
+                first_model,
+                source_lang=source_lang.lower(),
                 target_lang=pivot_lang_code,
-                target_lang_tag=first_model_target_tag
+                target_lang_tag=self.routing.leg_tag(first_model, source_lang),
+                use_cache=use_cache,
             )
 
-            if isinstance(intermediate, str) and "Translation failed" in intermediate:
-                raise Exception(f"Pivot step 1 failed: {intermediate}")
-
-            # Look up pivot-target model details
-            second_model_config = next(
-                (m_info for pair_list in self.translation_service.language_pair_models.values()
-                 for m_info in pair_list if m_info[0] == second_model and pair_list[0][0].split('-')[0].lower() == pivot_lang_code),
-                None
-            )
-            second_model_target_tag = second_model_config[2] if second_model_config and len(second_model_config) > 2 else None
-
-            final_translation = self.translation_service.translate_by_model_type(
-                intermediate.strip(), 
-                second_model, 
-                source_lang=pivot_lang_code, 
+            # Failed first legs carry their exception through as the final result
+            final_translations = list(intermediates)
+            translated = [i for i, intermediate in enumerate(intermediates) if not isinstance(intermediate, Exception)]
+            second_leg = await self.run_model_batch(
+                [intermediates[i].strip() for i in translated],
+                second_model,
+                source_lang=pivot_lang_code,
                 target_lang=target_lang.lower(),
-                target_lang_tag=second_model_target_tag
-            )
-
-            if isinstance(final_translation, str) and "Translation failed" in final_translation:
-                raise Exception(f"Pivot step 2 failed: {final_translation}")
-
-            return final_translation
+                target_lang_tag=self.routing.leg_tag(second_model, pivot_lang_code),
+                use_cache=use_cache,
+            ) if translated else []
+            for i, final_translation in zip(translated, second_leg):
+                final_translations[i] = final_translation
+
+            provenance = chunk_provenance(chunks, final_translations, layout, intermediates=intermediates)
+            intermediates = reassemble(intermediates, layout, pivot_lang_code)
+            final_translations = reassemble(final_translations, layout, target_lang)
+            if return_intermediates and return_chunks:
+                return final_translations, intermediates, provenance
+            if return_intermediates:
+                return final_translations, intermediates
+            return final_translations
 
         except Exception as e:
             raise Exception(f"Pivot translation failed: {str(e)}")
 
-    def get_available_engines_for_pair(self, source_lang: str, target_lang: str) -> List[str]:
-        """Return only engines that can handle this language pair"""
-        pair = self._norm_pair(source_lang, target_lang)
-        available = []
-        
-        for engine_id, config in self.engine_configs.items():
-            # Gemini transcreation: available if the pair has a loaded profile
-            if config.get('type') == 'gemini':
-                if pair in config['supported_pairs']:
-                    available.append(engine_id)
-                continue
+    def _pivot_leg_tag(self, model_key: str, leg_source_lang: str):
+        """Look up the target-language tag configured for one pivot leg model."""
+        model_config = next(
+            (m_info for pair_list in self.translation_service.language_pair_models.values()
+             for m_info in pair_list if m_info[0] == model_key and pair_list[0][0].split('-')[0].lower() == leg_source_lang.lower()),
+            None
+        )
+        return model_config[2] if model_config and len(model_config) > 2 else None
 
-            # Check if model paths exist for direct models for this specific pair
-            model_key = config.get('model_mapping', {}).get(pair)
-            model_path_exists = False
-            if model_key and model_key in self.translation_service.model_paths:
-                raw_path = self.translation_service.model_paths[model_key][0]
-                if raw_path:
-                    if raw_path.startswith('./') or raw_path.startswith('/'):
-                        model_path_exists = os.path.exists(raw_path)
-                    else:
-                        # Hub ID (e.g. "google/mt5-base") — check HuggingFace cache directory
-                        cache_dir_name = 'models--' + raw_path.replace('/', '--')
-                        model_path_exists = os.path.exists(os.path.join('./models', cache_dir_name))
-
-            # Special handling for pivots
-            is_pivot_available = self._can_handle_via_pivot(config, source_lang, target_lang)
-            if is_pivot_available:
-                 # Check if the underlying pivot models themselves are available
-                 pivot_strategy = config['pivot_strategy']
-                 model1_available = pivot_strategy['via_models'][0] in self.translation_service.model_paths and \
-                                    self.translation_service.model_paths[pivot_strategy['via_models'][0]][0] is not None
-                 model2_available = pivot_strategy['via_models'][1] in self.translation_service.model_paths and \
-                                    self.translation_service.model_paths[pivot_strategy['via_models'][1]][0] is not None
-                 if not (model1_available and model2_available):
-                     is_pivot_available = False
-
-            # An engine is available if it supports the pair AND its model path exists, OR it's a valid pivot
-            if (pair in config['supported_pairs'] and model_path_exists) or is_pivot_available:
-                available.append(engine_id)
-        
-        return available
-
-    def _can_handle_via_pivot(self, config: dict, source_lang: str, target_lang: str) -> bool:
-        """Check if engine can handle this pair via its configured pivot strategy"""
-        if 'pivot_strategy' not in config:
-            return False
-        pair = self._norm_pair(source_lang, target_lang)
-        applies_to = config['pivot_strategy'].get('applies_to', [])
-        return pair in applies_to
+    def get_available_engines_for_pair(self, source_lang: str, target_lang: str) -> List[str]:
+        """Return only engines that can handle this language pair (served from the routing table)"""
+        local = self.routing.engines_for(self._norm_pair(source_lang, target_lang))
+        if self.remote_engines is None:
+            return local
+        remote = set(self.remote_engines.engines_for(source_lang, target_lang))
+        # engine_configs order, whether an engine is served here or by a remote node
+        return [engine_id for engine_id in self.engine_configs if engine_id in remote or engine_id in local]
+
+    def rebuild_routing(self, reason: str = "manual"):
+        """Recompute the routing table, e.g. after model directories are added or removed."""
+        self.routing.rebuild(reason)
 
     def _get_model_used(self, engine_id: str, source_lang: str, target_lang: str) -> str:
         """Get the model name used for this translation"""
@@ -381,6 +741,114 @@ class CleanMultiEngineService:
 
         return final_results
 
+    async def translate_multi_engine_batch(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        engines: List[str] = None,
+        style_guide=None,
+    ) -> List[List[Dict]]:
+        """Batched counterpart of translate_multi_engine.
+
+        Each engine translates the whole segment list in one batched call; the
+        result is transposed to one list of engine results per input segment.
+        """
+        if engines is None:
+            engines = self.get_available_engines_for_pair(source_lang, target_lang)
+
+        available_engines = self.get_available_engines_for_pair(source_lang, target_lang)
+        valid_engines = [e for e in engines if e in available_engines]
+
+        if not valid_engines:
+            error = {'error': f'No valid engines were selected or available for {source_lang}-{target_lang}. Available: {available_engines}'}
+            return [[dict(error)] for _ in texts]
+
+        results = await asyncio.gather(
+            *[
+                self.translate_batch_with_engine(texts, source_lang, target_lang, engine, style_guide=style_guide)
+                for engine in valid_engines
+            ],
+            return_exceptions=True,
+        )
+
+        per_segment: List[List[Dict]] = [[] for _ in texts]
+        for engine, engine_results in zip(valid_engines, results):
+            if isinstance(engine_results, Exception):
+                engine_results = [{'engine': engine, 'error': str(engine_results)} for _ in texts]
+            for i, result in enumerate(engine_results):
+                per_segment[i].append(result)
+
+        return per_segment
+
+    async def translate_multi_engine_multi_target(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_langs: List[str],
+        engines: List[str] = None,
+        style_guide=None,
+    ) -> Dict[str, List[List[Dict]]]:
+        """translate_multi_engine_batch for several target languages at once.
+
+        Engines that reach two or more of the targets through the same direct
+        NLLB model encode each segment once and decode every target together;
+        all other (engine, target) combinations run as before. Returns
+        target_lang -> one list of engine results per segment.
+        """
+        valid_by_target = {}
+        for target_lang in target_langs:
+            available_engines = self.get_available_engines_for_pair(source_lang, target_lang)
+            requested = engines if engines is not None else available_engines
+            valid_by_target[target_lang] = [e for e in requested if e in available_engines]
+
+        # (engine, NLLB model) -> targets it can decode from one encoder pass
+        shared: Dict[tuple, List[str]] = {}
+        for target_lang, valid_engines in valid_by_target.items():
+            for engine_id in valid_engines:
+                route = self.routing.route(engine_id, self._norm_pair(source_lang, target_lang))
+                if route and route['type'] == 'direct' and route['model_keys'][0].startswith('NLLB') \
+                        and not self._served_remotely(engine_id, source_lang, target_lang):
+                    shared.setdefault((engine_id, route['model_keys'][0]), []).append(target_lang)
+        shared = {key: targets for key, targets in shared.items() if len(targets) > 1}
+        shared_pairs = {(engine_id, target_lang) for (engine_id, _), targets in shared.items() for target_lang in targets}
+
+        jobs, labels = [], []
+        for (engine_id, _), targets in shared.items():
+            jobs.append(self.translate_batch_multi_target(texts, source_lang, targets, engine_id))
+            labels.append((engine_id, targets))
+        for target_lang, valid_engines in valid_by_target.items():
+            for engine_id in valid_engines:
+                if (engine_id, target_lang) not in shared_pairs:
+                    jobs.append(self.translate_batch_with_engine(
+                        texts, source_lang, target_lang, engine_id, style_guide=style_guide
+                    ))
+                    labels.append((engine_id, [target_lang]))
+        outcomes = await asyncio.gather(*jobs, return_exceptions=True)
+
+        by_engine_target: Dict[tuple, List[Dict]] = {}
+        for (engine_id, job_targets), outcome in zip(labels, outcomes):
+            if isinstance(outcome, Exception):
+                outcome = {target_lang: [{'engine': engine_id, 'error': str(outcome)} for _ in texts]
+                           for target_lang in job_targets}
+            elif not isinstance(outcome, dict):
+                outcome = {job_targets[0]: outcome}
+            for target_lang, engine_results in outcome.items():
+                by_engine_target[(engine_id, target_lang)] = engine_results
+
+        per_target: Dict[str, List[List[Dict]]] = {}
+        for target_lang, valid_engines in valid_by_target.items():
+            if not valid_engines:
+                error = {'error': f'No valid engines were selected or available for {source_lang}-{target_lang}. '
+                                  f'Available: {self.get_available_engines_for_pair(source_lang, target_lang)}'}
+                per_target[target_lang] = [[dict(error)] for _ in texts]
+                continue
+            per_target[target_lang] = [
+                [by_engine_target[(engine_id, target_lang)][i] for engine_id in valid_engines]
+                for i in range(len(texts))
+            ]
+        return per_target
+
     @property
     def engines(self):
         """Property to maintain compatibility with existing code"""
@@ -1,5 +1,7 @@
+import asyncio
 import json
 import logging
+import math
 import os
 import io
 import mimetypes
@@ -17,6 +19,7 @@ from app.ocr_engine.manga_ocr import MangaOCREngine
 from app.ocr_engine.tesseract_ocr import TesseractOCREngine
 from app.processors.image_processor import ImageProcessor
 from app.processors.text_processor import TextProcessor
+from app.services.gemini_rate_limiter import estimate_request_tokens, gemini_rate_limiter
 from app.services.transcreation_service import DEFAULT_MODEL
 
 # Optional imports: Whisper
@@ -39,6 +42,8 @@ except Exception:
 
 logger = logging.getLogger(__name__)
 
+_IMAGE_TILE_TOKENS = 258
+
 class MultimodalService:
     def __init__(self, llm_cleanup_fn: Optional[Callable[[str, Optional[str]], str]] = None):
         # Initialize component classes
@@ -195,15 +200,26 @@ class MultimodalService:
                 "{\"text\": \"Body sentence.\", \"bbox\": {\"x\": 15, \"y\": 22, \"w\": 70, \"h\": 8}}]"
             )
 
-            response = self._gemini_client.models.generate_content(
-                model=DEFAULT_MODEL,
-                contents=[
-                    genai_types.Content(role="user", parts=[
-                        genai_types.Part(inline_data=genai_types.Blob(mime_type="image/png", data=img_bytes)),
-                        genai_types.Part(text=prompt),
-                    ])
-                ],
-                config=genai_types.GenerateContentConfig(max_output_tokens=2048),
+            async def request():
+                return await asyncio.to_thread(
+                    self._gemini_client.models.generate_content,
+                    model=DEFAULT_MODEL,
+                    contents=[
+                        genai_types.Content(role="user", parts=[
+                            genai_types.Part(inline_data=genai_types.Blob(mime_type="image/png", data=img_bytes)),
+                            genai_types.Part(text=prompt),
+                        ])
+                    ],
+                    config=genai_types.GenerateContentConfig(max_output_tokens=2048),
+                )
+
+            # Gemini bills images per 768x768 tile
+            tiles = math.ceil(pil_img.width / 768) * math.ceil(pil_img.height / 768)
+            response = await gemini_rate_limiter.run(
+                DEFAULT_MODEL,
+                request,
+                tokens=estimate_request_tokens(prompt, max_output_tokens=2048) + _IMAGE_TILE_TOKENS * tiles,
+                label="vision OCR",
             )
 
             raw = response.text.strip()
@@ -0,0 +1,181 @@
+"""Registry of remote engine worker nodes.
+
+A node is an app.engine_worker_server process hosting a subset of the engine
+configs (e.g. TranslateGemma on a large GPU box, OPUS models on small ones).
+REMOTE_ENGINE_NODES lists their base URLs. The registry polls each node's
+/worker/health every REMOTE_HEALTH_INTERVAL_S to learn which engine serves
+which pair and which models are resident there, and sends batches to
+/worker/translate-batch.
+
+A batch goes to the healthy node with the fewest recent failures and lowest
+health-check latency. If that node fails, it is marked unhealthy until its
+next successful check and the batch moves to the next node. When every node
+fails, CleanMultiEngineService falls back to a local model if it has one.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import requests
+
+from app.core.config import settings
+from app.utils.lang_pair import normalize_lang_code
+
+logger = logging.getLogger(__name__)
+
+
+def _norm_pair(source_lang: str, target_lang: str) -> str:
+    return f"{normalize_lang_code(source_lang)}-{normalize_lang_code(target_lang)}"
+
+
+class RemoteEngineRegistry:
+    def __init__(self, nodes: Optional[List[str]] = None):
+        urls = settings.REMOTE_ENGINE_NODES if nodes is None else nodes
+        self.nodes: Dict[str, Dict] = {
+            url.rstrip("/"): {
+                "url": url.rstrip("/"),
+                "name": None,
+                "healthy": False,
+                "engines": {},
+                "resident_models": [],
+                "latency_ms": None,
+                "consecutive_failures": 0,
+                "last_check": None,
+                "last_error": None,
+                "batches": 0,
+                "failovers": 0,
+            }
+            for url in urls
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Health
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Poll node health in the background on the running loop."""
+        if self.nodes and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._poll())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(settings.REMOTE_HEALTH_INTERVAL_S)
+            await self.check_all()
+
+    async def check_all(self):
+        await asyncio.gather(*[self._check(node) for node in self.nodes.values()])
+        healthy = [node["name"] or url for url, node in self.nodes.items() if node["healthy"]]
+        logger.debug(f"Remote engine health: {len(healthy)}/{len(self.nodes)} node(s) healthy.")
+
+    async def _check(self, node: Dict):
+        start = time.monotonic()
+        try:
+            response = await asyncio.to_thread(
+                requests.get, f"{node['url']}/worker/health", timeout=settings.REMOTE_HEALTH_TIMEOUT_S
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except Exception as e:
+            if node["healthy"]:
+                logger.warning(f"Remote engine node {node['url']} failed its health check: {e}")
+            node.update(healthy=False, last_error=str(e), last_check=datetime.now().isoformat())
+            node["consecutive_failures"] += 1
+            return
+
+        if not node["healthy"]:
+            logger.info(f"Remote engine node {node['url']} healthy: {sorted(payload.get('engines', {}))}")
+        node.update(
+            name=payload.get("node"),
+            healthy=True,
+            engines={engine_id: set(pairs) for engine_id, pairs in payload.get("engines", {}).items()},
+            resident_models=payload.get("residentModels", []),
+            latency_ms=round((time.monotonic() - start) * 1000, 1),
+            consecutive_failures=0,
+            last_check=datetime.now().isoformat(),
+            last_error=None,
+        )
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def nodes_for(self, engine_id: str, source_lang: str, target_lang: str) -> List[Dict]:
+        """Healthy nodes serving (engine, pair), best first."""
+        pair = _norm_pair(source_lang, target_lang)
+        candidates = [
+            node for node in self.nodes.values()
+            if node["healthy"] and pair in node["engines"].get(engine_id, ())
+        ]
+        return sorted(candidates, key=lambda node: (node["consecutive_failures"], node["latency_ms"] or 0.0))
+
+    def engines_for(self, source_lang: str, target_lang: str) -> List[str]:
+        pair = _norm_pair(source_lang, target_lang)
+        return sorted({
+            engine_id
+            for node in self.nodes.values() if node["healthy"]
+            for engine_id, pairs in node["engines"].items() if pair in pairs
+        })
+
+    def is_resident(self, model_key: str) -> bool:
+        return any(
+            model_key in node["resident_models"] for node in self.nodes.values() if node["healthy"]
+        )
+
+    # ------------------------------------------------------------------
+    # Translation
+    # ------------------------------------------------------------------
+
+    async def translate_batch(self, engine_id: str, texts: List[str], source_lang: str, target_lang: str) -> List[Dict]:
+        """Translate on the best node for (engine, pair), failing over to the others."""
+        nodes = self.nodes_for(engine_id, source_lang, target_lang)
+        if not nodes:
+            raise RuntimeError(f"No healthy remote node serves {engine_id} for {source_lang}-{target_lang}")
+
+        errors = []
+        for attempt, node in enumerate(nodes):
+            try:
+                response = await asyncio.to_thread(
+                    requests.post,
+                    f"{node['url']}/worker/translate-batch",
+                    json={"engine": engine_id, "sourceLanguage": source_lang,
+                          "targetLanguage": target_lang, "texts": texts},
+                    timeout=settings.REMOTE_REQUEST_TIMEOUT_S,
+                )
+                response.raise_for_status()
+                results = response.json()["results"]
+                if len(results) != len(texts):
+                    raise ValueError(f"expected {len(texts)} results, got {len(results)}")
+            except Exception as e:
+                # Out of rotation until the next successful health check
+                node.update(healthy=False, last_error=str(e))
+                node["consecutive_failures"] += 1
+                errors.append(f"{node['url']}: {e}")
+                logger.warning(f"Remote engine node {node['url']} failed a {engine_id} batch: {e}")
+                continue
+
+            node["batches"] += 1
+            if attempt:
+                node["failovers"] += 1
+            for result in results:
+                if isinstance(result, dict):
+                    result["node"] = node["name"] or node["url"]
+            return results
+
+        raise RuntimeError(f"All remote nodes failed for {engine_id}: {'; '.join(errors)}")
+
+    def stats(self) -> Dict:
+        return {
+            "nodes": [
+                {**node, "engines": {engine_id: sorted(pairs) for engine_id, pairs in node["engines"].items()}}
+                for node in self.nodes.values()
+            ],
+            "health_interval_s": settings.REMOTE_HEALTH_INTERVAL_S,
+        }
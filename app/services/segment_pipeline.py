@@ -0,0 +1,423 @@
+"""Pipelined segment processing for the synchronous request endpoints.
+
+A request's segments are cut into chunks of PIPELINE_CHUNK_SIZE source
+positions. Each chunk passes through four stages:
+
+    tm (fuzzy lookup) -> mt -> post (detokenize / collect) -> persist
+
+Each stage runs PIPELINE_<STAGE>_CONCURRENCY workers. Stages are joined by
+asyncio queues of PIPELINE_QUEUE_SIZE items, so a slow stage stalls the
+ones feeding it instead of buffering the whole request. Fuzzy lookups and
+DB writes for one chunk overlap model inference for another. In the
+single-engine path each target language has its own chunks, so targets
+run in parallel (the micro-batching scheduler merges their concurrent
+model calls).
+
+persist is ordered: it takes chunks in submission order, so rows are
+inserted in the same order as the sequential loops wrote them. A
+duplicate segment translated in an earlier chunk is filled from that
+chunk's result.
+
+Every stage records its service time and queue wait in latency
+histograms. They are kept per run (stored in the request's jobStats) and
+cumulatively (GET /api/debug/segment-pipeline).
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.bulk import BulkWriter
+from app.services.translation_jobs import (
+    fuzzy_suggestions,
+    multi_engine_string,
+    single_engine_string,
+    translate_single_engine,
+)
+from app.utils.dedup import dedupe
+from app.utils.text_processing import detokenize_japanese
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (max observed for the open bucket)."""
+        count = sum(self.counts)
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return float(LATENCY_BUCKETS_MS[index]) if index < len(LATENCY_BUCKETS_MS) else round(self.max_ms, 1)
+        return round(self.max_ms, 1)
+
+    def snapshot(self) -> Dict:
+        count = sum(self.counts)
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {
+            "count": count,
+            "avg_ms": round(self.total_ms / count, 2) if count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+# pipeline name -> stage -> {"service": histogram, "wait": histogram}, since startup
+_cumulative: Dict[str, Dict[str, Dict[str, LatencyHistogram]]] = {}
+_runs: Dict[str, int] = {}
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Dict], Awaitable[Any]], concurrency: int = 1, ordered: bool = False):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+        # Items enter the stage in submission order (later items wait for earlier ones)
+        self.ordered = ordered
+
+
+_DONE = object()
+
+
+class StagePipeline:
+    def __init__(self, name: str, stages: List[Stage], queue_size: Optional[int] = None):
+        self.name = name
+        self.stages = stages
+        self.queue_size = max(1, queue_size or settings.PIPELINE_QUEUE_SIZE)
+
+    async def run(self, items: List[Dict]) -> Dict:
+        """Push items (dicts, mutated in place by the stages) through every stage; returns run stats."""
+        histograms = {stage.name: {"service": LatencyHistogram(), "wait": LatencyHistogram()} for stage in self.stages}
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        tasks: List[asyncio.Task] = []
+        started = time.perf_counter()
+
+        def consumers(index: int) -> int:
+            # An ordered stage is fed through a single reorder task
+            return 1 if self.stages[index].ordered else self.stages[index].concurrency
+
+        async def feed():
+            for seq, item in enumerate(items):
+                await queues[0].put((seq, item, time.perf_counter()))
+            for _ in range(consumers(0)):
+                await queues[0].put(_DONE)
+
+        async def reorder(inbox: asyncio.Queue, outbox: asyncio.Queue, workers: int):
+            pending, next_seq = {}, 0
+            while True:
+                entry = await inbox.get()
+                if entry is _DONE:
+                    break
+                pending[entry[0]] = entry
+                while next_seq in pending:
+                    await outbox.put(pending.pop(next_seq))
+                    next_seq += 1
+            for _ in range(workers):
+                await outbox.put(_DONE)
+
+        async def work(stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+            while True:
+                entry = await inbox.get()
+                if entry is _DONE:
+                    return
+                seq, item, queued_at = entry
+                begin = time.perf_counter()
+                histograms[stage.name]["wait"].observe((begin - queued_at) * 1000)
+                await stage.fn(item)
+                done = time.perf_counter()
+                histograms[stage.name]["service"].observe((done - begin) * 1000)
+                if outbox is not None:
+                    await outbox.put((seq, item, done))
+
+        async def run_stage(index: int, stage: Stage):
+            inbox = queues[index]
+            if stage.ordered:
+                inbox = asyncio.Queue(maxsize=self.queue_size)
+                tasks.append(asyncio.create_task(reorder(queues[index], inbox, stage.concurrency)))
+            outbox = queues[index + 1] if index + 1 < len(self.stages) else None
+            workers = [asyncio.create_task(work(stage, inbox, outbox)) for _ in range(stage.concurrency)]
+            tasks.extend(workers)
+            await asyncio.gather(*workers)
+            if outbox is not None:
+                for _ in range(consumers(index + 1)):
+                    await outbox.put(_DONE)
+
+        runners = [asyncio.create_task(feed())]
+        runners += [asyncio.create_task(run_stage(i, stage)) for i, stage in enumerate(self.stages)]
+        tasks.extend(runners)
+        try:
+            await asyncio.gather(*runners)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        wall_ms = (time.perf_counter() - started) * 1000
+        cumulative = _cumulative.setdefault(self.name, {})
+        for stage_name, pair in histograms.items():
+            totals = cumulative.setdefault(stage_name, {"service": LatencyHistogram(), "wait": LatencyHistogram()})
+            totals["service"].merge(pair["service"])
+            totals["wait"].merge(pair["wait"])
+        _runs[self.name] = _runs.get(self.name, 0) + 1
+
+        return {
+            "items": len(items),
+            "wall_ms": round(wall_ms, 1),
+            "stages": {
+                stage.name: {
+                    "concurrency": stage.concurrency,
+                    "service": histograms[stage.name]["service"].snapshot(),
+                    "wait": histograms[stage.name]["wait"].snapshot(),
+                }
+                for stage in self.stages
+            },
+        }
+
+
+def pipeline_stats() -> Dict:
+    return {
+        "config": {
+            "chunk_size": settings.PIPELINE_CHUNK_SIZE,
+            "queue_size": settings.PIPELINE_QUEUE_SIZE,
+            "concurrency": {
+                "tm": settings.PIPELINE_TM_CONCURRENCY,
+                "mt": settings.PIPELINE_MT_CONCURRENCY,
+                "post": settings.PIPELINE_POST_CONCURRENCY,
+                "persist": settings.PIPELINE_PERSIST_CONCURRENCY,
+            },
+        },
+        "pipelines": {
+            name: {
+                "runs": _runs.get(name, 0),
+                "stages": {
+                    stage: {"service": pair["service"].snapshot(), "wait": pair["wait"].snapshot()}
+                    for stage, pair in stages.items()
+                },
+            }
+            for name, stages in _cumulative.items()
+        },
+    }
+
+
+def _chunks(segment_index: List[int]) -> List[Dict]:
+    """Position ranges of PIPELINE_CHUNK_SIZE with the unique-text range each introduces.
+
+    dedupe numbers texts in first-occurrence order, so the unique texts first
+    seen in a position range are one contiguous index range.
+    """
+    chunks = []
+    seen = 0
+    for start in range(0, len(segment_index), settings.PIPELINE_CHUNK_SIZE):
+        end = min(start + settings.PIPELINE_CHUNK_SIZE, len(segment_index))
+        upto = max(seen, max(segment_index[start:end]) + 1)
+        chunks.append({"positions": (start, end), "unique": (seen, upto)})
+        seen = upto
+    return chunks
+
+
+def _stages(tm, mt, post, persist) -> List[Stage]:
+    return [
+        Stage("tm", tm, settings.PIPELINE_TM_CONCURRENCY),
+        Stage("mt", mt, settings.PIPELINE_MT_CONCURRENCY),
+        Stage("post", post, settings.PIPELINE_POST_CONCURRENCY),
+        Stage("persist", persist, settings.PIPELINE_PERSIST_CONCURRENCY, ordered=True),
+    ]
+
+
+async def run_single_engine_request(
+    request_id: str,
+    source_texts: List[str],
+    source_language: str,
+    target_languages: List[str],
+    engine_codes: Dict[str, str],
+    fuzzy_matcher,
+    multi_engine_service,
+    on_persisted: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+) -> Dict:
+    """Translate and store every (target, segment) of a single-engine request.
+
+    on_persisted gets the ids of each chunk's rows once they are written.
+    Returns unique segment count, summed MT time and the pipeline run stats.
+    """
+    unique_texts, segment_index = dedupe(source_texts)
+    stripped = [text.strip() for text in unique_texts]
+    size = len(unique_texts)
+    state = {
+        target: {"fuzzy": [None] * size, "suggestion": [None] * size, "translated": [None] * size,
+                 "intermediate": [None] * size, "error": [None] * size, "ms": [0] * size}
+        for target in target_languages
+    }
+    items = [{"target": target, **chunk} for target in target_languages for chunk in _chunks(segment_index)]
+
+    async def tm(item):
+        u0, u1 = item["unique"]
+        if u0 == u1:
+            return
+        target = state[item["target"]]
+        target["fuzzy"][u0:u1], target["suggestion"][u0:u1] = await fuzzy_suggestions(
+            fuzzy_matcher, unique_texts[u0:u1], item["target"], source_language
+        )
+
+    async def mt(item):
+        u0, u1 = item["unique"]
+        item["translated"], item["intermediate"], item["error"], item["batch_ms"] = (None, None, None, 0)
+        if u0 == u1:
+            return
+        item["translated"], item["intermediate"], item["error"], item["batch_ms"] = await translate_single_engine(
+            multi_engine_service, stripped[u0:u1], source_language, item["target"],
+            engine_codes[source_language], engine_codes[item["target"]], detokenize=False,
+        )
+
+    async def post(item):
+        u0, u1 = item["unique"]
+        target = state[item["target"]]
+        translated = item["translated"]
+        if translated is not None and item["target"].upper() == 'JP':
+            translated = [t if isinstance(t, Exception) else detokenize_japanese(t) for t in translated]
+        start, end = item["positions"]
+        # The chunk shares one wall-clock window; attribute it evenly per segment
+        per_segment = item["batch_ms"] // max(end - start, 1)
+        for offset, u in enumerate(range(u0, u1)):
+            target["translated"][u] = translated[offset] if translated is not None else None
+            target["intermediate"][u] = item["intermediate"][offset] if item["intermediate"] is not None else None
+            target["error"][u] = item["error"]
+            target["ms"][u] = per_segment
+
+    async def persist(item):
+        target_lang = item["target"]
+        target = state[target_lang]
+        strings = BulkWriter("translationstring")
+        start, end = item["positions"]
+        ids = []
+        for position in range(start, end):
+            u = segment_index[position]
+            ids.append(await strings.add(single_engine_string(
+                source_texts[position].strip(), target_lang, request_id, target["ms"][u],
+                target["translated"][u], target["intermediate"][u],
+                target["fuzzy"][u], target["suggestion"][u], target["error"][u],
+            ), with_id=True))
+        await strings.flush()
+        if on_persisted is not None:
+            await on_persisted(ids)
+
+    logger.info(
+        f"Pipeline: {len(unique_texts)} unique of {len(source_texts)} texts x "
+        f"{len(target_languages)} target(s) in {len(items)} chunk(s)"
+    )
+    run = await StagePipeline("single_engine", _stages(tm, mt, post, persist)).run(items)
+    return {
+        "unique_segments": size,
+        "processing_time_ms": sum(item.get("batch_ms", 0) for item in items),
+        "pipeline": run,
+    }
+
+
+async def run_multi_engine_request(
+    request_id: str,
+    source_texts: List[str],
+    source_language: str,
+    target_languages: List[str],
+    engine_codes: Dict[str, str],
+    engines: Optional[List[str]],
+    style_guide,
+    fuzzy_matcher,
+    multi_engine_service,
+    on_persisted: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+) -> Dict:
+    """Translate and store every (target, segment) of a multi-engine request.
+
+    MT runs once per chunk for all targets (shared NLLB encoding); fuzzy
+    lookups for the targets run concurrently. on_persisted gets the ids of
+    each chunk's rows once they are written. Returns unique segment count,
+    engines per segment and the pipeline run stats.
+    """
+    unique_texts, segment_index = dedupe(source_texts)
+    size = len(unique_texts)
+    target_codes = list(dict.fromkeys(engine_codes[target] for target in target_languages))
+    fuzzy = {target: ([None] * size, [None] * size) for target in target_languages}
+    results = {code: [None] * size for code in target_codes}
+    engines_per_segment = 0
+    items = _chunks(segment_index)
+
+    async def tm(item):
+        u0, u1 = item["unique"]
+        if u0 == u1:
+            return
+        lookups = await asyncio.gather(*[
+            fuzzy_suggestions(fuzzy_matcher, unique_texts[u0:u1], target, source_language)
+            for target in target_languages
+        ])
+        for target, (matches, suggestions) in zip(target_languages, lookups):
+            fuzzy[target][0][u0:u1] = matches
+            fuzzy[target][1][u0:u1] = suggestions
+
+    async def mt(item):
+        u0, u1 = item["unique"]
+        item["results"] = {}
+        if u0 == u1:
+            return
+        item["results"] = await multi_engine_service.translate_multi_engine_multi_target(
+            unique_texts[u0:u1], engine_codes[source_language], target_codes, engines, style_guide=style_guide,
+        )
+
+    async def post(item):
+        nonlocal engines_per_segment
+        u0, _ = item["unique"]
+        for code, per_text in item["results"].items():
+            results[code][u0:u0 + len(per_text)] = per_text
+            if per_text:
+                engines_per_segment = max(engines_per_segment, len(per_text[0]))
+
+    async def persist(item):
+        strings = BulkWriter("translationstring")
+        start, end = item["positions"]
+        ids = []
+        for target_lang in target_languages:
+            per_text = results[engine_codes[target_lang]]
+            matches, suggestions = fuzzy[target_lang]
+            for position in range(start, end):
+                u = segment_index[position]
+                ids.append(await strings.add(multi_engine_string(
+                    source_texts[position], target_lang, request_id, per_text[u] or [], matches[u], suggestions[u],
+                ), with_id=True))
+        await strings.flush()
+        if on_persisted is not None:
+            await on_persisted(ids)
+
+    logger.info(
+        f"Pipeline: {len(unique_texts)} unique of {len(source_texts)} texts to "
+        f"{', '.join(target_languages)} in {len(items)} chunk(s)"
+    )
+    run = await StagePipeline("multi_engine", _stages(tm, mt, post, persist)).run(items)
+    return {
+        "unique_segments": size,
+        "engines_per_segment": engines_per_segment,
+        "pipeline": run,
+    }
@@ -1,12 +1,23 @@
+import hashlib
+import json
 import logging
 import os
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Union
 import asyncio
 
 import yaml
 from google import genai
+from app.core.config import settings
 from app.utils.lang_pair import normalize_lang_pair
+from app.services.gemini_rate_limiter import (
+    INTERACTIVE, estimate_request_tokens, gemini_rate_limiter, is_rate_limit_error,
+)
+from app.utils.batching import estimate_tokens
 from google.genai import types
 
 logger = logging.getLogger(__name__)
@@ -14,12 +25,99 @@ logger = logging.getLogger(__name__)
 _CONFIG_DIR = Path(__file__).parent.parent.parent / "config" / "transcreation"
 
 DEFAULT_MODEL = "gemini-3.1-flash-lite"
+_MAX_OUTPUT_TOKENS = 1024
+# Context caches are recreated this long before their TTL runs out
+_CONTEXT_CACHE_RENEW_S = 60
+
+_BATCH_INSTRUCTIONS = (
+    "The user message is a JSON array of objects with an integer \"id\" and a source \"text\". "
+    "Translate each text independently, following the instructions above. "
+    "Respond with a JSON array only, holding exactly one {\"id\": <same id>, \"text\": <translation>} "
+    "object per input object. No markdown, explanations or extra keys."
+)
+
+
+def _parse_batch_response(raw: str, expected: int) -> dict[int, str]:
+    """id -> translation from a batch response; ids outside range(expected) are ignored."""
+    raw = re.sub(r"^```(?:json)?\s*", "", raw.strip())
+    raw = re.sub(r"\s*```$", "", raw)
+    parsed = json.loads(raw)
+    if isinstance(parsed, dict):
+        parsed = next((value for value in parsed.values() if isinstance(value, list)), [])
+    translated: dict[int, str] = {}
+    for item in parsed if isinstance(parsed, list) else []:
+        if not isinstance(item, dict) or not isinstance(item.get("text"), str):
+            continue
+        try:
+            item_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        text = item["text"].strip()
+        if 0 <= item_id < expected and item_id not in translated and text:
+            translated[item_id] = text
+    return translated
+
+
+def _user_content(text: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=text.strip())])
+
+
+def _is_stale_cache_error(exc: Exception) -> bool:
+    text = str(exc)
+    return "cache" in text.lower() and any(marker in text for marker in ("404", "NOT_FOUND", "expired", "PERMISSION_DENIED"))
+
+
+def _is_uncacheable_error(exc: Exception) -> bool:
+    """Whether caches.create failed for good: the model cannot cache, or the prefix is below its minimum."""
+    text = str(exc).lower()
+    return any(marker in text for marker in (
+        "too small", "min_total_token_count", "not supported", "does not support", "unsupported",
+    ))
+
+
+def _prompt_key(source_lang: str, target_lang: str, style_guide=None) -> tuple:
+    """Compiled-prompt cache key: the pair, plus the guide's id and version.
+
+    Term edits do not bump the guide's updatedAt, so its terms are part of the key.
+    """
+    pair = (source_lang.lower(), target_lang.lower())
+    if style_guide is None:
+        return pair
+    terms = tuple((t.term, str(t.type), t.targetTerm) for t in (style_guide.terms or []))
+    return pair + (style_guide.id, style_guide.updatedAt.isoformat(), terms)
+
+
+class _CompiledPrompt:
+    """System prompt and few-shot prefix for one (pair profile, style guide version).
+
+    prefixes maps a mode ("single" segment or JSON "batch") to its
+    (system prompt, few-shot contents). context_caches maps a mode to its Gemini
+    cached-content entry, or False once caching was found unusable for it.
+    """
+
+    __slots__ = ("model", "label", "guide_id", "prefixes", "build_ms", "context_caches", "lock")
+
+    def __init__(self, model: str, label: str, guide_id: Optional[str], prefixes: dict, build_ms: float):
+        self.model = model
+        self.label = label
+        self.guide_id = guide_id
+        self.prefixes = prefixes
+        self.build_ms = build_ms
+        self.context_caches: dict = {}
+        self.lock = asyncio.Lock()
 
 
 class TranscreationService:
     def __init__(self, config_dir: Path = _CONFIG_DIR):
         self._profiles: dict[str, dict] = {}
         self._client: Optional[genai.Client] = None
+        self._prompts: "OrderedDict[tuple, _CompiledPrompt]" = OrderedDict()
+        self._prompt_hits = 0
+        self._prompt_misses = 0
+        self._context_caches_created = 0
+        self._prompt_tokens = 0
+        self._cached_tokens = 0
+        self._calls: deque = deque(maxlen=100)
         self._load_profiles(config_dir)
         self._init_client()
 
@@ -63,42 +161,13 @@ class TranscreationService:
     def supported_pairs(self) -> list[str]:
         return list(self._profiles.keys())
 
-    async def transcreate(self, text: str, source_lang: str, target_lang: str) -> str:
+    async def transcreate(self, text: str, source_lang: str, target_lang: str, priority: str = INTERACTIVE) -> str:
         """Transcreate using the static YAML profile for this language pair."""
-        if not self._client:
-            raise RuntimeError("Gemini client not initialised — check GEMINI_API_KEY.")
+        prompt, build_ms = self._compile(source_lang, target_lang)
 
-        pair = normalize_lang_pair(f"{source_lang}-{target_lang}")
-        profile = self._profiles.get(pair)
-        if not profile:
-            raise ValueError(f"No transcreation profile for pair '{pair}'.")
-
-        system_prompt = profile.get("system_prompt", "").strip()
-        golden_records = profile.get("golden_records") or []
-        model = profile.get("model", DEFAULT_MODEL)
-
-        contents: list[types.Content] = []
-        for record in golden_records:
-            src = record.get("source", "").strip()
-            tgt = record.get("target", "").strip()
-            if src and tgt:
-                contents.append(types.Content(role="user", parts=[types.Part(text=src)]))
-                contents.append(types.Content(role="model", parts=[types.Part(text=tgt)]))
-
-        contents.append(types.Content(role="user", parts=[types.Part(text=text.strip())]))
-
-        logger.info(f"TranscreationService: calling {model} for '{pair}' ({len(golden_records)} golden records)")
-        await asyncio.sleep(4)
-        response = self._client.models.generate_content(
-            model=model,
-            contents=contents,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                max_output_tokens=1024,
-            ),
-        )
-        result = response.text.strip()
-        logger.info(f"TranscreationService: received {len(result)} chars for '{pair}'.")
+        logger.info(f"TranscreationService: calling {prompt.model} for {prompt.label}")
+        result = await self._generate(prompt, "single", [_user_content(text)], prompt.label, priority, build_ms)
+        logger.info(f"TranscreationService: received {len(result)} chars for {prompt.label}.")
         return result
 
     async def transcreate_with_style_guide(
@@ -107,6 +176,7 @@ class TranscreationService:
         source_lang: str,
         target_lang: str,
         style_guide,
+        priority: str = INTERACTIVE,
     ) -> str:
         """Transcreate using a StyleGuide ORM object as the constraint source.
 
@@ -114,39 +184,436 @@ class TranscreationService:
         injects them as a structured system prompt, and uses the YAML golden
         records for the pair (if they exist) as few-shot examples.
         """
+        prompt, build_ms = self._compile(source_lang, target_lang, style_guide)
+
+        logger.info(f"TranscreationService [{prompt.label}]: calling {prompt.model}")
+        result = await self._generate(prompt, "single", [_user_content(text)], prompt.label, priority, build_ms)
+        logger.info(f"TranscreationService [{prompt.label}]: received {len(result)} chars.")
+        return result
+
+    async def transcreate_batch(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        style_guide=None,
+        priority: str = INTERACTIVE,
+    ) -> List[Union[str, Exception]]:
+        """Transcreate many segments, several per request.
+
+        Segments are packed into JSON arrays of {"id", "text"} objects, bounded by
+        TRANSCREATION_BATCH_SIZE segments and TRANSCREATION_BATCH_MAX_TOKENS
+        estimated source tokens, and Gemini answers with an array of the same
+        ids. The golden records go in once per request, as one JSON example turn.
+        Segments missing from a misaligned, empty or unparseable response are
+        retried in halves, down to single-segment transcreate calls. A request
+        that fails outright (transport, rate-limit or auth error) would fail the
+        halves the same way, so its exception is returned for every segment in
+        it. A segment that still fails is returned as its exception, in place.
+        """
+        prompt, build_ms = self._compile(source_lang, target_lang, style_guide)
+        label = prompt.label
+        results: List[Union[str, Exception, None]] = [None] * len(texts)
+
+        async def run(indices: List[int]):
+            if len(indices) == 1:
+                index = indices[0]
+                try:
+                    if style_guide is not None:
+                        results[index] = await self.transcreate_with_style_guide(
+                            texts[index], source_lang, target_lang, style_guide, priority
+                        )
+                    else:
+                        results[index] = await self.transcreate(texts[index], source_lang, target_lang, priority)
+                except Exception as e:
+                    results[index] = e
+                return
+
+            payload = [{"id": n, "text": texts[index].strip()} for n, index in enumerate(indices)]
+            source_tokens = sum(estimate_tokens(item["text"]) for item in payload)
+            max_output_tokens = min(
+                settings.TRANSCREATION_BATCH_MAX_OUTPUT_TOKENS, _MAX_OUTPUT_TOKENS + 3 * source_tokens
+            )
+            try:
+                raw = await self._generate(
+                    prompt, "batch", [_user_content(json.dumps(payload, ensure_ascii=False))],
+                    f"{label}, batch of {len(indices)}", priority, build_ms,
+                    max_output_tokens=max_output_tokens, response_mime_type="application/json",
+                )
+                translated = _parse_batch_response(raw, len(indices))
+            except ValueError as e:
+                # Empty or malformed JSON (json.JSONDecodeError is a ValueError): smaller batches may parse
+                logger.warning(f"TranscreationService [{label}]: batch of {len(indices)} unparseable ({e}); splitting.")
+                translated = {}
+            except Exception as e:
+                logger.error(f"TranscreationService [{label}]: batch of {len(indices)} failed ({e}).")
+                for index in indices:
+                    results[index] = e
+                return
+
+            missing = []
+            for n, index in enumerate(indices):
+                if n in translated:
+                    results[index] = translated[n]
+                else:
+                    missing.append(index)
+            if missing:
+                if translated:
+                    logger.warning(
+                        f"TranscreationService [{label}]: {len(missing)}/{len(indices)} segment(s) "
+                        f"missing from the batch response; retrying them."
+                    )
+                half = (len(missing) + 1) // 2
+                await run(missing[:half])
+                if missing[half:]:
+                    await run(missing[half:])
+
+        batches = self._pack_batches(texts)
+        logger.info(f"TranscreationService [{label}]: {len(texts)} segment(s) in {len(batches)} request(s) to {prompt.model}")
+        await asyncio.gather(*[run(batch) for batch in batches])
+        return results
+
+    @staticmethod
+    def _pack_batches(texts: List[str]) -> List[List[int]]:
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for index, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (
+                len(current) >= settings.TRANSCREATION_BATCH_SIZE
+                or current_tokens + tokens > settings.TRANSCREATION_BATCH_MAX_TOKENS
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def transcreate_stream(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        style_guide=None,
+    ) -> AsyncIterator[str]:
+        """Stream a transcreation as text chunks while Gemini generates it.
+
+        Same prompt as transcreate / transcreate_with_style_guide, at interactive
+        priority: streaming is reviewer-driven and time-to-first-token is the
+        point of this path.
+        """
+        prompt, build_ms = self._compile(source_lang, target_lang, style_guide)
+        label = prompt.label
+        model = prompt.model
+        cache_name = await self._context_cache(prompt, "single", INTERACTIVE)
+        contents, config = self._request(prompt, "single", [_user_content(text)], cache_name, _MAX_OUTPUT_TOKENS)
+        tokens = self._estimate_tokens(prompt, "single", contents, _MAX_OUTPUT_TOKENS)
+
+        logger.info(f"TranscreationService [{label}]: streaming from {model}")
+        await gemini_rate_limiter.acquire(model, tokens, INTERACTIVE)
+        try:
+            stream = await asyncio.wait_for(
+                self._client.aio.models.generate_content_stream(model=model, contents=contents, config=config),
+                timeout=settings.TRANSCREATION_TIMEOUT_S,
+            )
+            usage = None
+            async for chunk in stream:
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    yield chunk.text
+        except Exception as exc:
+            if is_rate_limit_error(exc):
+                gemini_rate_limiter.report_429(model, exc)
+            elif cache_name and _is_stale_cache_error(exc):
+                # Recreated on the next call
+                prompt.context_caches.pop("single", None)
+            raise
+        gemini_rate_limiter.report_success(model, getattr(usage, "total_token_count", None), tokens)
+        self._record_call(prompt, "single", label, build_ms, usage, cache_name)
+
+    async def _generate(
+        self,
+        prompt: "_CompiledPrompt",
+        mode: str,
+        new_contents: list,
+        label: str,
+        priority: str,
+        build_ms: float,
+        max_output_tokens: int = _MAX_OUTPUT_TOKENS,
+        response_mime_type: Optional[str] = None,
+    ) -> str:
+        """One rate-limited generate_content call; 429s are retried by the limiter.
+
+        Sends only new_contents when the prompt's prefix is held in a Gemini
+        context cache. Raises asyncio.TimeoutError after TRANSCREATION_TIMEOUT_S
+        per attempt.
+        """
+        cache_name = await self._context_cache(prompt, mode, priority)
+
+        async def request():
+            contents, config = self._request(
+                prompt, mode, new_contents, cache_name, max_output_tokens, response_mime_type
+            )
+            # Async client: the round trip never blocks the event loop, and cancelling
+            # the caller (or hitting the timeout) cancels the HTTP request itself
+            return await asyncio.wait_for(
+                self._client.aio.models.generate_content(model=prompt.model, contents=contents, config=config),
+                timeout=settings.TRANSCREATION_TIMEOUT_S,
+            )
+
+        tokens = self._estimate_tokens(prompt, mode, new_contents, max_output_tokens)
+        try:
+            response = await gemini_rate_limiter.run(prompt.model, request, tokens=tokens, priority=priority, label=label)
+        except Exception as exc:
+            if not cache_name or not _is_stale_cache_error(exc):
+                raise
+            # Context cache expired or was deleted server-side: send the full prompt this time
+            logger.info(f"TranscreationService [{label}]: context cache {cache_name} gone ({exc}); resending prefix.")
+            prompt.context_caches.pop(mode, None)
+            cache_name = None
+            response = await gemini_rate_limiter.run(prompt.model, request, tokens=tokens, priority=priority, label=label)
+        self._record_call(prompt, mode, label, build_ms, getattr(response, "usage_metadata", None), cache_name)
+        if response.text is None:
+            # Blocked or cut off before any text
+            raise ValueError(f"Empty response from {prompt.model}")
+        return response.text.strip()
+
+    @staticmethod
+    def _request(prompt: "_CompiledPrompt", mode: str, new_contents: list, cache_name: Optional[str],
+                 max_output_tokens: int, response_mime_type: Optional[str] = None):
+        """(contents, config) for one call, with or without the cached prefix."""
+        if cache_name:
+            return new_contents, types.GenerateContentConfig(
+                cached_content=cache_name,
+                max_output_tokens=max_output_tokens,
+                response_mime_type=response_mime_type,
+            )
+        system_prompt, prefix = prompt.prefixes[mode]
+        return prefix + new_contents, types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            max_output_tokens=max_output_tokens,
+            response_mime_type=response_mime_type,
+        )
+
+    @staticmethod
+    def _estimate_tokens(prompt: "_CompiledPrompt", mode: str, new_contents: list, max_output_tokens: int) -> int:
+        # Cached prefix tokens still count towards the TPM quota
+        system_prompt, prefix = prompt.prefixes[mode]
+        texts = [part.text for content in prefix + new_contents for part in (content.parts or []) if part.text]
+        return estimate_request_tokens(system_prompt, *texts, max_output_tokens=max_output_tokens)
+
+    # ------------------------------------------------------------------
+    # Compiled prompts and context caches
+    # ------------------------------------------------------------------
+
+    def _compile(self, source_lang: str, target_lang: str, style_guide=None) -> tuple["_CompiledPrompt", float]:
+        """Compiled prompt for (pair profile, style guide version) and the ms spent getting it.
+
+        Without a style guide the pair's YAML profile is required; with one, the
+        guide supplies the system prompt and the profile (if any) the golden records.
+        """
         if not self._client:
             raise RuntimeError("Gemini client not initialised — check GEMINI_API_KEY.")
 
-        pair = normalize_lang_pair(f"{source_lang}-{target_lang}")
-        yaml_profile = self._profiles.get(pair)
-        model = (yaml_profile or {}).get("model", DEFAULT_MODEL)
-        golden_records = (yaml_profile or {}).get("golden_records") or []
+        started = time.perf_counter()
+        key = _prompt_key(source_lang, target_lang, style_guide)
+        prompt = self._prompts.get(key)
+        if prompt is not None:
+            self._prompts.move_to_end(key)
+            self._prompt_hits += 1
+            return prompt, (time.perf_counter() - started) * 1000
 
-        system_prompt = self._build_style_guide_prompt(style_guide, source_lang, target_lang)
+        pair = normalize_lang_pair(f"{source_lang}-{target_lang}")
+        profile = self._profiles.get(pair)
+        if style_guide is None:
+            if not profile:
+                raise ValueError(f"No transcreation profile for pair '{pair}'.")
+            system_prompt = profile.get("system_prompt", "").strip()
+            label = f"'{pair}' ({len((profile or {}).get('golden_records') or [])} golden records)"
+        else:
+            system_prompt = self._build_style_guide_prompt(style_guide, source_lang, target_lang)
+            label = f"style_guide={style_guide.name}"
+        model = (profile or {}).get("model", DEFAULT_MODEL)
 
-        contents: list[types.Content] = []
-        for record in golden_records:
+        examples = []
+        for record in (profile or {}).get("golden_records") or []:
             src = record.get("source", "").strip()
             tgt = record.get("target", "").strip()
             if src and tgt:
-                contents.append(types.Content(role="user", parts=[types.Part(text=src)]))
-                contents.append(types.Content(role="model", parts=[types.Part(text=tgt)]))
+                examples.append((src, tgt))
 
-        contents.append(types.Content(role="user", parts=[types.Part(text=text.strip())]))
+        single_prefix: list[types.Content] = []
+        for src, tgt in examples:
+            single_prefix.append(types.Content(role="user", parts=[types.Part(text=src)]))
+            single_prefix.append(types.Content(role="model", parts=[types.Part(text=tgt)]))
+        batch_prefix: list[types.Content] = []
+        if examples:
+            # Golden records as one JSON example exchange in the batch format
+            sources = [{"id": n, "text": src} for n, (src, _) in enumerate(examples)]
+            targets = [{"id": n, "text": tgt} for n, (_, tgt) in enumerate(examples)]
+            batch_prefix.append(_user_content(json.dumps(sources, ensure_ascii=False)))
+            batch_prefix.append(types.Content(role="model", parts=[types.Part(text=json.dumps(targets, ensure_ascii=False))]))
 
-        logger.info(f"TranscreationService [style_guide={style_guide.name}]: calling {model} for '{pair}'")
-        await asyncio.sleep(4)
-        response = self._client.models.generate_content(
+        build_ms = (time.perf_counter() - started) * 1000
+        prompt = _CompiledPrompt(
             model=model,
-            contents=contents,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                max_output_tokens=1024,
-            ),
+            label=label,
+            guide_id=getattr(style_guide, "id", None),
+            prefixes={
+                "single": (system_prompt, single_prefix),
+                "batch": (f"{system_prompt}\n\n{_BATCH_INSTRUCTIONS}", batch_prefix),
+            },
+            build_ms=build_ms,
         )
-        result = response.text.strip()
-        logger.info(f"TranscreationService [style_guide={style_guide.name}]: received {len(result)} chars.")
-        return result
+        self._prompts[key] = prompt
+        self._prompt_misses += 1
+        while len(self._prompts) > settings.TRANSCREATION_PROMPT_CACHE_SIZE:
+            # Evicted context caches are left to expire on their TTL
+            self._prompts.popitem(last=False)
+        return prompt, build_ms
+
+    async def _context_cache(self, prompt: "_CompiledPrompt", mode: str, priority: str = INTERACTIVE) -> Optional[str]:
+        """Name of a Gemini cached-content resource holding the prompt's prefix, if usable.
+
+        Created on first use when the estimated prefix reaches
+        TRANSCREATION_CONTEXT_CACHE_MIN_TOKENS (Gemini rejects smaller caches)
+        and renewed shortly before its TTL runs out. caches.create goes through
+        the shared rate limiter. A model that cannot cache, or a prefix Gemini
+        finds too small, marks the prompt as uncacheable for that mode; other
+        failures (timeouts, 429s, 5xx) only skip the cache for this call.
+        """
+        if not settings.TRANSCREATION_CONTEXT_CACHE:
+            return None
+        entry = prompt.context_caches.get(mode)
+        if entry is False:
+            return None
+        if entry and entry["expires_at"] - _CONTEXT_CACHE_RENEW_S > time.time():
+            return entry["name"]
+
+        system_prompt, prefix = prompt.prefixes[mode]
+        prefix_tokens = self._estimate_tokens(prompt, mode, [], 0)
+        if prefix_tokens < settings.TRANSCREATION_CONTEXT_CACHE_MIN_TOKENS:
+            prompt.context_caches[mode] = False
+            return None
+
+        async with prompt.lock:
+            entry = prompt.context_caches.get(mode)
+            if entry and entry["expires_at"] - _CONTEXT_CACHE_RENEW_S > time.time():
+                return entry["name"]
+            ttl_s = int(settings.TRANSCREATION_CONTEXT_CACHE_TTL_S)
+
+            async def create():
+                return await asyncio.wait_for(
+                    self._client.aio.caches.create(
+                        model=prompt.model,
+                        config=types.CreateCachedContentConfig(
+                            system_instruction=system_prompt,
+                            contents=prefix,
+                            ttl=f"{ttl_s}s",
+                            display_name=f"transcreation {prompt.label} {mode}"[:128],
+                        ),
+                    ),
+                    timeout=settings.TRANSCREATION_TIMEOUT_S,
+                )
+
+            try:
+                # One attempt: on a 429 the request goes out uncached rather than waiting out a backoff
+                cache = await gemini_rate_limiter.run(
+                    prompt.model, create, tokens=prefix_tokens, priority=priority, max_retries=1,
+                    label=f"{prompt.label}, context cache",
+                )
+            except Exception as e:
+                if not _is_uncacheable_error(e):
+                    logger.warning(f"TranscreationService [{prompt.label}]: could not cache {mode} prompt prefix ({e}); retrying next call.")
+                    return None
+                logger.info(f"TranscreationService [{prompt.label}]: context caching unavailable for {mode} prompts ({e}).")
+                prompt.context_caches[mode] = False
+                return None
+            prompt.context_caches[mode] = {"name": cache.name, "expires_at": time.time() + ttl_s}
+            self._context_caches_created += 1
+            logger.info(f"TranscreationService [{prompt.label}]: cached {mode} prompt prefix as {cache.name}.")
+            return cache.name
+
+    def _record_call(self, prompt: "_CompiledPrompt", mode: str, label: str, build_ms: float, usage,
+                     cache_name: Optional[str]):
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        cached_tokens = getattr(usage, "cached_content_token_count", None)
+        self._prompt_tokens += prompt_tokens or 0
+        self._cached_tokens += cached_tokens or 0
+        self._calls.append({
+            "at": datetime.now().isoformat(),
+            "label": label,
+            "mode": mode,
+            "model": prompt.model,
+            "prompt_build_ms": round(build_ms, 3),
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "context_cache": cache_name,
+        })
+        logger.info(
+            f"TranscreationService [{label}]: prompt ready in {build_ms:.2f} ms, "
+            f"{prompt_tokens} prompt token(s), {cached_tokens or 0} from context cache."
+        )
+
+    def clear_prompt_cache(self):
+        """Drop compiled prompts (their context caches expire on their TTL)."""
+        self._prompts.clear()
+
+    def prompt_stats(self) -> dict:
+        now = time.time()
+        lookups = self._prompt_hits + self._prompt_misses
+        return {
+            "compiled_prompts": len(self._prompts),
+            "max_compiled_prompts": settings.TRANSCREATION_PROMPT_CACHE_SIZE,
+            "hits": self._prompt_hits,
+            "misses": self._prompt_misses,
+            "hit_rate": round(self._prompt_hits / lookups, 3) if lookups else 0.0,
+            "context_cache_enabled": settings.TRANSCREATION_CONTEXT_CACHE,
+            "context_caches_created": self._context_caches_created,
+            "prompt_tokens": self._prompt_tokens,
+            "cached_tokens": self._cached_tokens,
+            "prompts": [
+                {
+                    "label": prompt.label,
+                    "model": prompt.model,
+                    "build_ms": round(prompt.build_ms, 3),
+                    "context_caches": {
+                        mode: (
+                            {"name": entry["name"], "expires_in_s": round(entry["expires_at"] - now)}
+                            if entry else None
+                        )
+                        for mode, entry in prompt.context_caches.items()
+                    },
+                }
+                for prompt in self._prompts.values()
+            ],
+            "recent_calls": list(self._calls),
+        }
+
+    def cache_identity(self, source_lang: str, target_lang: str, style_guide=None) -> tuple[str, str]:
+        """(model key, revision) under which transcreation output is cached.
+
+        The revision hashes everything that shapes the output besides the source
+        text: system prompt, golden records and model — with a style guide, its
+        id, updatedAt and the rendered rules/terms prompt (term edits do not
+        bump the guide's updatedAt).
+        """
+        pair = normalize_lang_pair(f"{source_lang}-{target_lang}")
+        profile = self._profiles.get(pair) or {}
+        model = profile.get("model", DEFAULT_MODEL)
+        if style_guide is not None:
+            system_prompt = self._build_style_guide_prompt(style_guide, source_lang, target_lang)
+            version = f"{style_guide.id}@{style_guide.updatedAt.isoformat()}"
+        else:
+            system_prompt = profile.get("system_prompt", "").strip()
+            version = "profile"
+        fingerprint = hashlib.sha256(
+            json.dumps([system_prompt, profile.get("golden_records") or []], ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"GEMINI:{model}", f"{version}:{fingerprint}"
 
     # ------------------------------------------------------------------
     # Internal helpers
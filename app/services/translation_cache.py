@@ -0,0 +1,234 @@
+"""Content-addressed cache for machine translation output.
+
+Entries are keyed by (model key, model revision, source/target language,
+language tag, normalized source text). Lookups go through an in-process LRU
+first and fall back to a durable SQLite tier, so repeated UI labels,
+re-uploaded files and repeated WMT runs skip the engine entirely, across
+restarts too.
+
+The revision is part of the key, so changing a model's path, precision or a
+Gemini prompt (style-guide version) misses naturally. invalidate() drops
+entries for a model that was swapped in place under the same revision.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.utils.dedup import normalize_segment
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationCache:
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        db_path: Optional[str] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.enabled = settings.TRANSLATION_CACHE_ENABLED if enabled is None else enabled
+        self.max_entries = max_entries or settings.TRANSLATION_CACHE_SIZE
+        self.db_path = db_path if db_path is not None else settings.TRANSLATION_CACHE_PATH
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        if self.enabled and self.db_path:
+            self._open_db()
+
+    def _open_db(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            # Shared between the event loop and the GPU executor thread; guarded by self._lock
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translation_cache (
+                    key TEXT PRIMARY KEY,
+                    model_key TEXT NOT NULL,
+                    revision TEXT NOT NULL,
+                    source_lang TEXT,
+                    target_lang TEXT,
+                    lang_tag TEXT,
+                    source_text TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_translation_cache_model ON translation_cache (model_key)")
+            self._db.commit()
+            logger.info(f"Translation cache: durable tier at {self.db_path}")
+        except Exception as e:
+            logger.error(f"Translation cache: could not open {self.db_path} ({e}); running memory-only.")
+            self._db = None
+
+    @staticmethod
+    def make_key(
+        model_key: str,
+        revision: str,
+        source_lang: Optional[str],
+        target_lang: Optional[str],
+        lang_tag: Optional[str],
+        text: str,
+    ) -> str:
+        payload = json.dumps(
+            [model_key, revision, (source_lang or "").lower(), (target_lang or "").lower(),
+             lang_tag or "", normalize_segment(text)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    def get_many(
+        self,
+        texts: Sequence[str],
+        model_key: str,
+        revision: str,
+        source_lang: Optional[str] = None,
+        target_lang: Optional[str] = None,
+        lang_tag: Optional[str] = None,
+    ) -> List[Optional[str]]:
+        """Cached translation per text (None for misses), in input order."""
+        if not self.enabled:
+            return [None] * len(texts)
+        keys = [self.make_key(model_key, revision, source_lang, target_lang, lang_tag, t) for t in texts]
+        results: List[Optional[str]] = [None] * len(texts)
+        with self._lock:
+            disk_lookup = []
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    disk_lookup.append(i)
+
+            if disk_lookup and self._db is not None:
+                wanted = list({keys[i] for i in disk_lookup})
+                found: Dict[str, str] = {}
+                # Chunked to stay under SQLite's bound-parameter limit
+                for start in range(0, len(wanted), 500):
+                    chunk = wanted[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, translation FROM translation_cache WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    found.update(rows)
+                for i in disk_lookup:
+                    translation = found.get(keys[i])
+                    if translation is not None:
+                        results[i] = translation
+                        self.disk_hits += 1
+                        self._remember(keys[i], translation)
+                    else:
+                        self.misses += 1
+            else:
+                self.misses += len(disk_lookup)
+        return results
+
+    def put_many(
+        self,
+        texts: Sequence[str],
+        translations: Sequence[str],
+        model_key: str,
+        revision: str,
+        source_lang: Optional[str] = None,
+        target_lang: Optional[str] = None,
+        lang_tag: Optional[str] = None,
+    ):
+        """Store translations for texts. Empty results are not cached."""
+        if not self.enabled:
+            return
+        now = datetime.now().isoformat()
+        rows = []
+        with self._lock:
+            for text, translation in zip(texts, translations):
+                if not isinstance(translation, str) or not translation.strip():
+                    continue
+                key = self.make_key(model_key, revision, source_lang, target_lang, lang_tag, text)
+                self._remember(key, translation)
+                rows.append((key, model_key, revision, source_lang, target_lang, lang_tag,
+                             normalize_segment(text), translation, now))
+            self.stores += len(rows)
+            if rows and self._db is not None:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO translation_cache "
+                        "(key, model_key, revision, source_lang, target_lang, lang_tag, source_text, translation, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.error(f"Translation cache: durable write failed: {e}")
+
+    def _remember(self, key: str, translation: str):
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Invalidation / stats
+    # ------------------------------------------------------------------
+
+    def invalidate(self, model_key: Optional[str] = None) -> int:
+        """Drop cached output for one model key (e.g. after an in-place swap), or everything."""
+        with self._lock:
+            # Memory keys are hashes, so a per-model purge clears the whole LRU tier
+            self._memory.clear()
+            if self._db is None:
+                return 0
+            if model_key:
+                cursor = self._db.execute("DELETE FROM translation_cache WHERE model_key = ?", (model_key,))
+            else:
+                cursor = self._db.execute("DELETE FROM translation_cache")
+            self._db.commit()
+        logger.info(f"Translation cache: invalidated {cursor.rowcount} entr(y/ies) for {model_key or 'all models'}.")
+        return cursor.rowcount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            per_model = {}
+            disk_entries = 0
+            if self._db is not None:
+                per_model = dict(self._db.execute(
+                    "SELECT model_key, COUNT(*) FROM translation_cache GROUP BY model_key"
+                ).fetchall())
+                disk_entries = sum(per_model.values())
+            return {
+                "enabled": self.enabled,
+                "durable_path": self.db_path if self._db is not None else None,
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.max_entries,
+                "disk_entries": disk_entries,
+                "entries_by_model": per_model,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+translation_cache = TranslationCache()
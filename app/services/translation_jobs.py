@@ -0,0 +1,555 @@
+"""Durable background jobs for translation requests.
+
+POST /api/translation-requests/ and /multi-engine with ?async=true create the
+TranslationRequest, enqueue a TranslationJob row in Postgres and return at
+once. TranslationJobQueue runs JOB_WORKERS worker tasks per API process that
+claim QUEUED jobs and translate them in chunks of JOB_CHUNK_SIZE segments,
+writing TranslationString rows as each chunk finishes.
+
+Jobs survive restarts. A claimed job carries a heartbeat. A job whose
+heartbeat is older than JOB_STALE_AFTER_S (its process died) is reclaimed by
+any worker. Rows are written in source order per target, so the number of
+rows already stored for a target is where the job resumes. Claims are
+optimistic updates (id + status + attempts), so several API processes can
+share the queue.
+
+The segment helpers here are shared with the synchronous request path.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from prisma import Json
+
+from app.core.config import settings
+from app.db.base import prisma
+from app.db.bulk import BulkWriter
+from app.services.translation_service import translation_service
+from app.utils.dedup import dedup_stats, dedupe
+from app.utils.text_processing import detokenize_japanese, get_model_for_language_pair
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+
+
+# ----------------------------------------------------------------------
+# Segment helpers (shared with the synchronous endpoints)
+# ----------------------------------------------------------------------
+
+async def fuzzy_suggestions(fuzzy_matcher, texts: List[str], target_lang: str, source_language: str) -> Tuple[List, List]:
+    """(fuzzy matches, suggested translation or None) per text."""
+    matches_per_text = []
+    suggestions = []
+    for source_text in texts:
+        fuzzy_matches = await fuzzy_matcher.find_fuzzy_matches(source_text, target_lang, source_language)
+        suggested_translation = None
+        if fuzzy_matches and len(fuzzy_matches) > 0 and fuzzy_matches[0]["similarity"] > 0.9:
+            suggested_translation = fuzzy_matches[0]["target_text"]
+        matches_per_text.append(fuzzy_matches)
+        suggestions.append(suggested_translation)
+    return matches_per_text, suggestions
+
+
+async def translate_single_engine(
+    multi_engine_service,
+    texts: List[str],
+    source_language: str,
+    target_lang: str,
+    source_code: str,
+    target_code: str,
+    detokenize: bool = True,
+) -> Tuple[Optional[List[str]], Optional[List[str]], Optional[Exception], int]:
+    """(translations, pivot intermediates, error, batch ms) with the pair's default model.
+
+    error is set when the whole batch failed; a single failed segment is an
+    exception in translations instead.
+    """
+    model_to_use = get_model_for_language_pair(source_code, target_code)
+    start_time = datetime.now()
+    intermediate_texts = None
+    try:
+        lang_tag = None
+        model_info = next(
+            (info for info in translation_service.language_pair_models.get(f"{source_language.upper()}-{target_lang.upper()}", [])
+             if info[0] == model_to_use),
+            None,
+        )
+        if model_info and len(model_info) == 3:
+            lang_tag = model_info[2]
+
+        if model_to_use == 'PIVOT_ELAN_HELSINKI':
+            translated_texts, intermediate_texts = await multi_engine_service._translate_with_pivot_batch(
+                texts, source_code, target_code,
+                multi_engine_service.engine_configs['elan_quality']['pivot_strategy'],
+                return_intermediates=True,
+            )
+        else:
+            translated_texts = await multi_engine_service.run_model_batch(
+                texts, model_to_use, source_lang=source_code, target_lang=target_code, target_lang_tag=lang_tag,
+            )
+
+        if detokenize and target_lang.upper() == 'JP':
+            translated_texts = [t if isinstance(t, Exception) else detokenize_japanese(t) for t in translated_texts]
+        error = None
+    except Exception as e:
+        logger.error(f"Translation failed: {e}")
+        translated_texts = None
+        error = e
+    return translated_texts, intermediate_texts, error, int((datetime.now() - start_time).total_seconds() * 1000)
+
+
+def single_engine_string(
+    source_text: str,
+    target_lang: str,
+    request_id: str,
+    processing_time: int,
+    translated: Optional[str],
+    intermediate: Optional[str],
+    fuzzy_matches,
+    suggestion: Optional[str],
+    error: Optional[Exception],
+) -> Dict:
+    """TranslationString create data for one single-engine segment."""
+    if error is None and isinstance(translated, Exception):
+        error = translated
+    if error is not None:
+        return {
+            "sourceText": source_text,
+            "translatedText": f"Translation failed: {str(error)}",
+            "targetLanguage": target_lang,
+            "status": "DRAFT",
+            "isApproved": False,
+            "processingTimeMs": processing_time,
+            "translationRequestId": request_id,
+            "fuzzyMatches": Json([]),
+            "suggestedTranslation": None,
+        }
+    return {
+        "sourceText": source_text,
+        "translatedText": translated,
+        "targetLanguage": target_lang,
+        "status": "REVIEWED",
+        "isApproved": False,
+        "processingTimeMs": processing_time,
+        "translationRequestId": request_id,
+        "fuzzyMatches": Json(fuzzy_matches) if fuzzy_matches else Json([]),
+        "suggestedTranslation": suggestion,
+        **({
+            "translationType": "PIVOT",
+            "intermediateTranslation": intermediate,
+        } if intermediate is not None else {}),
+    }
+
+
+def multi_engine_string(
+    source_text: str,
+    target_lang: str,
+    request_id: str,
+    engine_results: List,
+    fuzzy_matches,
+    suggestion: Optional[str],
+) -> Dict:
+    """TranslationString create data for one multi-engine segment."""
+    # Copies: duplicate rows must not share (and re-detokenize) the same dicts
+    engine_results = [dict(r) if isinstance(r, dict) else r for r in engine_results]
+    if target_lang.upper() == 'JP':
+        for result in engine_results:
+            if isinstance(result, dict) and 'text' in result:
+                result['text'] = detokenize_japanese(result['text'])
+
+    # Row-level intermediate: first pivot engine's English (all pivots keep theirs in engineResults)
+    intermediate = next(
+        (r['intermediate_translation'] for r in engine_results
+         if isinstance(r, dict) and r.get('intermediate_translation')),
+        None,
+    )
+    return {
+        "sourceText": source_text.strip(),
+        "translatedText": "",
+        "intermediateTranslation": intermediate,
+        "targetLanguage": target_lang,
+        "status": "MULTI_ENGINE_REVIEW",
+        "isApproved": False,
+        "processingTimeMs": int(sum(r.get('processing_time', 0) for r in engine_results if isinstance(r, dict) and 'processing_time' in r)),
+        "translationRequestId": request_id,
+        "engineResults": Json(engine_results) if engine_results else Json([]),
+        "fuzzyMatches": Json(fuzzy_matches) if fuzzy_matches else Json([]),
+        "suggestedTranslation": suggestion,
+    }
+
+
+# ----------------------------------------------------------------------
+# Queue
+# ----------------------------------------------------------------------
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class TranslationJobQueue:
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.fuzzy_matcher = None
+        self.multi_engine_service = None
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        # job id -> this process's run: start time and segments already done at start
+        self._runs: Dict[str, Dict] = {}
+
+        self.completed = 0
+        self.failed = 0
+        self.resumed = 0
+
+    def set_services(self, fuzzy_matcher, multi_engine_service):
+        self.fuzzy_matcher = fuzzy_matcher
+        self.multi_engine_service = multi_engine_service
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        self._wake = asyncio.Event()
+        for index in range(settings.JOB_WORKERS):
+            self._tasks.append(asyncio.create_task(self._worker(index)))
+        logger.info(f"Translation job queue: {settings.JOB_WORKERS} worker(s) as {self.worker_id}.")
+
+    async def stop(self):
+        """Stop the workers and hand this process's running jobs back to the queue."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            # A shutdown is not a failed run: give back the attempt _claim counted
+            released = await prisma.translationjob.update_many(
+                where={"workerId": self.worker_id, "status": "RUNNING", "attempts": {"gt": 0}},
+                data={"status": "QUEUED", "workerId": None, "attempts": {"decrement": 1}},
+            )
+            if released:
+                logger.info(f"Translation job queue: released {released} running job(s) for resumption.")
+        except Exception as e:
+            logger.warning(f"Translation job queue: could not release running jobs ({e}); they resume once stale.")
+
+    async def enqueue(
+        self,
+        request_id: str,
+        kind: str,
+        source_language: str,
+        target_languages: List[str],
+        source_texts: List[str],
+        engine_codes: Dict[str, str],
+        engines: Optional[List[str]] = None,
+        style_guide_ids: Optional[List[str]] = None,
+    ):
+        """Persist a job for an already created TranslationRequest and wake a worker."""
+        job = await prisma.translationjob.create(
+            data={
+                "translationRequestId": request_id,
+                "kind": kind,
+                "payload": Json({
+                    "sourceLanguage": source_language,
+                    "targetLanguages": target_languages,
+                    "sourceTexts": source_texts,
+                    "engines": engines or [],
+                    "styleGuideIds": style_guide_ids or [],
+                    "engineCodes": engine_codes,
+                }),
+                "totalSegments": len(source_texts) * len(target_languages),
+            }
+        )
+        if self._wake is not None:
+            self._wake.set()
+        logger.info(f"Queued {kind} job {job.id} for request {request_id} ({job.totalSegments} segment(s)).")
+        return job
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Translation job worker {index}: claim failed: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=settings.JOB_POLL_INTERVAL_S)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            await self._run(job)
+
+    async def _claim(self):
+        """Claim the oldest runnable job: QUEUED, or RUNNING with a stale heartbeat."""
+        now = _now()
+        stale = now - timedelta(seconds=settings.JOB_STALE_AFTER_S)
+        candidates = await prisma.translationjob.find_many(
+            where={"OR": [
+                {"status": "QUEUED"},
+                {"status": "RUNNING", "heartbeatAt": {"lt": stale}},
+            ]},
+            order={"createdAt": "asc"},
+            take=5,
+        )
+        for job in candidates:
+            if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+                await prisma.translationjob.update_many(
+                    where={"id": job.id, "attempts": job.attempts, "status": job.status},
+                    data={"status": "FAILED", "finishedAt": now,
+                          "error": job.error or f"Gave up after {job.attempts} attempt(s)"},
+                )
+                await self._finish_request(job, failed=True)
+                continue
+            claimed = await prisma.translationjob.update_many(
+                where={"id": job.id, "status": job.status, "attempts": job.attempts},
+                data={
+                    "status": "RUNNING",
+                    "workerId": self.worker_id,
+                    "heartbeatAt": now,
+                    "attempts": job.attempts + 1,
+                    "startedAt": job.startedAt or now,
+                },
+            )
+            if claimed:
+                if job.completedSegments:
+                    self.resumed += 1
+                    logger.info(f"Resuming job {job.id} at {job.completedSegments}/{job.totalSegments} segment(s).")
+                return await prisma.translationjob.find_unique(where={"id": job.id})
+        return None
+
+    async def _run(self, job):
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            await prisma.translationrequest.update(where={"id": job.translationRequestId}, data={"status": "IN_PROGRESS"})
+            await self._process(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            retry = job.attempts < settings.JOB_MAX_ATTEMPTS
+            logger.error(f"Job {job.id} failed on attempt {job.attempts} ({e}){'; requeued' if retry else ''}.")
+            await prisma.translationjob.update(
+                where={"id": job.id},
+                data={"status": "QUEUED" if retry else "FAILED", "error": str(e), "workerId": None,
+                      **({} if retry else {"finishedAt": _now()})},
+            )
+            if not retry:
+                self.failed += 1
+                await self._finish_request(job, failed=True)
+        else:
+            self.completed += 1
+        finally:
+            heartbeat.cancel()
+            self._runs.pop(job.id, None)
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_S)
+            try:
+                await prisma.translationjob.update(where={"id": job_id}, data={"heartbeatAt": _now()})
+            except Exception as e:
+                logger.warning(f"Job {job_id}: heartbeat failed ({e}).")
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+
+    async def _process(self, job):
+        payload = job.payload
+        request_id = job.translationRequestId
+        texts: List[str] = payload["sourceTexts"]
+        targets: List[str] = payload["targetLanguages"]
+        source_language: str = payload["sourceLanguage"]
+        codes: Dict[str, str] = payload["engineCodes"]
+        multi_engine = str(job.kind) == "MULTI_ENGINE"
+
+        # Rows are written in source order, so the stored count is the resume point
+        done = {
+            target: await prisma.translationstring.count(
+                where={"translationRequestId": request_id, "targetLanguage": target}
+            )
+            for target in targets
+        }
+        self._runs[job.id] = {"started": time.monotonic(), "start_completed": sum(done.values()), "target": None}
+
+        style_guide = None
+        if multi_engine and payload.get("styleGuideIds"):
+            style_guide = await prisma.styleguide.find_unique(
+                where={"id": payload["styleGuideIds"][0]}, include={"terms": True},
+            )
+
+        processing_time = job.processingTimeMs
+        for start in range(0, len(texts), settings.JOB_CHUNK_SIZE):
+            end = min(start + settings.JOB_CHUNK_SIZE, len(texts))
+            pending = {target: max(start, done[target]) for target in targets if done[target] < end}
+            if not pending:
+                continue
+            if multi_engine:
+                await self._multi_engine_chunk(
+                    request_id, texts, end, pending, source_language, codes, payload.get("engines") or [], style_guide
+                )
+            else:
+                for target, first in pending.items():
+                    self._runs[job.id]["target"] = target
+                    processing_time += await self._single_engine_chunk(
+                        request_id, texts, first, end, source_language, target, codes
+                    )
+            for target in pending:
+                done[target] = end
+            await prisma.translationjob.update(
+                where={"id": job.id},
+                data={"completedSegments": sum(done.values()), "processingTimeMs": processing_time,
+                      "heartbeatAt": _now()},
+            )
+
+        unique_texts, _ = dedupe(texts)
+        if multi_engine:
+            first_row = await prisma.translationstring.find_first(where={"translationRequestId": request_id})
+            engines = len(first_row.engineResults) if first_row and isinstance(first_row.engineResults, list) else 0
+            request_data = {"status": "MULTI_ENGINE_REVIEW"}
+        else:
+            engines = 1
+            request_data = {"status": "COMPLETED", "totalProcessingTimeMs": processing_time}
+        await prisma.translationrequest.update(
+            where={"id": request_id},
+            data={**request_data, "jobStats": Json(dedup_stats(len(texts), len(unique_texts), len(targets), engines=engines))},
+        )
+        await prisma.translationjob.update(
+            where={"id": job.id},
+            data={"status": "COMPLETED", "finishedAt": _now(), "error": None, "workerId": None},
+        )
+        logger.info(f"✅ Job {job.id} for request {request_id} completed")
+
+    async def _single_engine_chunk(
+        self, request_id: str, texts: List[str], first: int, end: int,
+        source_language: str, target: str, codes: Dict[str, str],
+    ) -> int:
+        chunk = texts[first:end]
+        unique_texts, segment_index = dedupe(chunk)
+        fuzzy, suggestions = await fuzzy_suggestions(self.fuzzy_matcher, unique_texts, target, source_language)
+        translated, intermediates, error, batch_ms = await translate_single_engine(
+            self.multi_engine_service, [text.strip() for text in unique_texts],
+            source_language, target, codes[source_language], codes[target],
+        )
+        per_segment = batch_ms // max(len(chunk), 1)
+        strings = BulkWriter("translationstring")
+        for source_text, i in zip(chunk, segment_index):
+            await strings.add(single_engine_string(
+                source_text.strip(), target, request_id, per_segment,
+                translated[i] if translated is not None else None,
+                intermediates[i] if intermediates is not None else None,
+                fuzzy[i], suggestions[i], error,
+            ))
+        await strings.flush()
+        return batch_ms
+
+    async def _multi_engine_chunk(
+        self, request_id: str, texts: List[str], end: int, pending: Dict[str, int],
+        source_language: str, codes: Dict[str, str], engines: List[str], style_guide,
+    ):
+        first = min(pending.values())
+        chunk = texts[first:end]
+        unique_texts, segment_index = dedupe(chunk)
+        results_by_code = await self.multi_engine_service.translate_multi_engine_multi_target(
+            unique_texts,
+            codes[source_language],
+            list(dict.fromkeys(codes[target] for target in pending)),
+            engines,
+            style_guide=style_guide,
+        )
+        strings = BulkWriter("translationstring")
+        for target, target_first in pending.items():
+            fuzzy, suggestions = await fuzzy_suggestions(self.fuzzy_matcher, unique_texts, target, source_language)
+            engine_results_per_text = results_by_code[codes[target]]
+            for position in range(target_first, end):
+                i = segment_index[position - first]
+                await strings.add(multi_engine_string(
+                    texts[position], target, request_id, engine_results_per_text[i], fuzzy[i], suggestions[i],
+                ))
+            # Per target: its stored row count is its resume point
+            await strings.flush()
+
+    async def _finish_request(self, job, failed: bool):
+        try:
+            await prisma.translationrequest.update(
+                where={"id": job.translationRequestId}, data={"status": "CANCELLED" if failed else "COMPLETED"}
+            )
+        except Exception as e:
+            logger.warning(f"Job {job.id}: could not update request status ({e}).")
+
+    # ------------------------------------------------------------------
+    # Progress
+    # ------------------------------------------------------------------
+
+    async def progress(self, request_id: str) -> Optional[Dict]:
+        """Job status, per-target segment counts, throughput and ETA for a request."""
+        job = await prisma.translationjob.find_unique(where={"translationRequestId": request_id})
+        if job is None:
+            return None
+        targets = job.payload.get("targetLanguages", [])
+        per_target_total = len(job.payload.get("sourceTexts", []))
+        per_target = {
+            target: await prisma.translationstring.count(
+                where={"translationRequestId": request_id, "targetLanguage": target}
+            )
+            for target in targets
+        }
+        completed = sum(per_target.values())
+
+        run = self._runs.get(job.id)
+        if run is not None:
+            elapsed = time.monotonic() - run["started"]
+            done_this_run = completed - run["start_completed"]
+        elif job.startedAt is not None:
+            finished = job.finishedAt or _now()
+            elapsed = (finished - job.startedAt).total_seconds()
+            done_this_run = completed
+        else:
+            elapsed, done_this_run = 0.0, 0
+        throughput = done_this_run / elapsed if elapsed > 0 and done_this_run > 0 else None
+        remaining = max(job.totalSegments - completed, 0)
+
+        return {
+            "jobId": job.id,
+            "requestId": request_id,
+            "kind": str(job.kind),
+            "status": str(job.status),
+            "totalSegments": job.totalSegments,
+            "completedSegments": completed,
+            "percent": round(100.0 * completed / job.totalSegments, 1) if job.totalSegments else 100.0,
+            "targets": {
+                target: {"completed": count, "total": per_target_total} for target, count in per_target.items()
+            },
+            "currentTarget": run["target"] if run else None,
+            "segmentsPerSecond": round(throughput, 2) if throughput else None,
+            "etaSeconds": round(remaining / throughput, 1) if throughput and remaining else (0.0 if not remaining else None),
+            "attempts": job.attempts,
+            "workerId": job.workerId,
+            "error": job.error,
+            "startedAt": job.startedAt.isoformat() if job.startedAt else None,
+            "finishedAt": job.finishedAt.isoformat() if job.finishedAt else None,
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "worker_id": self.worker_id,
+            "workers": len(self._tasks),
+            "running_jobs": sorted(self._runs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "resumed": self.resumed,
+        }
+
+
+translation_jobs = TranslationJobQueue()
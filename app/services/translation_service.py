@@ -1,14 +1,40 @@
+import copy
+import gc
+import glob
+import hashlib
 import logging
-from typing import Dict, List, Any
+import re
+import threading
+from typing import Dict, List, Any, Optional
 import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, AutoModelForCausalLM, pipeline
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSeq2SeqLM, AutoModelForCausalLM, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer, pipeline
+from transformers.modeling_outputs import BaseModelOutput
+from transformers.utils import cached_file
 import os
 
 from app.core.config import settings
 from app.utils.text_processing import detokenize_japanese
+from app.utils.batching import estimate_tokens, length_bucketed_map
+from app.utils.chunking import expand_chunks, reassemble
+from app.services.length_budget import length_budgets
+from app.services.model_residency import ModelResidencyManager
+from app.services.translation_cache import translation_cache
 
 logger = logging.getLogger(__name__)
 
+SUPPORTED_PRECISIONS = ("fp32", "bf16", "int8")
+WEIGHT_FILE_SUFFIXES = (".bin", ".safetensors", ".json")
+
+
+class CancelledCriteria(StoppingCriteria):
+    """Stop every row once event is set (e.g. the client of a stream went away)."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
 class TranslationService:
     def __init__(self):
         self.models = {}
@@ -16,6 +42,14 @@ class TranslationService:
         self.pipelines = {}
         self.causal_models = {}
         self.causal_tokenizers = {}
+        # (model_key, src_code, tgt_code) -> (prefix token ids, past_key_values)
+        self.gemma_prefix_cache = {}
+        # LRU residency under MODEL_MEMORY_BUDGET_MB (0 = keep everything loaded)
+        self.residency = ModelResidencyManager(
+            budget_bytes=settings.MODEL_MEMORY_BUDGET_MB * 1024 * 1024,
+            on_evict=self._unload_model,
+        )
+        self.cache = translation_cache
         if torch.cuda.is_available():
             self.device = "cuda"
         elif torch.backends.mps.is_available():
@@ -84,10 +118,31 @@ class TranslationService:
             ],
         }
 
-    def _load_model(self, model_key: str):
+    def model_precision(self, model_key: str) -> str:
+        """Configured precision for a seq2seq engine (MODEL_PRECISION override or the default)."""
+        return settings.MODEL_PRECISION.get(model_key, settings.DEFAULT_MODEL_PRECISION)
+
+    def model_revision(self, model_key: str, precision: Optional[str] = None) -> str:
+        """Cache revision for a model: where its weights come from plus the precision they run at."""
+        source = self.model_paths.get(model_key, (model_key, None))[0]
+        return f"{source}|{precision or self.model_precision(model_key)}"
+
+    def _registry_key(self, model_key: str, precision: Optional[str] = None) -> str:
+        """Key a loaded model is stored under; non-configured precisions get their own slot."""
+        if precision and precision != self.model_precision(model_key):
+            return f"{model_key}@{precision}"
+        return model_key
+
+    def _load_model(self, model_key: str, precision: Optional[str] = None):
         """Internal method to load a model and its tokenizer/pipeline."""
-        if model_key in self.models:
-            return self.models[model_key], self.tokenizers[model_key], self.pipelines[model_key]
+        registry_key = self._registry_key(model_key, precision)
+        if registry_key in self.models:
+            self.residency.touch(registry_key)
+            return self.models[registry_key], self.tokenizers[registry_key], self.pipelines[registry_key]
+
+        precision = precision or self.model_precision(model_key)
+        if precision not in SUPPORTED_PRECISIONS:
+            raise ValueError(f"Unsupported precision '{precision}' for '{model_key}'. Use one of {SUPPORTED_PRECISIONS}.")
 
         model_path_info = self.model_paths.get(model_key)
         if not model_path_info:
@@ -131,16 +186,25 @@ class TranslationService:
                 else:
                     raise ValueError(f"No Hub ID mapping found for model key: {model_key}")
 
-        logger.info(f"Attempting to load model '{model_name_or_path}' for key '{model_key}' using cache_dir='{settings.MODEL_CACHE_DIR}'...")
+        self.residency.record_miss(registry_key)
+        logger.info(f"Attempting to load model '{model_name_or_path}' ({precision}) for key '{model_key}' using cache_dir='{settings.MODEL_CACHE_DIR}'...")
         
         try:
             tokenizer = AutoTokenizer.from_pretrained(model_name_or_path, cache_dir=settings.MODEL_CACHE_DIR)
-            model = AutoModelForSeq2SeqLM.from_pretrained(model_name_or_path, cache_dir=settings.MODEL_CACHE_DIR).to(self.device)
+            if precision == "int8":
+                model = self._load_int8_model(model_key, model_name_or_path)
+            else:
+                dtype = torch.bfloat16 if precision == "bf16" else None
+                model = AutoModelForSeq2SeqLM.from_pretrained(
+                    model_name_or_path, cache_dir=settings.MODEL_CACHE_DIR, torch_dtype=dtype
+                ).to(self.device)
 
             pipe = None
 
             if not model_key.startswith('T5'):
                 pipe_device = 0 if self.device == "cuda" else ("mps" if self.device == "mps" else -1)
+                if precision == "int8":
+                    pipe_device = -1
                 pipe = pipeline(
                     "translation",
                     model=model,
@@ -150,10 +214,11 @@ class TranslationService:
             else:
                 logger.info(f"Skipping pipeline creation for T5 model '{model_key}'. Will use model.generate directly.")
 
-            self.models[model_key] = model
-            self.tokenizers[model_key] = tokenizer
-            self.pipelines[model_key] = pipe
-            logger.info(f"Model '{model_key}' loaded successfully. Device set to use {self.device}")
+            self.models[registry_key] = model
+            self.tokenizers[registry_key] = tokenizer
+            self.pipelines[registry_key] = pipe
+            self.residency.admit(registry_key, model)
+            logger.info(f"Model '{registry_key}' loaded successfully ({precision}). Device set to use {model.device}")
             return model, tokenizer, pipe
         except Exception as e:
             logger.error(f"Error loading model {model_name_or_path} for key {model_key}: {e}")
@@ -161,6 +226,7 @@ class TranslationService:
 
     def _load_causal_model(self, model_key: str):
         if model_key in self.causal_models:
+            self.residency.touch(model_key)
             return self.causal_models[model_key], self.causal_tokenizers[model_key]
 
         model_path_info = self.model_paths.get(model_key)
@@ -168,6 +234,7 @@ class TranslationService:
             raise ValueError(f"Model key '{model_key}' not found in model_paths.")
 
         model_name_or_path = model_path_info[0]
+        self.residency.record_miss(model_key)
         logger.info(f"Loading causal LM '{model_name_or_path}' for key '{model_key}'...")
         try:
             tokenizer = AutoTokenizer.from_pretrained(model_name_or_path, cache_dir=settings.MODEL_CACHE_DIR)
@@ -179,131 +246,650 @@ class TranslationService:
             model.eval()
             self.causal_models[model_key] = model
             self.causal_tokenizers[model_key] = tokenizer
+            self.residency.admit(model_key, model)
             logger.info(f"Causal LM '{model_key}' loaded on {self.device}.")
             return model, tokenizer
         except Exception as e:
             logger.error(f"Error loading causal LM {model_name_or_path}: {e}")
             raise
 
+    def _load_int8_model(self, model_key: str, model_name_or_path: str):
+        """Load a seq2seq model with int8 dynamic quantization of its Linear layers.
+
+        Dynamic int8 kernels are CPU-only, so the model stays on CPU whatever
+        self.device is. The quantized state dict is cached under
+        QUANTIZED_MODEL_DIR (keyed by the source weights and torch version) so
+        later boots skip re-quantizing from the fp32 weights.
+        """
+        cache_prefix = os.path.join(settings.QUANTIZED_MODEL_DIR, f"{model_key}-int8-")
+        cache_path = f"{cache_prefix}{self._weights_fingerprint(model_name_or_path)}-torch{torch.__version__}.pt"
+        if os.path.exists(cache_path):
+            try:
+                config = AutoConfig.from_pretrained(model_name_or_path, cache_dir=settings.MODEL_CACHE_DIR)
+                model = torch.quantization.quantize_dynamic(
+                    AutoModelForSeq2SeqLM.from_config(config), {torch.nn.Linear}, dtype=torch.qint8
+                )
+                model.load_state_dict(torch.load(cache_path, map_location="cpu"))
+                logger.info(f"Loaded cached int8 weights for '{model_key}' from {cache_path}")
+                return model.eval()
+            except Exception as e:
+                logger.warning(f"Cached int8 weights for '{model_key}' unusable ({e}); re-quantizing.")
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name_or_path, cache_dir=settings.MODEL_CACHE_DIR)
+        model = torch.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+        try:
+            os.makedirs(settings.QUANTIZED_MODEL_DIR, exist_ok=True)
+            torch.save(model.state_dict(), cache_path)
+            logger.info(f"Cached int8 weights for '{model_key}' at {cache_path}")
+            # Checkpoints quantized from older weights or torch builds are never loaded again
+            for stale_path in glob.glob(f"{glob.escape(cache_prefix)}*.pt"):
+                if stale_path != cache_path:
+                    os.remove(stale_path)
+        except Exception as e:
+            logger.warning(f"Could not cache int8 weights for '{model_key}': {e}")
+        return model
+
+    @staticmethod
+    def _weights_fingerprint(model_name_or_path: str) -> str:
+        """Short hash of the directory weights load from and its weight files' sizes and mtimes.
+
+        For hub ids the directory is the resolved snapshot, so its commit hash
+        changes with the revision; for local paths a replaced weight file changes
+        its size or mtime.
+        """
+        try:
+            source_dir = os.path.dirname(cached_file(model_name_or_path, "config.json", cache_dir=settings.MODEL_CACHE_DIR))
+        except Exception:
+            source_dir = model_name_or_path
+        digest = hashlib.sha256(os.path.abspath(source_dir).encode("utf-8"))
+        if os.path.isdir(source_dir):
+            for entry in sorted(os.scandir(source_dir), key=lambda entry: entry.name):
+                if entry.name.endswith(WEIGHT_FILE_SUFFIXES):
+                    stat = entry.stat()
+                    digest.update(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def _unload_model(self, model_key: str):
+        """Drop every reference to a model so its memory can be reclaimed."""
+        for registry in (self.models, self.tokenizers, self.pipelines, self.causal_models, self.causal_tokenizers):
+            registry.pop(model_key, None)
+        for cache_key in [key for key in self.gemma_prefix_cache if key[0] == model_key]:
+            del self.gemma_prefix_cache[cache_key]
+        gc.collect()
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
+        elif self.device == "mps":
+            torch.mps.empty_cache()
+
+    def unload_all_models(self) -> List[str]:
+        """Unload every resident model (manual cache clear). Returns the unloaded keys."""
+        keys = list(dict.fromkeys(list(self.models.keys()) + list(self.causal_models.keys())))
+        for model_key in keys:
+            self.unload_model(model_key)
+        return keys
+
+    def unload_model(self, registry_key: str):
+        """Unload one model (or precision variant such as 'NLLB_200@int8') outside the LRU policy."""
+        self.residency.forget(registry_key)
+        self._unload_model(registry_key)
+
     def translate_by_model_type(self, text: str, model_key: str, source_lang: str = None, target_lang: str = None, target_lang_tag: str = None) -> str:
         """Translate text using a specific model identified by its key."""
         try:
             if model_key.startswith('PIVOT'):
                 raise ValueError(f"Pivot model '{model_key}' should be routed via multi-engine service.")
 
-            if model_key.startswith('TRANSLATE_GEMMA'):
-                # ISO 639-1 codes expected by the TranslateGemma chat template
-                _iso = {'en': 'en', 'fr': 'fr', 'ja': 'ja', 'jp': 'ja', 'sw': 'sw'}
-                src_code = _iso.get(source_lang.lower(), source_lang.lower())
-                tgt_code = _iso.get(target_lang.lower(), target_lang.lower())
-                messages = [{"role": "user", "content": [{"type": "text", "source_lang_code": src_code, "target_lang_code": tgt_code, "text": text}]}]
-                gemma_model, gemma_tokenizer = self._load_causal_model(model_key)
-                tokenized = gemma_tokenizer.apply_chat_template(messages, tokenize=True, return_tensors="pt", return_dict=True, add_generation_prompt=True)
-                input_ids = tokenized["input_ids"].to(self.device)
-                attention_mask = tokenized["attention_mask"].to(self.device)
-                with torch.inference_mode():
-                    output_ids = gemma_model.generate(
-                        input_ids,
-                        attention_mask=attention_mask,
-                        pad_token_id=gemma_tokenizer.eos_token_id,
-                        do_sample=False,
-                        max_new_tokens=512,
-                    )
-                new_tokens = output_ids[0][input_ids.shape[1]:]
-                translated = gemma_tokenizer.decode(new_tokens, skip_special_tokens=True)
-                # Strip "**Label:**" preambles the model sometimes adds (e.g. "**Translation:** ...")
-                import re as _re
-                translated = _re.sub(r'^\*\*[^*]+\*\*\s*', '', translated).strip()
-                if any(ja in tgt_code for ja in ("ja",)):
-                    translated = detokenize_japanese(translated)
-                if self.device == 'mps':
-                    torch.mps.empty_cache()
-                return translated
-
-            model, tokenizer, pipe = self._load_model(model_key)
-            if not model:
-                raise RuntimeError(f"Model '{model_key}' not loaded or directly translatable.")
-
-            if model_key.startswith('T5'):
-                if target_lang_tag is None:
-                    lang_map = {
-                        "en": "English", "fr": "French", "ja": "Japanese",
-                        "ja": "Japanese", "fra": "French", "eng": "English"
-                    }
-                    src_lang_full = lang_map.get(source_lang.lower(), source_lang)
-                    tgt_lang_full = lang_map.get(target_lang.lower(), target_lang)
-                    prompt = f"translate {src_lang_full} to {tgt_lang_full}: "
-                    logger.info(f"Using auto-derived T5 prompt: {prompt}")
-                    text_to_translate = prompt + text
-                else:
-                    text_to_translate = target_lang_tag + text
-
-                logger.info(f"T5 Input - text_to_translate: '{text_to_translate}'")
-                logger.info(f"T5 Input - source_lang: '{source_lang}', target_lang: '{target_lang}', target_lang_tag: '{target_lang_tag}'")
-
-                inputs = tokenizer(text_to_translate, return_tensors="pt").to(self.device)
+            translated = self.translate_batch([text], model_key, source_lang, target_lang, target_lang_tag)[0]
+            if isinstance(translated, Exception):
+                raise translated
+            return translated
+        except Exception as e:
+            logger.error(f"Translation failed for model {model_key}: {e}")
+            raise
 
-                logger.info(f"T5 Input - tokenizer output (input_ids shape): {inputs['input_ids'].shape}")
-                logger.info(f"T5 Input - tokenizer output (input_ids): {inputs['input_ids']}")
+    def translate_batch(
+        self,
+        texts: List[str],
+        model_key: str,
+        source_lang: str = None,
+        target_lang: str = None,
+        target_lang_tag: str = None,
+        batch_size: Optional[int] = None,
+        precision: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> List[str]:
+        """Translate many segments with one padded generate() call per length bucket.
+
+        Covers the seq2seq engines (Helsinki/OPUS, ELAN, mT5, NLLB). Output order
+        matches the input order. TranslateGemma uses its left-padded causal-LM batch path.
+        precision overrides the configured fp32/bf16/int8 setting (benchmarks).
+        Segments already in the translation cache are not sent to the model.
+        A length bucket that fails is retried segment by segment; a segment that
+        fails on its own comes back as its exception instead of a translation.
+        """
+        if model_key.startswith('PIVOT'):
+            raise ValueError(f"Pivot model '{model_key}' should be routed via multi-engine service.")
+        if not texts:
+            return []
 
-                translated_tokens = model.generate(
-                    **inputs,
-                    max_length=512
+        revision = self.model_revision(model_key, precision)
+        if use_cache:
+            results = self.cache.get_many(texts, model_key, revision, source_lang, target_lang, target_lang_tag)
+        else:
+            results = [None] * len(texts)
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if not missing:
+            return results
+
+        missing_texts = [texts[i] for i in missing]
+        # Pinned: the residency manager must not evict this model mid-request
+        with self.residency.pinned(self._registry_key(model_key, precision)):
+            if model_key.startswith('TRANSLATE_GEMMA'):
+                translated = self._translate_gemma_batch(missing_texts, model_key, source_lang, target_lang)
+            else:
+                translated = self._translate_seq2seq_batch(
+                    missing_texts, model_key, source_lang, target_lang, target_lang_tag, batch_size, precision
                 )
-                logger.info(f"T5 Output - generated_tokens shape: {translated_tokens.shape}")
-                logger.info(f"T5 Output - generated_tokens: {translated_tokens}")
 
-                translated = tokenizer.decode(translated_tokens[0], skip_special_tokens=True)
-                logger.info(f"T5 Output - decoded_text: '{translated}'")
-
-            elif model_key.startswith('NLLB'):
-                # NLLB models require specific target_lang tag to be passed to generate
-                if target_lang_tag is None:
-                    nllb_lang_tags = {
-                        "en": "eng_Latn", "fr": "fra_Latn", "ja": "jpn_Jpan",
-                        "jp": "jpn_Jpan", "fra": "fra_Latn", "eng": "eng_Latn",
-                        "sw": "swh_Latn",  # Swahili (Latin script)
-                    }
-                    target_lang_tag = nllb_lang_tags.get(target_lang.lower(), None)
-                    if target_lang_tag is None:
-                        raise ValueError(f"NLLB model '{model_key}' requires a 'target_lang_tag' for translation. Could not determine for {target_lang}.")
-
-                forced_bos_token_id = None
-                if hasattr(tokenizer, 'get_lang_id'):
-                    forced_bos_token_id = tokenizer.get_lang_id(target_lang_tag)
-                elif hasattr(tokenizer, 'lang_code_to_id') and target_lang_tag in tokenizer.lang_code_to_id:
-                    forced_bos_token_id = tokenizer.lang_code_to_id[target_lang_tag]
-                elif target_lang_tag in tokenizer.vocab:
-                     # This means target_lang_tag is a string like '__jpn_Jpan__' which is in the vocab
-                    forced_bos_token_id = tokenizer.convert_tokens_to_ids(target_lang_tag)
+        if use_cache:
+            done = [(text, output) for text, output in zip(missing_texts, translated) if not isinstance(output, Exception)]
+            if done:
+                self.cache.put_many([text for text, _ in done], [output for _, output in done],
+                                    model_key, revision, source_lang, target_lang, target_lang_tag)
+        for i, translation in zip(missing, translated):
+            results[i] = translation
+        return results
+
+    def translate_multi_target(
+        self,
+        texts: List[str],
+        model_key: str,
+        source_lang: str,
+        targets: Dict[str, Optional[str]],
+        batch_size: Optional[int] = None,
+        precision: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, List[str]]:
+        """Translate segments into several target languages at once.
+
+        targets maps target_lang -> lang tag. For NLLB the encoder runs once per
+        source segment and every target is decoded in the same batched generate()
+        call, each row starting from its own target-language token. Other models
+        fall back to one translate_batch() per target. Returns target_lang ->
+        translations in input order; a segment that failed is its exception.
+        """
+        if not model_key.startswith('NLLB') or len(targets) < 2:
+            return {
+                target_lang: self.translate_batch(
+                    texts, model_key, source_lang, target_lang, lang_tag, batch_size, precision, use_cache
+                )
+                for target_lang, lang_tag in targets.items()
+            }
+        if not texts:
+            return {target_lang: [] for target_lang in targets}
+
+        revision = self.model_revision(model_key, precision)
+        results: Dict[str, List[Optional[str]]] = {}
+        for target_lang, lang_tag in targets.items():
+            if use_cache:
+                results[target_lang] = self.cache.get_many(texts, model_key, revision, source_lang, target_lang, lang_tag)
+            else:
+                results[target_lang] = [None] * len(texts)
+
+        # Each source segment is encoded once for all of the targets it is still missing
+        needed: Dict[int, List[str]] = {}
+        for target_lang, target_results in results.items():
+            for i, cached in enumerate(target_results):
+                if cached is None:
+                    needed.setdefault(i, []).append(target_lang)
+        if not needed:
+            return results
+
+        missing = sorted(needed)
+        with self.residency.pinned(self._registry_key(model_key, precision)):
+            translated = self._translate_nllb_multi_target(
+                [texts[i] for i in missing], [needed[i] for i in missing],
+                model_key, source_lang, targets, batch_size, precision,
+            )
+
+        for target_lang, lang_tag in targets.items():
+            new_texts, new_translations = [], []
+            for i, per_target in zip(missing, translated):
+                if target_lang in per_target:
+                    results[target_lang][i] = per_target[target_lang]
+                    if not isinstance(per_target[target_lang], Exception):
+                        new_texts.append(texts[i])
+                        new_translations.append(per_target[target_lang])
+            if use_cache and new_texts:
+                self.cache.put_many(new_texts, new_translations, model_key, revision, source_lang, target_lang, lang_tag)
+        return results
+
+    def _translate_nllb_multi_target(
+        self,
+        texts: List[str],
+        text_targets: List[List[str]],
+        model_key: str,
+        source_lang: str,
+        targets: Dict[str, Optional[str]],
+        batch_size: Optional[int],
+        precision: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """Encoder-once NLLB decoding; text_targets lists the targets each text needs.
+
+        Failed buckets are retried segment by segment like translate_batch; a
+        segment that still fails maps each of its targets to the exception.
+        """
+        model, tokenizer, _ = self._load_model(model_key, precision)
+        if not model:
+            raise RuntimeError(f"Model '{model_key}' not loaded or directly translatable.")
+
+        chunks, layout = expand_chunks(
+            texts, source_lang or "", self.max_input_tokens(model_key), self.token_length_fn(model_key)
+        )
+        chunk_targets: List[List[str]] = [None] * len(chunks)  # type: ignore[list-item]
+        for entry, wanted in zip(layout, text_targets):
+            for index in entry["chunks"]:
+                chunk_targets[index] = wanted
+        lang_ids = {
+            target_lang: self._nllb_forced_bos_token_id(tokenizer, model_key, target_lang, lang_tag)
+            for target_lang, lang_tag in targets.items()
+        }
+        decoder_start_token_id = model.config.decoder_start_token_id
+
+        def _generate(chunk: List[int]) -> List[Dict[str, str]]:
+            encoded = tokenizer(
+                [chunks[i] for i in chunk], return_tensors="pt", padding=True, truncation=True, max_length=512
+            ).to(model.device)
+            input_lengths = encoded["attention_mask"].sum(dim=1).tolist()
+            # One decoder row per (segment, target): encoder states are shared, not recomputed
+            rows = [(j, target_lang) for j, i in enumerate(chunk) for target_lang in chunk_targets[i]]
+            row_source = torch.tensor([j for j, _ in rows], device=model.device)
+            max_new_tokens = max(
+                length_budgets.budget(model_key, source_lang, target_lang, input_lengths, tokenizer)
+                for target_lang in {target_lang for _, target_lang in rows}
+            )
+            loop_guard = length_budgets.stopping_criteria(tokenizer.pad_token_id)
+            with torch.inference_mode():
+                encoder_outputs = model.get_encoder()(
+                    input_ids=encoded["input_ids"], attention_mask=encoded["attention_mask"], return_dict=True
+                )
+                generated = model.generate(
+                    encoder_outputs=BaseModelOutput(
+                        last_hidden_state=encoder_outputs.last_hidden_state.index_select(0, row_source)
+                    ),
+                    attention_mask=encoded["attention_mask"].index_select(0, row_source),
+                    decoder_input_ids=torch.tensor(
+                        [[decoder_start_token_id, lang_ids[target_lang]] for _, target_lang in rows], device=model.device
+                    ),
+                    max_new_tokens=max_new_tokens,
+                    stopping_criteria=StoppingCriteriaList([loop_guard] if loop_guard else []),
+                )
+            decoded = tokenizer.batch_decode(generated, skip_special_tokens=True)
+
+            # Decoder rows start with the decoder start and target-language tokens
+            output_lengths = [max(0, n - 2) for n in (generated != tokenizer.pad_token_id).sum(dim=1).tolist()]
+            aborted = set(loop_guard.aborted_rows()) if loop_guard else set()
+            per_chunk: List[Dict[str, str]] = [{} for _ in chunk]
+            for row, ((j, target_lang), translation) in enumerate(zip(rows, decoded)):
+                per_chunk[j][target_lang] = translation
+                if row in aborted:
+                    length_budgets.record_aborts(model_key, source_lang, target_lang, 1)
                 else:
-                    logger.warning(f"NLLB: Could not find explicit lang_id for '{target_lang_tag}'. Attempting generic conversion (may fail).")
-                    forced_bos_token_id = tokenizer.convert_tokens_to_ids(target_lang_tag)
-
-                if forced_bos_token_id is None:
-                    raise ValueError(f"NLLB: Failed to determine forced_bos_token_id for tag '{target_lang_tag}'.")
+                    length_budgets.observe(model_key, source_lang, target_lang, input_lengths[j], output_lengths[row])
+            return per_chunk
+
+        # Each bucket decodes (segments x targets) rows, so shrink it by the target count
+        fan_out_width = max(len(wanted) for wanted in text_targets)
+        translated_chunks = length_bucketed_map(
+            list(range(len(chunks))),
+            _generate,
+            length_fn=lambda i: estimate_tokens(chunks[i]),
+            max_batch_size=max(1, (batch_size or settings.TRANSLATION_BATCH_SIZE) // fan_out_width),
+            max_tokens=max(1, settings.TRANSLATION_MAX_BATCH_TOKENS // fan_out_width),
+            isolate_failures=True,
+        )
+        logger.info(
+            f"Multi-target translated {len(texts)} segment(s) with {model_key} into {', '.join(targets)} "
+            f"(one encoder pass per segment)."
+        )
+
+        outputs: List[Dict[str, str]] = [{} for _ in texts]
+        for target_lang in targets:
+            wanted_layout = [
+                (position, entry) for position, (entry, wanted) in enumerate(zip(layout, text_targets))
+                if target_lang in wanted
+            ]
+            # A chunk that failed on its own is its exception, for every target it needed
+            flat = [
+                chunk if isinstance(chunk, Exception) else chunk.get(target_lang, "")
+                for chunk in translated_chunks
+            ]
+            rebuilt = reassemble(flat, [entry for _, entry in wanted_layout], target_lang)
+            if any(ja in target_lang.lower() for ja in ("ja", "jp", "jpn")):
+                rebuilt = [t if isinstance(t, Exception) else detokenize_japanese(t) for t in rebuilt]
+            for (position, _), translation in zip(wanted_layout, rebuilt):
+                outputs[position][target_lang] = translation
+        return outputs
+
+    def _translate_seq2seq_batch(
+        self,
+        texts: List[str],
+        model_key: str,
+        source_lang: str,
+        target_lang: str,
+        target_lang_tag: str,
+        batch_size: Optional[int],
+        precision: Optional[str] = None,
+    ) -> List[str]:
+        model, tokenizer, _ = self._load_model(model_key, precision)
+        if not model:
+            raise RuntimeError(f"Model '{model_key}' not loaded or directly translatable.")
+
+        batch_size = batch_size or settings.TRANSLATION_BATCH_SIZE
+        generate_kwargs = {}
+
+        # Inputs over the context limit are translated sentence-chunk by sentence-chunk
+        chunks, layout = expand_chunks(
+            texts, source_lang or "", self.max_input_tokens(model_key), self.token_length_fn(model_key)
+        )
+        if len(chunks) > len(texts):
+            logger.info(f"Split {len(texts)} segment(s) into {len(chunks)} chunk(s) for {model_key}.")
+
+        if model_key.startswith('T5'):
+            inputs = [self._t5_prefix(source_lang, target_lang, target_lang_tag) + text for text in chunks]
+        else:
+            inputs = list(chunks)
+            if model_key.startswith('NLLB'):
+                # NLLB models require specific target_lang tag to be passed to generate
+                generate_kwargs["forced_bos_token_id"] = self._nllb_forced_bos_token_id(
+                    tokenizer, model_key, target_lang, target_lang_tag
+                )
 
-                inputs = tokenizer(text, return_tensors="pt").to(self.device)
-                translated_tokens = model.generate(
-                    **inputs,
-                    forced_bos_token_id=forced_bos_token_id,
-                    max_length=512
+        def _generate(chunk: List[str]) -> List[str]:
+            # model.device rather than self.device: int8 models always run on CPU
+            encoded = tokenizer(chunk, return_tensors="pt", padding=True, truncation=True, max_length=512).to(model.device)
+            input_lengths = encoded["attention_mask"].sum(dim=1).tolist()
+            max_new_tokens = length_budgets.budget(model_key, source_lang, target_lang, input_lengths, tokenizer)
+            loop_guard = length_budgets.stopping_criteria(tokenizer.pad_token_id)
+            with torch.inference_mode():
+                generated = model.generate(
+                    **encoded,
+                    max_new_tokens=max_new_tokens,
+                    stopping_criteria=StoppingCriteriaList([loop_guard] if loop_guard else []),
+                    **generate_kwargs,
                 )
-                translated = tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)[0]
+            # Decoder ids start with the decoder start token
+            output_lengths = [max(0, n - 1) for n in (generated != tokenizer.pad_token_id).sum(dim=1).tolist()]
+            self._record_lengths(model_key, source_lang, target_lang, input_lengths, output_lengths, loop_guard)
+            return tokenizer.batch_decode(generated, skip_special_tokens=True)
+
+        # Sort by length so short UI strings are not padded out to long paragraphs
+        translations = length_bucketed_map(
+            inputs,
+            _generate,
+            length_fn=estimate_tokens,
+            max_batch_size=batch_size,
+            max_tokens=settings.TRANSLATION_MAX_BATCH_TOKENS,
+            isolate_failures=True,
+        )
+
+        translations = reassemble(translations, layout, target_lang or target_lang_tag)
+        logger.info(f"Batch-translated {len(texts)} segment(s) with {model_key} (batch_size={batch_size}).")
+
+        # BPE tokenizers produce spurious spaces between CJK subwords; strip them.
+        effective_target = target_lang or (target_lang_tag or "")
+        if any(ja in effective_target.lower() for ja in ("ja", "jp", "jpn")):
+            translations = [t if isinstance(t, Exception) else detokenize_japanese(t) for t in translations]
+
+        return translations
+
+    def max_input_tokens(self, model_key: str) -> Optional[int]:
+        """Source tokens above which an input is split into sentence chunks (None = never)."""
+        if model_key.startswith('TRANSLATE_GEMMA') or settings.CHUNK_MAX_TOKENS <= 0:
+            return None
+        return settings.CHUNK_MAX_TOKENS
+
+    def token_length_fn(self, model_key: str):
+        """Token counter for chunking: the model's tokenizer once loaded, else the cheap estimate."""
+        tokenizer = next(
+            (tok for key, tok in self.tokenizers.items() if key == model_key or key.startswith(f"{model_key}@")),
+            None,
+        )
+        if tokenizer is None:
+            return estimate_tokens
+        return lambda text: len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def _translate_gemma(self, text: str, model_key: str, source_lang: str, target_lang: str) -> str:
+        return self._translate_gemma_batch([text], model_key, source_lang, target_lang)[0]
+
+    def _translate_gemma_batch(self, texts: List[str], model_key: str, source_lang: str, target_lang: str) -> List[str]:
+        """Translate segments with TranslateGemma, several per generate() call.
+
+        Prompts are rendered with the chat template, padded to a common length (so
+        every row's generation starts at the same position) and generated together
+        per length bucket. Buckets reuse the cached KV of the shared chat-template
+        prefix instead of re-encoding it: padding goes between the prefix and the
+        segment, so the prefix KV, repeated across the bucket, lines up with every row.
+        """
+        gemma_model, gemma_tokenizer = self._load_causal_model(model_key)
+        src_code, tgt_code = self._gemma_lang_codes(source_lang, target_lang)
+        # (prompt ids, segment token length): budgets are learned on the segment, not the template around it
+        prompts = [
+            (self._gemma_prompt_ids(gemma_tokenizer, text, src_code, tgt_code), len(gemma_tokenizer(text)["input_ids"]))
+            for text in texts
+        ]
+        # One id for input padding, generate()'s finished-row padding and output length counting
+        pad_token_id = gemma_tokenizer.pad_token_id if gemma_tokenizer.pad_token_id is not None else gemma_tokenizer.eos_token_id
+
+        def _generate(chunk: List[tuple]) -> List[str]:
+            input_lengths = [text_length for _, text_length in chunk]
+            chunk = [ids for ids, _ in chunk]
+            width = max(len(ids) for ids in chunk)
+            # shared == 0 (no usable prefix KV) is plain left padding
+            shared, generate_kwargs = self._gemma_prefix_kwargs(
+                model_key, gemma_model, gemma_tokenizer, chunk, src_code, tgt_code
+            )
+            input_ids = torch.tensor(
+                [ids[:shared] + [pad_token_id] * (width - len(ids)) + ids[shared:] for ids in chunk], device=self.device
+            )
+            attention_mask = torch.tensor(
+                [[1] * shared + [0] * (width - len(ids)) + [1] * (len(ids) - shared) for ids in chunk], device=self.device
+            )
+            loop_guard = length_budgets.stopping_criteria(pad_token_id, prompt_length=width)
+            with torch.inference_mode():
+                output_ids = gemma_model.generate(
+                    input_ids,
+                    attention_mask=attention_mask,
+                    pad_token_id=pad_token_id,
+                    do_sample=False,
+                    max_new_tokens=length_budgets.budget(model_key, source_lang, target_lang, input_lengths, gemma_tokenizer),
+                    stopping_criteria=StoppingCriteriaList([loop_guard] if loop_guard else []),
+                    **generate_kwargs,
+                )
+            output_lengths = (output_ids[:, width:] != pad_token_id).sum(dim=1).tolist()
+            self._record_lengths(model_key, source_lang, target_lang, input_lengths, output_lengths, loop_guard)
+            decoded = gemma_tokenizer.batch_decode(output_ids[:, width:], skip_special_tokens=True)
+            return [self.clean_gemma_output(translated, tgt_code) for translated in decoded]
+
+        return length_bucketed_map(
+            prompts,
+            _generate,
+            length_fn=lambda prompt: len(prompt[0]),
+            max_batch_size=settings.GEMMA_BATCH_SIZE,
+            max_tokens=settings.TRANSLATION_MAX_BATCH_TOKENS,
+            isolate_failures=True,
+        )
+
+    def stream_gemma(self, text: str, model_key: str, source_lang: str, target_lang: str,
+                     cancel: Optional[threading.Event] = None):
+        """Prepare a streamed TranslateGemma generation.
+
+        Returns (streamer, run, tgt_code): run() performs the blocking generate()
+        and must be called on the GPU executor; the TextIteratorStreamer yields
+        decoded text pieces as tokens are produced. The raw stream is not
+        post-processed — pass the joined text through clean_gemma_output().
+        Setting cancel stops generate() after the current token.
+        """
+        gemma_model, gemma_tokenizer = self._load_causal_model(model_key)
+        src_code, tgt_code = self._gemma_lang_codes(source_lang, target_lang)
+        prompt_ids = self._gemma_prompt_ids(gemma_tokenizer, text, src_code, tgt_code)
+        input_ids = torch.tensor([prompt_ids], device=self.device)
+        streamer = TextIteratorStreamer(gemma_tokenizer, skip_prompt=True, skip_special_tokens=True)
+        text_length = len(gemma_tokenizer(text)["input_ids"])
+        pad_token_id = gemma_tokenizer.pad_token_id if gemma_tokenizer.pad_token_id is not None else gemma_tokenizer.eos_token_id
+
+        def run():
+            try:
+                _, prefix_kwargs = self._gemma_prefix_kwargs(
+                    model_key, gemma_model, gemma_tokenizer, [prompt_ids], src_code, tgt_code
+                )
+                loop_guard = length_budgets.stopping_criteria(pad_token_id, prompt_length=len(prompt_ids))
+                criteria = [loop_guard] if loop_guard else []
+                if cancel is not None:
+                    criteria.append(CancelledCriteria(cancel))
+                with self.residency.pinned(model_key), torch.inference_mode():
+                    output_ids = gemma_model.generate(
+                        input_ids,
+                        attention_mask=torch.ones_like(input_ids),
+                        pad_token_id=pad_token_id,
+                        do_sample=False,
+                        max_new_tokens=length_budgets.budget(model_key, source_lang, target_lang, [text_length], gemma_tokenizer),
+                        stopping_criteria=StoppingCriteriaList(criteria),
+                        streamer=streamer,
+                        **prefix_kwargs,
+                    )
+                if cancel is not None and cancel.is_set():
+                    # A cut-off output says nothing about the pair's length ratio
+                    return
+                output_length = int((output_ids[0, len(prompt_ids):] != pad_token_id).sum())
+                self._record_lengths(model_key, source_lang, target_lang, [text_length], [output_length], loop_guard)
+            finally:
+                # Unblock the consumer even if generate() raised before finishing
+                streamer.end()
+
+        return streamer, run, tgt_code
+
+    @staticmethod
+    def _record_lengths(model_key: str, source_lang: str, target_lang: str, input_lengths: List[int],
+                        output_lengths: List[int], loop_guard) -> None:
+        """Feed finished rows into the length-budget ratios and count repetition aborts."""
+        aborted = set(loop_guard.aborted_rows()) if loop_guard else set()
+        length_budgets.record_aborts(model_key, source_lang, target_lang, len(aborted))
+        for row, (input_length, output_length) in enumerate(zip(input_lengths, output_lengths)):
+            if row not in aborted:
+                length_budgets.observe(model_key, source_lang, target_lang, input_length, output_length)
+
+    @staticmethod
+    def _gemma_lang_codes(source_lang: str, target_lang: str):
+        # ISO 639-1 codes expected by the TranslateGemma chat template
+        _iso = {'en': 'en', 'fr': 'fr', 'ja': 'ja', 'jp': 'ja', 'sw': 'sw'}
+        return _iso.get(source_lang.lower(), source_lang.lower()), _iso.get(target_lang.lower(), target_lang.lower())
+
+    @staticmethod
+    def _gemma_prompt_ids(tokenizer, text: str, src_code: str, tgt_code: str) -> List[int]:
+        messages = [{"role": "user", "content": [{"type": "text", "source_lang_code": src_code, "target_lang_code": tgt_code, "text": text}]}]
+        tokenized = tokenizer.apply_chat_template(messages, tokenize=True, return_dict=True, add_generation_prompt=True)
+        return list(tokenized["input_ids"])
+
+    def _gemma_prefix_kwargs(self, model_key: str, model, tokenizer, prompts: List[List[int]],
+                             src_code: str, tgt_code: str) -> tuple:
+        """(prefix length, generate() kwargs) resuming prompts from the cached chat-template prefix KV.
+
+        The prefix is the token run every prompt for this language pair shares
+        (template header and instructions up to the segment text). Its KV is
+        computed once per (model, pair); each call gets a copy repeated to one row
+        per prompt, since generate() extends the cache in place. (0, {}) when the
+        cache is off or a prompt does not extend the prefix.
+        """
+        if not settings.GEMMA_PREFIX_CACHE:
+            return 0, {}
+        cache_key = (model_key, src_code, tgt_code)
+        entry = self.gemma_prefix_cache.get(cache_key)
+        if entry is None:
+            probe_a = self._gemma_prompt_ids(tokenizer, "a", src_code, tgt_code)
+            probe_b = self._gemma_prompt_ids(tokenizer, "b", src_code, tgt_code)
+            shared = 0
+            while shared < min(len(probe_a), len(probe_b)) and probe_a[shared] == probe_b[shared]:
+                shared += 1
+            prefix_ids = probe_a[:shared]
+            past_key_values = None
+            if prefix_ids:
+                with torch.inference_mode():
+                    past_key_values = model(
+                        torch.tensor([prefix_ids], device=self.device), use_cache=True
+                    ).past_key_values
+            entry = (prefix_ids, past_key_values)
+            self.gemma_prefix_cache[cache_key] = entry
+            logger.info(f"Cached {len(prefix_ids)}-token TranslateGemma prompt prefix for {src_code}->{tgt_code}.")
+
+        prefix_ids, past_key_values = entry
+        # Each prompt must extend the prefix with at least one new token for generate() to resume
+        if past_key_values is None or any(
+            len(prompt_ids) <= len(prefix_ids) or prompt_ids[:len(prefix_ids)] != prefix_ids for prompt_ids in prompts
+        ):
+            return 0, {}
+        past_key_values = copy.deepcopy(past_key_values)
+        if len(prompts) > 1:
+            if hasattr(past_key_values, "batch_repeat_interleave"):
+                past_key_values.batch_repeat_interleave(len(prompts))
             else:
-                if pipe is None:
-                    raise RuntimeError(f"Pipeline not initialized for model key: {model_key}. This should not happen for non-T5 models.")
-                translated = pipe(text, max_length=512)[0]['translation_text']
-
-            # BPE tokenizers produce spurious spaces between CJK subwords; strip them.
-            effective_target = target_lang or (target_lang_tag or "")
-            if any(ja in effective_target.lower() for ja in ("ja", "jp", "jpn")):
-                translated = detokenize_japanese(translated)
+                # Legacy tuple-of-tuples cache
+                past_key_values = tuple(
+                    tuple(tensor.repeat_interleave(len(prompts), dim=0) for tensor in layer) for layer in past_key_values
+                )
+        return len(prefix_ids), {"past_key_values": past_key_values}
+
+    @staticmethod
+    def clean_gemma_output(translated: str, tgt_code: str) -> str:
+        # Strip "**Label:**" preambles the model sometimes adds (e.g. "**Translation:** ...")
+        translated = re.sub(r'^\*\*[^*]+\*\*\s*', '', translated).strip()
+        if any(ja in tgt_code for ja in ("ja",)):
+            translated = detokenize_japanese(translated)
+        return translated
+
+    @staticmethod
+    def _t5_prefix(source_lang: str, target_lang: str, target_lang_tag: str = None) -> str:
+        """Return the task prefix prepended to every mT5 input."""
+        if target_lang_tag is not None:
+            return target_lang_tag
+        lang_map = {
+            "en": "English", "fr": "French", "ja": "Japanese",
+            "fra": "French", "eng": "English"
+        }
+        src_lang_full = lang_map.get(source_lang.lower(), source_lang)
+        tgt_lang_full = lang_map.get(target_lang.lower(), target_lang)
+        prompt = f"translate {src_lang_full} to {tgt_lang_full}: "
+        logger.info(f"Using auto-derived T5 prompt: {prompt}")
+        return prompt
+
+    @staticmethod
+    def _nllb_forced_bos_token_id(tokenizer, model_key: str, target_lang: str, target_lang_tag: str = None) -> int:
+        """Resolve the target-language BOS token NLLB must start decoding with."""
+        if target_lang_tag is None:
+            nllb_lang_tags = {
+                "en": "eng_Latn", "fr": "fra_Latn", "ja": "jpn_Jpan",
+                "jp": "jpn_Jpan", "fra": "fra_Latn", "eng": "eng_Latn",
+                "sw": "swh_Latn",  # Swahili (Latin script)
+            }
+            target_lang_tag = nllb_lang_tags.get(target_lang.lower(), None)
+            if target_lang_tag is None:
+                raise ValueError(f"NLLB model '{model_key}' requires a 'target_lang_tag' for translation. Could not determine for {target_lang}.")
+
+        forced_bos_token_id = None
+        if hasattr(tokenizer, 'get_lang_id'):
+            forced_bos_token_id = tokenizer.get_lang_id(target_lang_tag)
+        elif hasattr(tokenizer, 'lang_code_to_id') and target_lang_tag in tokenizer.lang_code_to_id:
+            forced_bos_token_id = tokenizer.lang_code_to_id[target_lang_tag]
+        elif target_lang_tag in tokenizer.vocab:
+            # This means target_lang_tag is a string like '__jpn_Jpan__' which is in the vocab
+            forced_bos_token_id = tokenizer.convert_tokens_to_ids(target_lang_tag)
+        else:
+            logger.warning(f"NLLB: Could not find explicit lang_id for '{target_lang_tag}'. Attempting generic conversion (may fail).")
+            forced_bos_token_id = tokenizer.convert_tokens_to_ids(target_lang_tag)
 
-            return translated
-        except Exception as e:
-            logger.error(f"Translation failed for model {model_key}: {e}")
-            raise
+        if forced_bos_token_id is None:
+            raise ValueError(f"NLLB: Failed to determine forced_bos_token_id for tag '{target_lang_tag}'.")
+        return forced_bos_token_id
 
     def translate_with_fallback(self, text: str, source_lang: str, target_lang: str) -> str:
         """Attempt translation with primary model, fallback to other configured models in order."""
@@ -0,0 +1,130 @@
+"""Background preloading and warm-up of configured translation engines.
+
+PRELOAD_ENGINES lists "engine_id:src-tgt" targets. After startup each target is
+loaded and run once on WARMUP_TEXT through the normal engine path (scheduler,
+GPU executor, pivot legs), so the first real request does not pay for
+from_pretrained() and the first generate() call. Per-target state feeds the
+readiness endpoint, which only reports ready once every preload target is warm.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+COLD = "cold"
+LOADING = "loading"
+WARM = "warm"
+FAILED = "failed"
+
+
+def parse_preload_entries(entries: List[str]) -> List[Tuple[str, str, str]]:
+    """Parse "engine_id:src-tgt" strings into (engine_id, source_lang, target_lang)."""
+    targets = []
+    for entry in entries:
+        try:
+            engine_id, pair = entry.split(":", 1)
+            source_lang, target_lang = pair.split("-", 1)
+        except ValueError:
+            logger.warning(f"Ignoring malformed PRELOAD_ENGINES entry '{entry}' (expected engine_id:src-tgt).")
+            continue
+        targets.append((engine_id.strip(), source_lang.strip().lower(), target_lang.strip().lower()))
+    return targets
+
+
+class EngineWarmupService:
+    def __init__(self, multi_engine_service, preload: Optional[List[str]] = None):
+        self.multi_engine_service = multi_engine_service
+        self.targets = parse_preload_entries(settings.PRELOAD_ENGINES if preload is None else preload)
+        self._state: Dict[str, Dict] = {
+            self._target_id(*target): {"state": COLD, "load_time_ms": None, "error": None, "warmed_at": None}
+            for target in self.targets
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _target_id(engine_id: str, source_lang: str, target_lang: str) -> str:
+        return f"{engine_id}:{source_lang}-{target_lang}"
+
+    def start(self):
+        """Schedule preloading on the running loop; returns immediately."""
+        if not self.targets:
+            logger.info("No PRELOAD_ENGINES configured - engines will load on first request.")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._preload_all())
+
+    async def _preload_all(self):
+        logger.info(f"Preloading {len(self.targets)} engine target(s) in the background...")
+        # Sequential on purpose: loads share one GPU executor and would only queue anyway
+        for target in self.targets:
+            await self._warm(*target)
+        warm = sum(1 for entry in self._state.values() if entry["state"] == WARM)
+        logger.info(f"Engine preloading finished: {warm}/{len(self.targets)} target(s) warm.")
+
+    async def _warm(self, engine_id: str, source_lang: str, target_lang: str):
+        entry = self._state[self._target_id(engine_id, source_lang, target_lang)]
+        if engine_id not in self.multi_engine_service.engine_configs:
+            entry.update(state=FAILED, error=f"Unknown engine '{engine_id}'")
+            logger.warning(f"Preload skipped: unknown engine '{engine_id}'.")
+            return
+
+        entry["state"] = LOADING
+        start = time.time()
+        try:
+            # A cache hit would return without loading the model, leaving it cold
+            result = await self.multi_engine_service.translate_with_engine(
+                settings.WARMUP_TEXT, source_lang, target_lang, engine_id, use_cache=False
+            )
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+            entry.update(
+                state=WARM,
+                load_time_ms=round((time.time() - start) * 1000, 1),
+                error=None,
+                warmed_at=datetime.now().isoformat(),
+            )
+            logger.info(f"✓ Warmed {engine_id} ({source_lang}-{target_lang}) in {entry['load_time_ms']:.0f} ms")
+        except Exception as e:
+            entry.update(state=FAILED, error=str(e))
+            logger.error(f"❌ Failed to warm {engine_id} ({source_lang}-{target_lang}): {e}")
+
+    def _is_resident(self, engine_id: str, source_lang: str, target_lang: str) -> bool:
+        model_keys = self.multi_engine_service.model_keys_for(engine_id, source_lang, target_lang)
+        return bool(model_keys) and all(self.multi_engine_service.is_model_resident(key) for key in model_keys)
+
+    def readiness(self) -> Dict:
+        """Per-target warm/cold state; ready once every preload target is warm and still resident."""
+        targets = []
+        for engine_id, source_lang, target_lang in self.targets:
+            entry = dict(self._state[self._target_id(engine_id, source_lang, target_lang)])
+            # A warmed model may since have been evicted by the residency manager
+            if entry["state"] == WARM and not self._is_gemini(engine_id) \
+                    and not self._is_resident(engine_id, source_lang, target_lang):
+                entry["state"] = COLD
+            targets.append({"engine": engine_id, "pair": f"{source_lang}-{target_lang}", **entry})
+
+        engines = {}
+        for engine_id, config in self.multi_engine_service.engine_configs.items():
+            if self._is_gemini(engine_id):
+                continue
+            warm_pairs = [
+                pair for pair in config.get("supported_pairs", [])
+                if self._is_resident(engine_id, *pair.split("-", 1))
+            ]
+            engines[engine_id] = {"state": WARM if warm_pairs else COLD, "warm_pairs": warm_pairs}
+
+        return {
+            "ready": all(target["state"] == WARM for target in targets),
+            "preload_in_progress": self._task is not None and not self._task.done(),
+            "targets": targets,
+            "engines": engines,
+        }
+
+    def _is_gemini(self, engine_id: str) -> bool:
+        return self.multi_engine_service.engine_configs.get(engine_id, {}).get("type") == "gemini"
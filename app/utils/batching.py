@@ -0,0 +1,84 @@
+"""Length-bucketed batching shared by translation and COMET inference.
+
+Padded batches cost roughly (batch size × longest item) tokens, so mixing a
+3-word UI label with a 200-token paragraph wastes most of the compute on
+padding. These helpers sort inputs by estimated length, cut the sorted list
+into buckets whose padded size stays under a token budget, run each bucket and
+put the results back in the caller's original order.
+"""
+
+import logging
+from typing import Callable, List, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap input-length estimate used for token budgets (no tokenizer call).
+
+    Whitespace words for spaced scripts, ~4 chars/token otherwise, so unspaced
+    Japanese is not counted as a single token.
+    """
+    return max(len(text.split()), len(text) // 4, 1)
+
+
+def build_length_buckets(lengths: Sequence[int], max_batch_size: int, max_tokens: int) -> List[List[int]]:
+    """Group item indices into buckets of similar length.
+
+    Indices are sorted by length; a bucket is closed when adding the next item
+    would exceed max_batch_size items or a padded size (items × longest) of
+    max_tokens. An item longer than max_tokens still gets a bucket of its own.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    buckets: List[List[int]] = []
+    current: List[int] = []
+    for idx in order:
+        # Sorted ascending, so the newest item is always the bucket's longest
+        padded = (len(current) + 1) * lengths[idx]
+        if current and (len(current) >= max_batch_size or padded > max_tokens):
+            buckets.append(current)
+            current = []
+        current.append(idx)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def length_bucketed_map(
+    items: Sequence[T],
+    fn: Callable[[List[T]], List[R]],
+    length_fn: Callable[[T], int],
+    max_batch_size: int,
+    max_tokens: int,
+    isolate_failures: bool = False,
+) -> List[R]:
+    """Run fn over length-sorted buckets of items and return results in input order.
+
+    fn receives one bucket (a list of items) and must return one result per item.
+    With isolate_failures, a bucket that raises is retried one item at a time
+    and an item that still fails gets its exception as its result, instead of
+    the error failing every other bucket.
+    """
+    results: List[R] = [None] * len(items)  # type: ignore[list-item]
+    lengths = [length_fn(item) for item in items]
+    for bucket in build_length_buckets(lengths, max_batch_size, max_tokens):
+        try:
+            outputs = fn([items[i] for i in bucket])
+        except Exception as e:
+            if not isolate_failures:
+                raise
+            logger.warning(f"Batch of {len(bucket)} item(s) failed ({e}); retrying items one at a time.")
+            outputs = [e] if len(bucket) == 1 else [_run_alone(fn, items[i]) for i in bucket]
+        for i, output in zip(bucket, outputs):
+            results[i] = output
+    return results
+
+
+def _run_alone(fn: Callable[[List[T]], List[R]], item: T):
+    try:
+        return fn([item])[0]
+    except Exception as e:
+        return e
@@ -0,0 +1,141 @@
+"""Sentence chunking for inputs longer than a model's context.
+
+Marian and NLLB truncate at 512 tokens, so a pasted paragraph or PDF page would
+silently lose its tail. expand_chunks() splits only the oversized inputs into
+sentences (split_text_into_sentences), packs consecutive sentences back into
+chunks that fit the token limit, and returns one flat list to translate as a
+single batch. reassemble() rebuilds each input from its translated chunks,
+keeping leading/trailing whitespace and line breaks from the source and
+joining sentences without spaces for Japanese targets.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.utils.text_processing import split_text_into_sentences
+
+# layout entry per input: {"chunks": [flat indices], "separators": [text before each chunk], "trailing": str}
+Layout = List[Dict]
+
+
+def _is_japanese(lang: Optional[str]) -> bool:
+    return bool(lang) and any(ja in lang.lower() for ja in ("ja", "jp", "jpn"))
+
+
+def split_oversized(
+    text: str,
+    source_lang: str,
+    max_tokens: int,
+    length_fn: Callable[[str], int],
+) -> Optional[Tuple[List[str], List[str], str]]:
+    """(chunks, separator before each chunk, trailing whitespace), or None if text fits."""
+    if length_fn(text) <= max_tokens:
+        return None
+    sentences = split_text_into_sentences(text, source_lang)
+    if len(sentences) < 2:
+        return None
+
+    # Locate each sentence in the source so chunks keep the original whitespace
+    spans: List[Tuple[int, int]] = []
+    position = 0
+    for sentence in sentences:
+        start = text.find(sentence, position)
+        if start < 0:
+            # Tokenizer normalized the sentence; fall back to a one-chunk-per-text split
+            return None
+        spans.append((start, start + len(sentence)))
+        position = start + len(sentence)
+
+    chunks: List[str] = []
+    separators: List[str] = []
+    chunk_start, chunk_end = spans[0]
+    previous_end = 0
+    for start, end in spans[1:]:
+        if length_fn(text[chunk_start:end]) <= max_tokens:
+            chunk_end = end
+            continue
+        separators.append(text[previous_end:chunk_start])
+        chunks.append(text[chunk_start:chunk_end])
+        previous_end = chunk_end
+        chunk_start, chunk_end = start, end
+    separators.append(text[previous_end:chunk_start])
+    chunks.append(text[chunk_start:chunk_end])
+    if len(chunks) < 2:
+        return None
+    return chunks, separators, text[chunk_end:]
+
+
+def expand_chunks(
+    texts: Sequence[str],
+    source_lang: str,
+    max_tokens: Optional[int],
+    length_fn: Callable[[str], int],
+) -> Tuple[List[str], Layout]:
+    """Flat list of chunks to translate (inputs that fit stay whole) and the layout to rebuild them."""
+    flat: List[str] = []
+    layout: Layout = []
+    for text in texts:
+        split = split_oversized(text, source_lang, max_tokens, length_fn) if max_tokens else None
+        if split is None:
+            layout.append({"chunks": [len(flat)], "separators": [""], "trailing": ""})
+            flat.append(text)
+            continue
+        chunks, separators, trailing = split
+        layout.append({
+            "chunks": list(range(len(flat), len(flat) + len(chunks))),
+            "separators": separators,
+            "trailing": trailing,
+        })
+        flat.extend(chunks)
+    return flat, layout
+
+
+def _join_separator(separator: str, first: bool, target_lang: Optional[str]) -> str:
+    if first or "\n" in separator:
+        # Leading whitespace and paragraph / line breaks survive as-is
+        return separator
+    return "" if _is_japanese(target_lang) else " "
+
+
+def reassemble(translated: Sequence[str], layout: Layout, target_lang: Optional[str]) -> List[str]:
+    """Rebuild one output per original input from translated chunks.
+
+    A chunk that failed (an Exception in translated) fails its whole input.
+    """
+    outputs = []
+    for entry in layout:
+        if len(entry["chunks"]) == 1:
+            outputs.append(translated[entry["chunks"][0]])
+            continue
+        failed = next((translated[i] for i in entry["chunks"] if isinstance(translated[i], Exception)), None)
+        if failed is not None:
+            outputs.append(failed)
+            continue
+        parts = []
+        for position, (index, separator) in enumerate(zip(entry["chunks"], entry["separators"])):
+            parts.append(_join_separator(separator, position == 0, target_lang))
+            parts.append(translated[index].strip())
+        parts.append(entry["trailing"])
+        outputs.append("".join(parts))
+    return outputs
+
+
+def chunk_provenance(
+    sources: Sequence[str],
+    translated: Sequence[str],
+    layout: Layout,
+    intermediates: Optional[Sequence[str]] = None,
+) -> List[Optional[List[Dict]]]:
+    """Per input: None if it was translated whole, else one {index, source, text} record per chunk."""
+    provenance = []
+    for entry in layout:
+        if len(entry["chunks"]) == 1:
+            provenance.append(None)
+            continue
+        records = []
+        for position, index in enumerate(entry["chunks"]):
+            record = {"index": position, "source": sources[index], "text": translated[index]}
+            if intermediates is not None:
+                record["intermediate_translation"] = intermediates[index]
+            records.append(record)
+        provenance.append(records)
+    return provenance
@@ -0,0 +1,54 @@
+"""Collapse duplicate segments before engine, fuzzy-matching and QE calls.
+
+Documents repeat headings, footers and button labels many times. dedupe()
+returns each distinct item once plus an index map, so the caller runs the
+expensive step on the distinct items and fans results back out with
+fan_out().
+"""
+
+import re
+import unicodedata
+from typing import Callable, Hashable, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_segment(text: str) -> str:
+    """NFC + trimmed, collapsed whitespace; segments equal under this are translated once."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def dedupe(items: Sequence[T], key: Callable[[T], Hashable] = normalize_segment) -> Tuple[List[T], List[int]]:
+    """Return (distinct items in first-seen order, index into them for every input item)."""
+    first_index = {}
+    unique: List[T] = []
+    index_map: List[int] = []
+    for item in items:
+        k = key(item)
+        if k not in first_index:
+            first_index[k] = len(unique)
+            unique.append(item)
+        index_map.append(first_index[k])
+    return unique, index_map
+
+
+def fan_out(unique_results: Sequence[R], index_map: Sequence[int]) -> List[R]:
+    """Expand results for the distinct items back to one result per original item."""
+    return [unique_results[i] for i in index_map]
+
+
+def dedup_stats(total_segments: int, unique_segments: int, target_count: int, engines: int) -> dict:
+    """Per-job savings from translating each distinct source segment once per target."""
+    duplicates = total_segments - unique_segments
+    return {
+        "dedup": {
+            "totalSegments": total_segments,
+            "uniqueSegments": unique_segments,
+            "duplicateSegments": duplicates,
+            "fuzzyLookupsSaved": duplicates * target_count,
+            "engineCallsSaved": duplicates * target_count * engines,
+        }
+    }
@@ -0,0 +1,24 @@
+"""Newline-delimited JSON streaming responses.
+
+Each line is one JSON object with a "type" key: "request" (the parent
+record without its children), "string" / "metric" (one child row under
+"data"), "end" (counts and the cursor to resume from) and "error". Clients
+can render each line as it arrives.
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+MEDIA_TYPE = "application/x-ndjson"
+
+
+def ndjson_line(event_type: str, payload: Dict[str, Any]) -> str:
+    return json.dumps(jsonable_encoder({"type": event_type, **payload}), ensure_ascii=False) + "\n"
+
+
+def ndjson_response(lines: AsyncIterator[str]) -> StreamingResponse:
+    # X-Accel-Buffering: stop nginx-style proxies from holding the stream back
+    return StreamingResponse(lines, media_type=MEDIA_TYPE, headers={"X-Accel-Buffering": "no"})
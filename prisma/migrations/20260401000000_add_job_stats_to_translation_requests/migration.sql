@@ -0,0 +1,3 @@
+-- Per-job pipeline statistics (segment deduplication savings, etc.) stored
+-- alongside the translation request they describe.
+ALTER TABLE "translation_requests" ADD COLUMN "jobStats" JSONB;
@@ -0,0 +1,30 @@
+-- Durable background jobs for translation requests submitted with ?async=true
+CREATE TYPE "JobStatus" AS ENUM ('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED');
+
+CREATE TABLE "translation_jobs" (
+    "id" TEXT NOT NULL,
+    "translationRequestId" TEXT NOT NULL,
+    "kind" "RequestType" NOT NULL,
+    "payload" JSONB NOT NULL,
+    "status" "JobStatus" NOT NULL DEFAULT 'QUEUED',
+    "totalSegments" INTEGER NOT NULL,
+    "completedSegments" INTEGER NOT NULL DEFAULT 0,
+    "processingTimeMs" INTEGER NOT NULL DEFAULT 0,
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "workerId" TEXT,
+    "heartbeatAt" TIMESTAMP(3),
+    "error" TEXT,
+    "startedAt" TIMESTAMP(3),
+    "finishedAt" TIMESTAMP(3),
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "translation_jobs_pkey" PRIMARY KEY ("id")
+);
+
+CREATE UNIQUE INDEX "translation_jobs_translationRequestId_key" ON "translation_jobs"("translationRequestId");
+CREATE INDEX "translation_jobs_status_createdAt_idx" ON "translation_jobs"("status", "createdAt");
+
+ALTER TABLE "translation_jobs" ADD CONSTRAINT "translation_jobs_translationRequestId_fkey"
+    FOREIGN KEY ("translationRequestId") REFERENCES "translation_requests"("id")
+    ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,119 @@
+"""Gemini calls must not block the event loop, and must honour timeouts and cancellation."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.transcreation_service import TranscreationService
+
+
+class FakeModels:
+    """Stands in for client.aio.models: generate_content sleeps instead of calling Gemini."""
+
+    def __init__(self, delay: float, text: str = "Bonjour"):
+        self.delay = delay
+        self.text = text
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    async def generate_content(self, model, contents, config):
+        self.started.set()
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return SimpleNamespace(text=self.text, usage_metadata=None)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    # No context caches: every call goes straight to generate_content
+    monkeypatch.setattr(settings, "TRANSCREATION_CONTEXT_CACHE", False)
+    return TranscreationService()
+
+
+def _use(service: TranscreationService, models: FakeModels) -> FakeModels:
+    service._client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    return models
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_request(service):
+    models = _use(service, FakeModels(delay=0.5))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        result = await service.transcreate("Hello", "en", "fr")
+    finally:
+        ticking.cancel()
+
+    assert result == "Bonjour"
+    assert models.started.is_set()
+    # A blocking call would have starved the ticker for the whole 0.5 s
+    assert ticks >= 20
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_overlap(service):
+    _use(service, FakeModels(delay=0.3))
+    loop = asyncio.get_running_loop()
+
+    started = loop.time()
+    results = await asyncio.gather(*[service.transcreate(f"Hello {n}", "en", "fr") for n in range(3)])
+
+    assert results == ["Bonjour"] * 3
+    assert loop.time() - started < 0.8
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_the_request(service, monkeypatch):
+    monkeypatch.setattr(settings, "TRANSCREATION_TIMEOUT_S", 0.1)
+    models = _use(service, FakeModels(delay=10))
+
+    with pytest.raises(asyncio.TimeoutError):
+        await service.transcreate("Hello", "en", "fr")
+
+    assert models.cancelled
+
+
+@pytest.mark.asyncio
+async def test_caller_cancellation_cancels_the_request(service):
+    models = _use(service, FakeModels(delay=10))
+
+    task = asyncio.create_task(service.transcreate("Hello", "en", "fr"))
+    await asyncio.wait_for(models.started.wait(), timeout=1)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert models.cancelled
+
+
+@pytest.mark.asyncio
+async def test_batch_timeout_fails_every_segment_without_splitting(service, monkeypatch):
+    monkeypatch.setattr(settings, "TRANSCREATION_TIMEOUT_S", 0.1)
+    models = _use(service, FakeModels(delay=10))
+    calls = 0
+    generate_content = models.generate_content
+
+    async def counting_generate_content(**kwargs):
+        nonlocal calls
+        calls += 1
+        return await generate_content(**kwargs)
+
+    models.generate_content = counting_generate_content
+    results = await service.transcreate_batch(["Hello", "Goodbye", "Thanks"], "en", "fr")
+
+    assert calls == 1
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)